@@ -6,8 +6,14 @@
 @IDE ：PyCharm
 """
 
+import math
 import numpy as np
-from scipy.linalg import logm
+
+# 批量逆解各分支无效的原因（按位组合）
+IK_OUT_OF_REACH = 1         # theta1无解：腕部中心落在以d4为半径的圆柱内
+IK_WRIST_SINGULAR = 2       # 腕部奇异：sin(theta5)≈0，theta4与theta6不唯一（theta6取给定值，缺省为0）
+IK_ELBOW_DOMAIN = 4         # theta5或theta3的arccos超出定义域：目标超出工作空间
+
 
 class DH:
     def __init__(self):
@@ -32,13 +38,24 @@ class DH:
         self.DH_alpha5 = -90
         self.DH_alpha6 = 0
 
-        # 将alpha的角度转为弧度
-        self.DH_alpha1 = self.angle_to_radian(self.DH_alpha1)
-        self.DH_alpha2 = self.angle_to_radian(self.DH_alpha2)
-        self.DH_alpha3 = self.angle_to_radian(self.DH_alpha3)
-        self.DH_alpha4 = self.angle_to_radian(self.DH_alpha4)
-        self.DH_alpha5 = self.angle_to_radian(self.DH_alpha5)
-        self.DH_alpha6 = self.angle_to_radian(self.DH_alpha6)
+        # 将alpha的角度转为弧度，保留完整精度（逆解的解析式按alpha恰为±90°推导，截断会引入约3e-7的模型误差）
+        self.DH_alpha1 = self.angle_to_radian(self.DH_alpha1, 15)
+        self.DH_alpha2 = self.angle_to_radian(self.DH_alpha2, 15)
+        self.DH_alpha3 = self.angle_to_radian(self.DH_alpha3, 15)
+        self.DH_alpha4 = self.angle_to_radian(self.DH_alpha4, 15)
+        self.DH_alpha5 = self.angle_to_radian(self.DH_alpha5, 15)
+        self.DH_alpha6 = self.angle_to_radian(self.DH_alpha6, 15)
+
+        # 批量运算用的DH参数数组
+        self.a = np.array([self.DH_a1, self.DH_a2, self.DH_a3, self.DH_a4, self.DH_a5, self.DH_a6])
+        self.d = np.array([self.DH_d1, self.DH_d2, self.DH_d3, self.DH_d4, self.DH_d5, self.DH_d6])
+        self.alpha = np.array([self.DH_alpha1, self.DH_alpha2, self.DH_alpha3,
+                               self.DH_alpha4, self.DH_alpha5, self.DH_alpha6])
+        self.a_list, self.d_list = self.a.tolist(), self.d.tolist()
+        self.cos_alpha, self.sin_alpha = np.cos(self.alpha).tolist(), np.sin(self.alpha).tolist()
+        self.FK_chunk = 8192                # 批量正解每次处理的组数，中间数组保持在缓存内
+        self.FK_scalar_limit = 16           # 组数少于该值时用标量计算
+        self.FK_buffers = None              # 批量正解的工作数组，首次调用时按FK_chunk分配，之后复用
 
     def angle_to_radian(self, angle: float, precision=6):
         '''
@@ -78,43 +95,220 @@ class DH:
         ret = np.matrix(ret)
         return ret
 
-    def RV_RM(self, p: list):
+    def RV_RM(self, p):
         '''
         将机械臂位姿转为正运动学所得的T矩阵
-        :param p:   机械臂位姿 [x, y, z, rx, ry, rz]
-        :return:    list: 正解T矩阵
+        :param p:   机械臂位姿 [x, y, z, rx, ry, rz]，或N组位姿 shape=(N, 6)
+        :return:    np.ndarray: 正解T矩阵 shape=(4, 4) 或 (N, 4, 4)
         '''
-        # 提取位置和旋转
-        x, y, z, rx, ry, rz = p
-        # 计算旋转矩阵
-        theta = np.sqrt(rx ** 2 + ry ** 2 + rz ** 2)
-        k = np.array([rx, ry, rz]) / theta
-
-        K = np.array([[0, -k[2], k[1]],
-                      [k[2], 0, -k[0]],
-                      [-k[1], k[0], 0]])
-
-        R = np.eye(3) + np.sin(theta) * K + (1 - np.cos(theta)) * (K @ K)
-
-        # 构造变换矩阵 T
-        T = np.eye(4)
-        T[0:3, 0:3] = R
-        T[:3, 3] = x, y, z
+        p = np.asarray(p, dtype=float)
+        T = np.zeros(p.shape[:-1] + (4, 4))
+        T[..., :3, :3] = self.rotation_matrix(p[..., 3:])
+        T[..., :3, 3] = p[..., :3]
+        T[..., 3, 3] = 1.0
         return T
 
     def RM_RV(self, T):
         '''
         机械臂正运动学解得的T矩阵转为机械臂位姿
-        :param T:   4*4的旋转矩阵
-        :return:    list: 机械臂位姿 [x, y, x, rx, ry, rz]
-        '''
-        R = T[:3, :3]
-        cos_theta = (np.trace(R) - 1) / 2.0
-        theta = np.arccos(np.clip(cos_theta, -1.0, 1.0))
-        r = np.array([R[2, 1] - R[1, 2], R[0, 2] - R[2, 0], R[1, 0] - R[0, 1]]) / (2 * np.sin(theta))
-        rotating = r * theta
-        ret = [T[0,3], T[1,3], T[2,3], rotating[0], rotating[1], rotating[2]]
-        return ret
+        :param T:   4*4的齐次变换矩阵，或N个 shape=(N, 4, 4)
+        :return:    list: 机械臂位姿 [x, y, z, rx, ry, rz]；批量输入时为 np.ndarray shape=(N, 6)
+        '''
+        T = np.asarray(T, dtype=float)
+        pose = np.concatenate((T[..., :3, 3], self.rotation_vector(T[..., :3, :3])), axis=-1)
+        return pose.tolist() if pose.ndim == 1 else pose
+
+    def rotation_matrix(self, rv):
+        '''
+        旋转矢量 -> 旋转矩阵（罗德里格斯公式），R = I + A*K + B*K^2，K为旋转矢量的反对称矩阵
+        A = sin(theta)/theta，B = (1-cos(theta))/theta^2，theta接近0时改用泰勒展开
+        :param rv:  旋转矢量 [rx, ry, rz]，或 shape=(N, 3)
+        :return:    np.ndarray: 旋转矩阵 shape=(3, 3) 或 (N, 3, 3)
+        '''
+        rv = np.asarray(rv, dtype=float)
+        rx, ry, rz = rv[..., 0], rv[..., 1], rv[..., 2]
+        theta2 = rx * rx + ry * ry + rz * rz
+        theta = np.sqrt(theta2)
+        small = theta < 1e-4
+        safe = np.where(small, 1.0, theta)
+        A = np.where(small, 1 - theta2 / 6, np.sin(safe) / safe)
+        B = np.where(small, 0.5 - theta2 / 24, 2 * np.sin(safe / 2) ** 2 / (safe * safe))     # 1-cos写成2sin²，避免相减损失精度
+
+        R = np.empty(rv.shape[:-1] + (3, 3))
+        R[..., 0, 0] = 1 - B * (ry * ry + rz * rz)
+        R[..., 1, 1] = 1 - B * (rx * rx + rz * rz)
+        R[..., 2, 2] = 1 - B * (rx * rx + ry * ry)
+        R[..., 0, 1] = B * rx * ry - A * rz
+        R[..., 1, 0] = B * rx * ry + A * rz
+        R[..., 0, 2] = B * rx * rz + A * ry
+        R[..., 2, 0] = B * rx * rz - A * ry
+        R[..., 1, 2] = B * ry * rz - A * rx
+        R[..., 2, 1] = B * ry * rz + A * rx
+        return R
+
+    def rotation_vector(self, R):
+        '''
+        旋转矩阵 -> 旋转矢量（旋转角 0~pi），闭式解，代替矩阵对数logm
+        - 一般情况：反对称部分 v = 2*sin(theta)*k，rv = theta / (2*sin(theta)) * v，theta由atan2(|v|/2, cos)求得
+        - theta接近0：系数用泰勒展开 1/2 + theta^2/12
+        - theta接近pi：sin(theta)≈0，v不可靠，改由对称部分 (R+R^T)/2 - cos*I = (1-cos)*k*k^T 取对角线最大的一列得到k，
+          符号与v一致（theta=pi时两个方向等价）
+        :param R:   旋转矩阵 shape=(3, 3) 或 (N, 3, 3)
+        :return:    np.ndarray: 旋转矢量 shape=(3,) 或 (N, 3)
+        '''
+        R = np.asarray(R, dtype=float)
+        if R.ndim == 2:                                         # 单个矩阵用标量计算，避免numpy小数组的调用开销
+            return np.array(self.rotation_vector_scalar(R.tolist()))
+        v = np.stack((R[..., 2, 1] - R[..., 1, 2],
+                      R[..., 0, 2] - R[..., 2, 0],
+                      R[..., 1, 0] - R[..., 0, 1]), axis=-1)
+        cos = np.clip((R[..., 0, 0] + R[..., 1, 1] + R[..., 2, 2] - 1) / 2, -1.0, 1.0)
+        sin = np.sqrt(np.einsum('...i,...i->...', v, v)) / 2
+        theta = np.arctan2(sin, cos)
+
+        small = theta < 1e-4
+        safe = np.where(small, 1.0, sin)
+        scale = np.where(small, 0.5 + theta * theta / 12, theta / (2 * safe))
+        rv = v * scale[..., None]
+
+        near_pi = cos < -0.9                                    # theta > 154°，sin(theta)越小，v的相对误差越大
+        if np.any(near_pi):
+            Rp, vp, cp, tp = R[near_pi], v[near_pi], cos[near_pi], theta[near_pi]
+            S = (Rp + np.swapaxes(Rp, -1, -2)) / 2
+            S[:, [0, 1, 2], [0, 1, 2]] -= cp[:, None]           # (1-cos)*k*k^T
+            index = np.argmax(S[:, [0, 1, 2], [0, 1, 2]], axis=1)
+            k = S[np.arange(len(S)), :, index]                  # 对角线最大的一列 = (1-cos)*k_i*k
+            k /= np.linalg.norm(k, axis=1, keepdims=True)
+            k *= np.where(np.einsum('ij,ij->i', k, vp) < 0, -1.0, 1.0)[:, None]
+            rv[near_pi] = k * tp[:, None]
+        return rv
+
+    def rotation_vector_scalar(self, R):
+        '''
+        单个旋转矩阵 -> 旋转矢量，算法同rotation_vector
+        :param R:   旋转矩阵（嵌套列表） 3*3
+        :return:    list: 旋转矢量 [rx, ry, rz]
+        '''
+        (r00, r01, r02), (r10, r11, r12), (r20, r21, r22) = R[0][:3], R[1][:3], R[2][:3]
+        v = [r21 - r12, r02 - r20, r10 - r01]
+        cos = min(max((r00 + r11 + r22 - 1) / 2, -1.0), 1.0)
+        sin = math.sqrt(v[0] * v[0] + v[1] * v[1] + v[2] * v[2]) / 2
+        theta = math.atan2(sin, cos)
+        if cos < -0.9:
+            S = [[r00 - cos, (r01 + r10) / 2, (r02 + r20) / 2],
+                 [(r01 + r10) / 2, r11 - cos, (r12 + r21) / 2],
+                 [(r02 + r20) / 2, (r12 + r21) / 2, r22 - cos]]
+            k = S[max(range(3), key=lambda i: S[i][i])]         # 对称矩阵，取行即取列
+            scale = theta / math.sqrt(k[0] * k[0] + k[1] * k[1] + k[2] * k[2])
+            if k[0] * v[0] + k[1] * v[1] + k[2] * v[2] < 0:
+                scale = -scale
+            return [k[0] * scale, k[1] * scale, k[2] * scale]
+        scale = 0.5 + theta * theta / 12 if theta < 1e-4 else theta / (2 * sin)
+        return [v[0] * scale, v[1] * scale, v[2] * scale]
+
+    def FK(self, q, type='radian', links=False, out=None):
+        '''
+        批量正向运动学，N组关节角 -> N个T矩阵
+        逐关节更新末端坐标系的三个轴与原点：x' = c*x + s*y，u = c*y - s*x，y' = cos(alpha)*u + sin(alpha)*z，
+        z' = cos(alpha)*z - sin(alpha)*u，p' = p + a*x' + d*z，全部为 (3, chunk) 数组上的逐元素运算，不做4*4矩阵乘法
+        工作数组预先分配并复用，同一个DH对象不要在多个线程中同时调用
+        :param q:       关节角 shape=(6,) 或 (N, 6)
+        :param type:    数据类型：radian、angle
+        :param links:   True -> 同时返回各关节坐标系（基座 -> 关节i）shape=(N, 6, 4, 4)
+        :param out:     结果数组 shape=(N, 4, 4)，缺省时新建
+        :return:        np.ndarray: T矩阵 shape=(4, 4) 或 (N, 4, 4)；links为True时返回 (T, 各关节坐标系)
+        '''
+        q = np.asarray(q, dtype=np.float64)
+        single = q.ndim == 1
+        q = q.reshape(-1, 6)
+        if type == 'angle':
+            q = np.radians(q)
+        n = len(q)
+        T = np.empty((n, 4, 4)) if out is None else out
+        T[:, 3, :3] = 0
+        T[:, 3, 3] = 1
+        frames = None
+        if links:
+            frames = np.empty((n, 6, 4, 4))
+            frames[:, :, 3, :3] = 0
+            frames[:, :, 3, 3] = 1
+
+        if n < self.FK_scalar_limit:                           # 组数很少时逐元素运算的调用开销占主导，改用标量计算
+            for k in range(n):
+                self.FK_scalar(q[k], T[k], frames[k] if links else None)
+            if single:
+                return (T[0], frames[0]) if links else T[0]
+            return (T, frames) if links else T
+
+        chunk = self.FK_chunk
+        if self.FK_buffers is None:
+            self.FK_buffers = (np.empty((6, chunk)), np.empty((6, chunk)), np.empty((6, 3, chunk)))
+        cos_all, sin_all, work = self.FK_buffers
+        cos_alpha, sin_alpha = np.cos(self.alpha), np.sin(self.alpha)
+        for start in range(0, n, chunk):
+            m = min(chunk, n - start)
+            cos, sin = cos_all[:, :m], sin_all[:, :m]
+            np.cos(q[start:start + m].T, out=cos)
+            np.sin(q[start:start + m].T, out=sin)
+            x, y, z, p, u, tmp = (w[:, :m] for w in work)
+            x[:] = [[1], [0], [0]]
+            y[:] = [[0], [1], [0]]
+            z[:] = [[0], [0], [1]]
+            p[:] = 0
+            for i in range(6):
+                c, s = cos[i], sin[i]
+                np.multiply(y, c, out=u)                        # u = c*y - s*x
+                np.multiply(x, s, out=tmp)
+                u -= tmp
+                x *= c                                          # x = c*x + s*y
+                np.multiply(y, s, out=tmp)
+                x += tmp
+                if self.a[i]:
+                    np.multiply(x, self.a[i], out=tmp)          # p += a*x' + d*z
+                    p += tmp
+                if self.d[i]:
+                    np.multiply(z, self.d[i], out=tmp)
+                    p += tmp
+                np.multiply(u, cos_alpha[i], out=y)             # y = cos(alpha)*u + sin(alpha)*z
+                np.multiply(z, sin_alpha[i], out=tmp)
+                y += tmp
+                z *= cos_alpha[i]                               # z = cos(alpha)*z - sin(alpha)*u
+                np.multiply(u, sin_alpha[i], out=tmp)
+                z -= tmp
+                if links:
+                    frame = frames[start:start + m, i]
+                    frame[:, :3, 0], frame[:, :3, 1], frame[:, :3, 2], frame[:, :3, 3] = x.T, y.T, z.T, p.T
+            block = T[start:start + m]
+            block[:, :3, 0], block[:, :3, 1], block[:, :3, 2], block[:, :3, 3] = x.T, y.T, z.T, p.T
+
+        if single:
+            T = T[0]
+            frames = frames[0] if links else None
+        return (T, frames) if links else T
+
+    def FK_scalar(self, q, T, frames=None):
+        '''
+        单组关节角的正解，与FK相同的逐关节更新，用Python浮点数计算
+        :param q:       关节角（弧度） shape=(6,)
+        :param T:       结果T矩阵 shape=(4, 4)，末行需已填好
+        :param frames:  各关节坐标系 shape=(6, 4, 4)，为None时不输出
+        :return:        None
+        '''
+        x0, x1, x2 = 1.0, 0.0, 0.0
+        y0, y1, y2 = 0.0, 1.0, 0.0
+        z0, z1, z2 = 0.0, 0.0, 1.0
+        p0, p1, p2 = 0.0, 0.0, 0.0
+        for i, (theta, a, d, ca, sa) in enumerate(zip(q.tolist(), self.a_list, self.d_list,
+                                                      self.cos_alpha, self.sin_alpha)):
+            c, s = math.cos(theta), math.sin(theta)
+            u0, u1, u2 = c * y0 - s * x0, c * y1 - s * x1, c * y2 - s * x2
+            x0, x1, x2 = c * x0 + s * y0, c * x1 + s * y1, c * x2 + s * y2
+            p0, p1, p2 = p0 + a * x0 + d * z0, p1 + a * x1 + d * z1, p2 + a * x2 + d * z2
+            y0, y1, y2, z0, z1, z2 = (ca * u0 + sa * z0, ca * u1 + sa * z1, ca * u2 + sa * z2,
+                                      ca * z0 - sa * u0, ca * z1 - sa * u1, ca * z2 - sa * u2)
+            if frames is not None:
+                frames[i, :3] = [[x0, y0, z0, p0], [x1, y1, z1, p1], [x2, y2, z2, p2]]
+        T[:3] = [[x0, y0, z0, p0], [x1, y1, z1, p1], [x2, y2, z2, p2]]
 
     def DH_FK(self, theta: list, precision=6):
         '''
@@ -122,7 +316,7 @@ class DH:
         :param theta:       6关节角度值列表
         :param precision:   返回值保留精度，默认为6位小数
         :return:            list: pose  -> [x, y, z, rx, ry, rz]
-                            list: T     -> 6关节的T矩阵
+                            np.ndarray: T -> 6关节的T矩阵 shape=(4, 4)
         '''
         # 用来接收角度所转的弧度值
         radian = [0, 0, 0, 0, 0, 0]
@@ -131,27 +325,294 @@ class DH:
         for i in range(len(theta)):
             radian[i] = self.angle_to_radian(theta[i])
 
-        # 求六个joint的T矩阵
-        t1 = self.DH_T(radian[0], self.DH_a1, self.DH_d1, self.DH_alpha1)
-        t2 = self.DH_T(radian[1], self.DH_a2, self.DH_d2, self.DH_alpha2)
-        t3 = self.DH_T(radian[2], self.DH_a3, self.DH_d3, self.DH_alpha3)
-        t4 = self.DH_T(radian[3], self.DH_a4, self.DH_d4, self.DH_alpha4)
-        t5 = self.DH_T(radian[4], self.DH_a5, self.DH_d5, self.DH_alpha5)
-        t6 = self.DH_T(radian[5], self.DH_a6, self.DH_d6, self.DH_alpha6)
+        # 6关节T矩阵拼接，与批量正解共用
+        T = self.FK(radian)
+
+        # 计算旋转矢量（闭式解）
+        pose = [round(value, precision) for value in self.RM_RV(T)]
 
-        # 拼接6关节T矩阵
-        T = np.dot(np.dot(np.dot(np.dot(np.dot(t1, t2), t3), t4), t5), t6)
+        return pose, T
 
-        # 计算旋转矢量，用罗德里格斯参数（Rodrigues' parameters）的概念来将旋转矩阵转换为旋转矢量
-        rotation_vector = logm(T[:3, :3])
+    def IK(self, T, eps=1e-9, singular=1e-6, codes=False, theta6=0.0):
+        '''
+        批量逆向运动学，N个T矩阵 -> 每个8组关节角，分支顺序与DH_IK一致
+        theta1两解 x theta5正负 x theta3正负，全部在 (N, ...) 数组上一次求出
+        :param T:           T矩阵 shape=(4, 4) 或 (N, 4, 4)
+        :param eps:         arccos、开方的定义域容差，超出容差按无解处理，容差内截断
+        :param singular:    |sin(theta5)|小于该值视为腕部奇异
+        :param codes:       True -> 额外返回各分支无效的原因（IK_OUT_OF_REACH等按位组合）
+        :param theta6:      腕部奇异时theta6的取值（弧度），标量或 shape=(N,)，其余关节随之求解
+        :return:            (np.ndarray, np.ndarray): 关节角（弧度，-pi~pi） shape=(N, 8, 6)、有效掩码 shape=(N, 8)
+                            无解的分支为NaN；腕部奇异的分支给出theta6取给定值的一组解，但掩码为False
+                            输入为单个T矩阵时 shape=(8, 6)、(8,)
+        '''
+        T = np.asarray(T, dtype=np.float64)
+        single = T.ndim == 2
+        T = T.reshape(-1, 4, 4)
+        n = len(T)
+        a2, a3, d1, d4, d5, d6 = self.DH_a2, self.DH_a3, self.DH_d1, self.DH_d4, self.DH_d5, self.DH_d6
+        r = [[T[:, i, j, None] for j in range(4)] for i in range(3)]   # 各元素 shape=(N, 1)，与分支维度广播
+        flags = np.zeros((n, 8), dtype=np.uint8)
+
+        # theta1：2个解 shape=(N, 2)
+        m = d6 * r[1][2] - r[1][3]
+        k = d6 * r[0][2] - r[0][3]
+        root = m ** 2 + k ** 2 - d4 ** 2
+        reach = root >= -eps
+        root = np.sqrt(np.maximum(root, 0))
+        theta1 = np.arctan2(m, k) - np.arctan2(d4, np.hstack((root, -root)))
+        flags[~reach[:, 0]] |= IK_OUT_OF_REACH
+        s1, c1 = np.sin(theta1), np.cos(theta1)
+
+        # theta5：每个theta1正负两解 shape=(N, 4)，顺序 [1+, 1-, 2+, 2-]
+        c5 = np.repeat(r[0][2] * s1 - r[1][2] * c1, 2, axis=1)
+        domain = np.abs(c5) <= 1 + eps
+        theta5 = np.arccos(np.clip(c5, -1, 1)) * np.array([1, -1, 1, -1])
+        theta5[~domain] = np.nan
+        s1, c1 = np.repeat(s1, 2, axis=1), np.repeat(c1, 2, axis=1)
+        s5 = np.sin(theta5)
+        wrist = np.abs(s5) < singular
+
+        # theta6 shape=(N, 4)，奇异时取给定值
+        sign = np.where(s5 < 0, -1.0, 1.0)
+        mm = r[0][0] * s1 - r[1][0] * c1
+        nn = r[0][1] * s1 - r[1][1] * c1
+        theta6 = np.where(wrist, np.reshape(theta6, (-1, 1)), np.arctan2(-nn * sign, mm * sign))
+        s6, c6 = np.sin(theta6), np.cos(theta6)
+
+        # theta3：每个(theta1, theta5)正负两解 shape=(N, 8)
+        rx = r[0][0] * c1 + r[1][0] * s1
+        ry = r[0][1] * c1 + r[1][1] * s1
+        m3 = d5 * (s6 * rx + c6 * ry) - d6 * (r[0][2] * c1 + r[1][2] * s1) + r[0][3] * c1 + r[1][3] * s1
+        n3 = r[2][3] - d1 - r[2][2] * d6 + d5 * (r[2][1] * c6 + r[2][0] * s6)
+        c3 = (m3 ** 2 + n3 ** 2 - a2 ** 2 - a3 ** 2) / (2 * a2 * a3)
+        elbow = np.abs(c3) <= 1 + eps
+        theta3 = np.repeat(np.arccos(np.clip(c3, -1, 1)), 2, axis=1) * np.tile([1, -1], 4)
+        expand = lambda value: np.repeat(value, 2, axis=1)
+        m3, n3, rx, ry, s6, c6 = (expand(v) for v in (m3, n3, rx, ry, s6, c6))
+
+        # theta2、theta4 shape=(N, 8)
+        theta2 = np.arctan2(n3, m3) - np.arctan2(a3 * np.sin(theta3), a2 + a3 * np.cos(theta3))
+        theta4 = np.arctan2(-s6 * rx - c6 * ry, r[2][1] * c6 + r[2][0] * s6) - theta2 - theta3
+
+        flags[expand(~domain | ~elbow)] |= IK_ELBOW_DOMAIN
+        flags[expand(wrist & domain)] |= IK_WRIST_SINGULAR
+        q = np.empty((n, 8, 6))
+        q[..., 0] = np.repeat(theta1, 4, axis=1)
+        q[..., 1] = theta2
+        q[..., 2] = theta3
+        q[..., 3] = theta4
+        q[..., 4] = expand(theta5)
+        q[..., 5] = expand(theta6)
+        q = np.angle(np.exp(1j * q))                            # 归一化到 -pi~pi
+        q[(flags & (IK_OUT_OF_REACH | IK_ELBOW_DOMAIN)) != 0] = np.nan
+        valid = flags == 0
+        if single:
+            q, valid, flags = q[0], valid[0], flags[0]
+        return (q, valid, flags) if codes else (q, valid)
+
+    def IK_path(self, poses, seed, limits=None, window=1024):
+        '''
+        轨迹逆解：对位姿序列逐点选取离上一点最近的分支，保证关节角连续
+        - 关节角按 ±2pi 展开：每个关节取离上一点最近的等价角，超出限位时换到另一侧（±2pi）
+        - 过滤限位（limits）与无效分支（见IK），剩余分支中取关节空间欧氏距离最小的一个；腕部奇异的点theta6沿用上一点
+        - 分支序号 b = 4*肩部 + 2*腕部 + 肘部（theta1两解 x theta5正负 x theta3正负），相邻两点分支不同即为构型翻转，
+          branch[i] ^ branch[i-1] 可得翻转的是哪一位
+        只在起点和分支切换处逐点选择，其余沿当前分支按window点一段向量化展开，直到分支无效、超限或有其他分支更近
+        :param poses:   T矩阵 shape=(N, 4, 4)，或位姿 [x, y, z, rx, ry, rz] shape=(N, 6)
+        :param seed:    起始关节角（弧度），即机械臂当前的关节角 shape=(6,)
+        :param limits:  关节限位（角度），格式同配置jt_sld_limit [[min, max], ...]，缺省为 ±360°
+        :param window:  每次向量化展开的点数
+        :return:        (np.ndarray, np.ndarray, np.ndarray): 关节角（弧度） shape=(N, 6)、分支序号 shape=(N,)、
+                        构型翻转 shape=(N,)；无可用分支的点关节角为NaN、分支序号为-1，之后的点仍以最后一个有效点为参考
+        '''
+        poses = np.asarray(poses, dtype=np.float64)
+        T = self.RV_RM(poses) if poses.shape[-1] == 6 else poses
+        T = T.reshape(-1, 4, 4)
+        solutions, valid, codes = self.IK(T, codes=True)
+        n = len(solutions)
+        lower, upper = np.radians(limits if limits is not None else [[-360, 360]] * 6).T
+
+        q = np.full((n, 6), np.nan)
+        branch = np.full(n, -1, dtype=np.int8)
+        flips = np.zeros(n, dtype=bool)
+        prev = np.asarray(seed, dtype=np.float64)
+        current = -1                                            # 当前分支，-1表示需要重新选择
+        last = -1                                               # 上一个有效点的分支，用于判断翻转
+        i = 0
+        while i < n:
+            if current < 0:                                     # 逐点选择离上一点最近的分支
+                solution, usable = solutions[i:i + 1], valid[i:i + 1]
+                if np.any(codes[i] == IK_WRIST_SINGULAR):       # 腕部奇异：theta6沿用上一点，其余关节随之求解
+                    solution, _, code = self.IK(T[i:i + 1], codes=True, theta6=prev[5])
+                    usable = (code == 0) | (code == IK_WRIST_SINGULAR)
+                candidate, usable, distance = self.IK_candidates(prev[None], solution, usable, lower, upper)
+                if not usable[0].any():
+                    i += 1
+                    continue
+                current = int(np.argmin(distance[0]))
+                q[i], branch[i] = candidate[0, current], current
+                flips[i] = 0 <= last != current
+                last, prev = current, q[i]
+                i += 1
+                continue
+
+            # 沿当前分支展开：相邻点差值归一化到 -pi~pi 后累加，与逐点取最近等价角的结果相同
+            end = min(i + window, n)
+            steps = np.diff(solutions[i - 1:end, current], axis=0)
+            track = prev + np.cumsum((steps + np.pi) % (2 * np.pi) - np.pi, axis=0)
+            reference = np.vstack((prev, track[:-1]))
+            _, usable, distance = self.IK_candidates(reference, solutions[i:end], valid[i:end], lower, upper)
+            keep = valid[i:end, current] & np.all((track >= lower) & (track <= upper), axis=1)
+            keep &= distance[:, current] <= distance.min(axis=1)   # 距离相等时保持当前分支
+            keep = np.logical_and.accumulate(keep)
+            count = int(keep.sum())
+            q[i:i + count], branch[i:i + count] = track[:count], current
+            if count:
+                prev = q[i + count - 1]
+            i += count
+            if i < end or count == 0:
+                current = -1
+        return q, branch, flips
+
+    def IK_candidates(self, reference, solutions, valid, lower, upper):
+        '''
+        各分支离参考关节角最近的等价角，及可用性和距离
+        :param reference:   参考关节角 shape=(M, 6)
+        :param solutions:   逆解 shape=(M, 8, 6)
+        :param valid:       有效掩码 shape=(M, 8)
+        :param lower:       关节下限（弧度） shape=(6,)
+        :param upper:       关节上限（弧度） shape=(6,)
+        :return:            (np.ndarray, np.ndarray, np.ndarray): 关节角 shape=(M, 8, 6)、可用 shape=(M, 8)、
+                            距离（不可用为inf） shape=(M, 8)
+        '''
+        reference = reference[:, None]
+        candidate = reference + (solutions - reference + np.pi) % (2 * np.pi) - np.pi
+        shift = np.where(candidate > upper, -2 * np.pi, np.where(candidate < lower, 2 * np.pi, 0.0))
+        candidate += shift                                      # 超出限位的关节换到另一侧
+        with np.errstate(invalid='ignore'):
+            usable = valid & np.all((candidate >= lower) & (candidate <= upper), axis=2)
+        distance = np.where(usable, np.sum((candidate - reference) ** 2, axis=2), np.inf)
+        return candidate, usable, distance
+
+    def Jacobian(self, q, type='radian', tool=None, T=False):
+        '''
+        批量几何雅可比矩阵（基座坐标系），由FK的各关节坐标系求得
+        第i列：线速度部分 z_(i-1) x (p_e - o_(i-1))，角速度部分 z_(i-1)，z、o为关节i转轴的方向与原点
+        :param q:       关节角 shape=(6,) 或 (N, 6)
+        :param type:    数据类型：radian、angle
+        :param tool:    工具坐标系相对法兰的T矩阵 shape=(4, 4)，缺省为法兰中心
+        :param T:       True -> 同时返回末端（含工具）的T矩阵
+        :return:        np.ndarray: 雅可比矩阵 shape=(6, 6) 或 (N, 6, 6)，前三行为线速度、后三行为角速度；
+                        T为True时返回 (雅可比矩阵, T矩阵)
+        '''
+        q = np.asarray(q, dtype=np.float64)
+        single = q.ndim == 1
+        end, frames = self.FK(q.reshape(-1, 6), type=type, links=True)
+        if tool is not None:
+            end = end @ np.asarray(tool, dtype=np.float64)
+        n = len(end)
+        axis = np.empty((n, 6, 3))
+        origin = np.empty((n, 6, 3))
+        axis[:, 0], origin[:, 0] = [0, 0, 1], 0                 # 关节1绕基座z轴转动
+        axis[:, 1:], origin[:, 1:] = frames[:, :5, :3, 2], frames[:, :5, :3, 3]
+        J = np.empty((n, 6, 6))
+        J[:, :3] = np.cross(axis, end[:, None, :3, 3] - origin).transpose(0, 2, 1)
+        J[:, 3:] = axis.transpose(0, 2, 1)
+        if single:
+            J, end = J[0], end[0]
+        return (J, end) if T else J
+
+    def manipulability(self, q, type='radian', tool=None):
+        '''
+        可操作度 w = sqrt(det(J*J^T)) = |det(J)|，接近0表示接近奇异位形
+        :param q:       关节角 shape=(6,) 或 (N, 6)
+        :param type:    数据类型：radian、angle
+        :param tool:    工具坐标系相对法兰的T矩阵
+        :return:        np.ndarray: 可操作度 shape=() 或 (N,)
+        '''
+        return np.abs(np.linalg.det(self.Jacobian(q, type, tool)))
 
-        # 填充结果
-        pose = [round((T[0, 3]), precision), round(T[1, 3], precision), round(T[2, 3], precision),
-                round(np.real(rotation_vector[2, 1]), precision),       # 提取复数实部，保留指定位数的小数
-                round(np.real(rotation_vector[0, 2]), precision),
-                round(np.real(rotation_vector[1, 0]), precision),]
+    def DLS(self, J, e, damping):
+        '''
+        阻尼最小二乘：dq = J^T (J J^T + lambda^2 I)^-1 e
+        :param J:           雅可比矩阵 shape=(N, 6, 6)
+        :param e:           末端误差或速度 shape=(N, 6)
+        :param damping:     阻尼系数lambda，标量或 shape=(N,)
+        :return:            np.ndarray: 关节增量或关节速度 shape=(N, 6)
+        '''
+        A = J @ J.transpose(0, 2, 1)
+        A[:, [0, 1, 2, 3, 4, 5], [0, 1, 2, 3, 4, 5]] += np.reshape(np.square(damping), (-1, 1))
+        return (J.transpose(0, 2, 1) @ np.linalg.solve(A, e[..., None]))[..., 0]
 
-        return pose, T
+    def joint_velocity(self, q, twist, damping=0.01, type='radian', tool=None):
+        '''
+        笛卡尔速度 -> 关节速度（阻尼最小二乘，奇异位形附近速度有界）
+        :param q:       关节角 shape=(6,) 或 (N, 6)
+        :param twist:   末端速度 [vx, vy, vz, wx, wy, wz]（基座坐标系，m/s、rad/s） shape=(6,) 或 (N, 6)
+        :param damping: 阻尼系数
+        :param type:    数据类型：radian、angle
+        :param tool:    工具坐标系相对法兰的T矩阵
+        :return:        np.ndarray: 关节速度（rad/s） shape=(6,) 或 (N, 6)
+        '''
+        single = np.ndim(q) == 1
+        J = self.Jacobian(np.reshape(q, (-1, 6)), type, tool)
+        qd = self.DLS(J, np.broadcast_to(np.asarray(twist, dtype=np.float64), (len(J), 6)), damping)
+        return qd[0] if single else qd
+
+    def IK_numeric(self, poses, seed, tool=None, tol=1e-9, max_iter=100, damping=1e-4, max_step=0.5):
+        '''
+        批量数值逆解（阻尼最小二乘迭代），适用于任意工具偏移与DH参数，N个目标同时迭代，已收敛的目标不再参与计算
+        误差 e = [p_target - p, 旋转矢量(R_target * R^T)]，每步 dq = DLS(J, e, lambda)
+        阻尼随误差变化：lambda^2 = |e|^2 + damping^2，离目标远或靠近奇异位形时步长有界，接近收敛时阻尼趋于damping，
+        保持牛顿法的收敛速度；单步关节增量的范数不超过max_step
+        :param poses:       目标T矩阵 shape=(4, 4) 或 (N, 4, 4)，或位姿 [x, y, z, rx, ry, rz] shape=(6,) 或 (N, 6)
+        :param seed:        初始关节角（弧度），即热启动值 shape=(6,) 或 (N, 6)
+        :param tool:        工具坐标系相对法兰的T矩阵，缺省为法兰中心
+        :param tol:         收敛阈值，位置误差（m）与姿态误差（rad）都小于该值
+        :param max_iter:    最大迭代次数
+        :param damping:     最小阻尼系数
+        :param max_step:    单步关节增量的范数上限，rad
+        :return:            (np.ndarray, np.ndarray, np.ndarray, np.ndarray):
+                            关节角（弧度，未归一化） shape=(N, 6)、是否收敛 shape=(N,)、迭代次数 shape=(N,)、
+                            最终误差 [位置误差, 姿态误差] shape=(N, 2)；单个目标时去掉N维
+        '''
+        poses = np.asarray(poses, dtype=np.float64)
+        T = self.RV_RM(poses) if poses.shape[-1] == 6 else poses
+        single = T.ndim == 2
+        T = T.reshape(-1, 4, 4)
+        n = len(T)
+        q = np.array(np.broadcast_to(np.asarray(seed, dtype=np.float64), (n, 6)))
+        converged = np.zeros(n, dtype=bool)
+        iterations = np.zeros(n, dtype=np.int32)
+        errors = np.full((n, 2), np.inf)
+        active = np.arange(n)
+
+        for k in range(max_iter + 1):
+            J, end = self.Jacobian(q[active], tool=tool, T=True)
+            target = T[active]
+            e = np.empty((len(active), 6))
+            e[:, :3] = target[:, :3, 3] - end[:, :3, 3]
+            e[:, 3:] = self.rotation_vector(target[:, :3, :3] @ end[:, :3, :3].transpose(0, 2, 1))
+            error = np.stack((np.linalg.norm(e[:, :3], axis=1), np.linalg.norm(e[:, 3:], axis=1)), axis=1)
+            errors[active] = error
+            iterations[active] = k
+            done = np.all(error < tol, axis=1)
+            converged[active[done]] = True
+            if k == max_iter or done.all():
+                break
+            keep = ~done
+            active, J, e = active[keep], J[keep], e[keep]
+
+            lam = np.sqrt(np.einsum('ij,ij->i', e, e) + damping ** 2)
+            dq = self.DLS(J, e, lam)
+            norm = np.linalg.norm(dq, axis=1, keepdims=True)
+            dq *= np.minimum(1, max_step / np.maximum(norm, 1e-300))
+            q[active] += dq
+
+        if single:
+            return q[0], converged[0], iterations[0], errors[0]
+        return q, converged, iterations, errors
 
     def DH_IK(self, T, angle=False, precision=6):
         '''
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 17:30
+@Auth ： Ethan
+@File ：bench_aggregation.py
+@IDE ：PyCharm
+"""
+import time
+import numpy as np
+
+from hardware.packet import DECODERS
+from hardware.telemetry import TelemetryRing
+from hardware.aggregation import TelemetryAggregator, AGGREGATE_FIELDS
+
+
+def python_stats(history, window):
+    '''
+    逐帧Python循环计算窗口统计，作为对照
+    :param history: list: 每帧的字段值
+    :param window:  窗口长度
+    :return:        list
+    '''
+    recent = history[-window:]
+    result = []
+    for i in range(len(recent[0])):
+        column = [frame[i] for frame in recent]
+        result.append((min(column), max(column), sum(column) / len(column),
+                       (sum(v * v for v in column) / len(column)) ** 0.5))
+    return result
+
+
+if __name__ == '__main__':
+    decoder = DECODERS[1220]
+    rate, refresh, seconds = 500, 0.2, 60
+    batch = int(rate * refresh)                                 # 每次界面刷新到达的帧数
+    ring = TelemetryRing(create=True, capacity=1024)
+    aggregator = TelemetryAggregator(ring)
+    records = np.zeros(batch, dtype=decoder.dtype)
+    records['总计数据长度'] = decoder.size
+
+    cost = []
+    for i in range(int(seconds / refresh)):
+        records['机器运行时长'] = i * refresh + np.arange(batch) / rate
+        for name in AGGREGATE_FIELDS:
+            records[name] = np.random.random(records[name].shape)
+        for record in records:
+            ring.publish(record)
+        t = time.perf_counter()
+        aggregator.poll()
+        for name in AGGREGATE_FIELDS:
+            aggregator.stats(name)
+            aggregator.series(name)
+        cost.append(time.perf_counter() - t)
+    cost = np.array(cost)
+    print('每次刷新 %d 帧，%d 个字段：向量化聚合 平均 %.3f ms  最大 %.3f ms' % (
+        batch, len(AGGREGATE_FIELDS), cost.mean() * 1e3, cost.max() * 1e3))
+
+    history = [list(r) for r in np.random.random((5000, 6))]
+    t = time.perf_counter()
+    for _ in range(5):
+        for _ in AGGREGATE_FIELDS:
+            python_stats(history, 5000)
+    print('对照：Python循环重算10s窗口 %.3f ms' % ((time.perf_counter() - t) / 5 * 1e3))
+    ring.close()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 18:40
+@Auth ： Ethan
+@File ：bench_dashboard.py
+@IDE ：PyCharm
+"""
+import argparse
+import socket
+import time
+
+from hardware.dashboard import DashboardClient
+from hardware.simulator import URSimulator
+
+STATUS = ['robotmode', 'safetystatus', 'programState', 'running']
+
+
+def legacy(port, n):
+    '''
+    原实现：send后单次recv(2000)，每条指令一次完整的往返
+    :param port:    Dashboard端口
+    :param n:       指令数
+    :return:        float: 指令/s
+    '''
+    sk = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sk.connect(('127.0.0.1', port))
+    sk.recv(2000)
+    start = time.perf_counter()
+    for i in range(n):
+        sk.send((STATUS[i % 4] + '\n').encode('utf8'))
+        sk.recv(2000)
+    elapsed = time.perf_counter() - start
+    sk.close()
+    return n / elapsed
+
+
+def framed(client, n, batch):
+    '''
+    按行分帧的客户端，batch条指令一次写入
+    :param client:  DashboardClient
+    :param n:       指令数
+    :param batch:   每次写入的指令数
+    :return:        float: 指令/s
+    '''
+    instructs = (STATUS * batch)[:batch]
+    start = time.perf_counter()
+    for _ in range(n // batch):
+        client.request_many(instructs)
+    return n // batch * batch / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Dashboard往返吞吐测试（本机模拟器）')
+    parser.add_argument('-n', type=int, default=4000)
+    parser.add_argument('--delay', type=float, default=0.0, help='模拟器每条指令的处理时间，s')
+    args = parser.parse_args()
+
+    simulator = URSimulator(realtime_port=None, dashboard_port=0, dashboard_delay=args.delay).start()
+    port = simulator.dashboard_port
+    print('原实现 send/recv(2000):     %8.0f 指令/s' % legacy(port, args.n))
+    client = DashboardClient('127.0.0.1', port)
+    for batch in (1, 4, 16):
+        print('分帧客户端 每次%2d条:        %8.0f 指令/s' % (batch, framed(client, args.n, batch)))
+
+    # 断线重连：模拟器断开全部连接后，查询指令自动重连重发
+    simulator.stop()
+    simulator = URSimulator(realtime_port=None, dashboard_port=port).start()
+    print('断线后查询:', client.request_many(STATUS), ' 建立连接次数:', client.connections)
+    client.close()
+    simulator.stop()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 21:20
+@Auth ： Ethan
+@File ：bench_fleet.py
+@IDE ：PyCharm
+"""
+import argparse
+import os
+import time
+
+from hardware.fleet import Fleet
+from hardware.simulator import URSimulator
+from benchmark.bench_receiver import gaps
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='多机械臂压力测试：N个本机模拟器，每台一个接收进程')
+    parser.add_argument('-n', type=int, default=4, help='机械臂数量')
+    parser.add_argument('--rate', type=int, default=500)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--pin', action='store_true', help='接收进程依次绑定CPU核心')
+    args = parser.parse_args()
+
+    simulators = [URSimulator(realtime_port=0, dashboard_port=0, rate=args.rate, split=0.1, merge=0.1,
+                              jitter=0.0005, seed=i).start() for i in range(args.n)]
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else []
+    robots = []
+    for i, simulator in enumerate(simulators):
+        entry = {'name': 'UR5-%d' % (i + 1), 'UR_IP': '127.0.0.1', 'realtime_port': simulator.realtime_port,
+                 'dashboard_port': simulator.dashboard_port}
+        if args.pin and cpus:
+            entry['cpu'] = cpus[i % len(cpus)]
+        robots.append(entry)
+    fleet = Fleet({'robots': robots, 'telemetry_capacity': int(args.rate * args.seconds * 2)})
+    print('启动:', fleet.start())
+
+    start = time.perf_counter()
+    polls = 0
+    while time.perf_counter() - start < args.seconds:
+        fleet.dashboard_all(['robotmode', 'safetystatus', 'programState', 'running'])
+        polls += 1
+        time.sleep(0.1)
+    stats = fleet.stats()
+    lost = {name: gaps(fleet[name].telemetry.last(stats[name]['接收帧数'])['机器运行时长'], args.rate)
+            for name in fleet}
+    sent = {name: simulator.frames_sent for name, simulator in zip(fleet, simulators)}
+    fleet.stop()
+    for simulator in simulators:
+        simulator.stop()
+
+    print('%d台  %dHz  %.0fs  Dashboard轮询 %d 轮%s' % (args.n, args.rate, args.seconds, polls,
+                                                  '  绑定CPU' if args.pin else ''))
+    for name, item in stats.items():
+        print('  %s: 发送 %d  接收 %d  丢帧 %d (%.3f%%)  重新同步 %d' % (
+            name, sent[name], item['接收帧数'], lost[name], lost[name] / max(item['接收帧数'], 1) * 100,
+            item['重新同步次数']))
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/19 00:10
+@Auth ： Ethan
+@File ：bench_kinematics.py
+@IDE ：PyCharm
+"""
+import time
+import numpy as np
+
+from algorithm.kinematics import DH
+
+
+def chain_fk(dh, q):
+    '''
+    原有方式：每组关节角构造6个np.matrix并依次相乘
+    :param dh:  DH
+    :param q:   关节角（弧度） shape=(N, 6)
+    :return:    list: T矩阵
+    '''
+    result = []
+    for radian in q:
+        T = dh.DH_T(radian[0], dh.DH_a1, dh.DH_d1, dh.DH_alpha1)
+        T = np.dot(T, dh.DH_T(radian[1], dh.DH_a2, dh.DH_d2, dh.DH_alpha2))
+        T = np.dot(T, dh.DH_T(radian[2], dh.DH_a3, dh.DH_d3, dh.DH_alpha3))
+        T = np.dot(T, dh.DH_T(radian[3], dh.DH_a4, dh.DH_d4, dh.DH_alpha4))
+        T = np.dot(T, dh.DH_T(radian[4], dh.DH_a5, dh.DH_d5, dh.DH_alpha5))
+        T = np.dot(T, dh.DH_T(radian[5], dh.DH_a6, dh.DH_d6, dh.DH_alpha6))
+        result.append(T)
+    return result
+
+
+def rate(func, n, min_time=0.2):
+    '''
+    :return:    float: 每秒处理的组数
+    '''
+    count, start = 0, time.perf_counter()
+    while True:
+        func()
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed > min_time:
+            return n * count / elapsed
+
+
+if __name__ == '__main__':
+    dh = DH()
+    rng = np.random.default_rng(0)
+    q_all = rng.uniform(-np.pi, np.pi, (1000000, 6))
+
+    check = q_all[:1000]
+    error = np.abs(np.asarray(chain_fk(dh, check)) - dh.FK(check)).max()
+    print('与np.matrix逐个相乘的最大偏差 %.2e' % error)
+
+    print('%9s %16s %16s %16s' % ('N', 'np.matrix 组/s', 'FK 组/s', 'FK+各关节 组/s'))
+    for n in (1, 10, 100, 1000, 10000, 100000, 1000000):
+        q = q_all[:n]
+        out = np.empty((n, 4, 4))
+        legacy = rate(lambda: chain_fk(dh, q), n) if n <= 1000 else float('nan')
+        batched = rate(lambda: dh.FK(q, out=out), n)
+        frames = rate(lambda: dh.FK(q, links=True), n) if n <= 100000 else float('nan')
+        print('%9d %16.0f %16.0f %16.0f' % (n, legacy, batched, frames))
+
+    # 逆解：DH_IK逐个求解 vs IK批量求解
+    T_all = dh.FK(q_all[:100000])
+    solution, valid = dh.IK(T_all)
+    T_back = dh.FK(np.nan_to_num(solution.reshape(-1, 6))).reshape(-1, 8, 4, 4)
+    error = np.abs(T_back - T_all[:, None]).max(axis=(2, 3))[valid].max()
+    diff = np.abs(np.angle(np.exp(1j * (solution - q_all[:100000, None])))).max(axis=2)
+    contains = (np.nan_to_num(diff, nan=np.inf).min(axis=1) < 1e-6).mean()
+    print('\n逆解回代最大偏差 %.2e  有效分支占比 %.1f%%  含原关节角 %.2f%%' % (error, valid.mean() * 100, contains * 100))
+
+    print('%9s %16s %16s' % ('N', 'DH_IK 组/s', 'IK 组/s'))
+    for n in (1, 10, 100, 1000, 10000, 100000):
+        T = T_all[:n]
+        legacy = rate(lambda: [dh.DH_IK(t) for t in T], n) if n <= 1000 else float('nan')
+        batched = rate(lambda: dh.IK(T), n)
+        print('%9d %16.0f %16.0f' % (n, legacy, batched))
+
+    # 旋转矩阵 -> 旋转矢量：闭式解 vs scipy.linalg.logm（未安装scipy时跳过）
+    print('\n%12s %14s %14s' % ('theta范围', '回代最大偏差', '旋转矢量偏差'))
+    for low, high in ((0, np.pi), (0, 1e-6), (np.pi - 1e-6, np.pi)):
+        axis = rng.normal(size=(100000, 3))
+        rv = axis / np.linalg.norm(axis, axis=1, keepdims=True) * rng.uniform(low, high, (100000, 1))
+        R = dh.rotation_matrix(rv)
+        back = dh.rotation_vector(R)
+        flipped = np.linalg.norm(rv, axis=1) > np.pi - 1e-6             # theta=pi时rv与-rv等价
+        error = np.where(flipped, np.minimum(np.abs(back - rv).max(axis=1), np.abs(back + rv).max(axis=1)),
+                         np.abs(back - rv).max(axis=1))
+        print('%5.2f~%-6.2f %14.2e %14.2e' % (low, high, np.abs(dh.rotation_matrix(back) - R).max(), error.max()))
+
+    try:
+        from scipy.linalg import logm
+    except ImportError:
+        logm = None
+    R = T_all[:, :3, :3]
+    print('%9s %16s %16s' % ('N', 'logm 组/s', 'RM_RV 组/s'))
+    for n in (1, 100, 10000, 100000):
+        legacy = rate(lambda: [logm(r) for r in R[:n]], n) if logm is not None and n <= 1000 else float('nan')
+        closed = rate(lambda: dh.RM_RV(T_all[0]), 1) if n == 1 else rate(lambda: dh.RM_RV(T_all[:n]), n)
+        print('%9d %16.0f %16.0f' % (n, legacy, closed))
+
+    # 轨迹逆解：逐点DH_IK并取最近分支 vs IK_path
+    def nearest_loop(T, seed):
+        result, prev = [], np.asarray(seed)
+        for t in T:
+            solution = np.asarray(dh.DH_IK(t)[0], dtype=np.float64).reshape(-1, 6)
+            candidate = prev + (solution - prev + np.pi) % (2 * np.pi) - np.pi
+            prev = candidate[np.nanargmin(np.sum((candidate - prev) ** 2, axis=1))]
+            result.append(prev)
+        return result
+
+    t = np.linspace(0, 1, 100000)[:, None]
+    path = np.array([0.1, -1.2, 1.0, -1.0, 1.0, 0.2]) + 0.8 * np.sin(2 * np.pi * t * [0.7, 1.1, 0.5, 1.3, 0.9, 3.0])
+    T_path = dh.FK(path)
+    q, branch, flips = dh.IK_path(T_path, path[0])
+    print('\n轨迹逆解 与原关节角最大偏差 %.2e  最大单步 %.4f（原轨迹 %.4f）  构型翻转 %d' % (
+        np.abs(q - path).max(), np.abs(np.diff(q, axis=0)).max(), np.abs(np.diff(path, axis=0)).max(), flips.sum()))
+    print('%9s %16s %16s' % ('N', '逐点DH_IK 组/s', 'IK_path 组/s'))
+    for n in (100, 1000, 10000, 100000):
+        legacy = rate(lambda: nearest_loop(T_path[:n], path[0]), n) if n <= 1000 else float('nan')
+        batched = rate(lambda: dh.IK_path(T_path[:n], path[0]), n)
+        print('%9d %16.0f %16.0f' % (n, legacy, batched))
+
+    # 雅可比矩阵与数值逆解
+    q = q_all[:100000]
+    print('\n%9s %16s %16s' % ('N', 'Jacobian 组/s', '可操作度 组/s'))
+    for n in (1, 100, 10000, 100000):
+        print('%9d %16.0f %16.0f' % (n, rate(lambda: dh.Jacobian(q[:n]), n), rate(lambda: dh.manipulability(q[:n]), n)))
+
+    target = dh.FK(q[:20000])
+    print('%10s %8s %10s %10s %14s %12s' % ('热启动偏差', '收敛率', '迭代中位数', '迭代最大', '回代最大偏差', 'IK_numeric 组/s'))
+    for sigma in (0.01, 0.1, 0.5, 1.0):
+        seed = q[:20000] + rng.normal(0, sigma, (20000, 6))
+        start = time.perf_counter()
+        solution, converged, iterations, errors = dh.IK_numeric(target, seed)
+        elapsed = time.perf_counter() - start
+        error = np.abs(dh.FK(solution) - target).max(axis=(1, 2))[converged].max()
+        print('%10.2f %7.1f%% %10d %10d %14.2e %12.0f' % (sigma, converged.mean() * 100, np.median(iterations),
+                                                          iterations.max(), error, 20000 / elapsed))
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 18:05
+@Auth ： Ethan
+@File ：bench_latency.py
+@IDE ：PyCharm
+"""
+import time
+
+from hardware.packet import DECODERS
+from hardware.telemetry import TelemetryRing
+from hardware.latency import now
+from benchmark.bench_packet import make_frame
+
+
+def loop(n, sample_every=None):
+    '''
+    模拟接收循环中的解析、发布，sample_every为None时不打点
+    :param n:               帧数
+    :param sample_every:    采样间隔
+    :return:                float: 每帧耗时，s
+    '''
+    latency = ring.latency(sample_every or 1)
+    start = time.perf_counter()
+    for _ in range(n):
+        if sample_every is None:
+            ring.publish(decoder.decode(res))
+            continue
+        received = now()
+        record = decoder.decode(res)
+        if latency.sample():
+            latency.record(0, now() - received)
+            ring.publish(record, received)
+            latency.record(1, now() - received)
+        else:
+            ring.publish(record, received)
+    return (time.perf_counter() - start) / n
+
+
+if __name__ == '__main__':
+    decoder = DECODERS[1220]
+    res = make_frame(decoder)
+    ring = TelemetryRing(create=True, capacity=1024)
+    n = 200000
+
+    base = loop(n)
+    print('解析+发布 每帧耗时（不打点）: %.2f us' % (base * 1e6))
+    for every in (1, 10, 100):
+        cost = loop(n, every)
+        print('打点，每%3d帧采样一次: %.2f us  额外开销 %.2f us' % (every, cost * 1e6, (cost - base) * 1e6))
+    print(ring.latency().text())
+    ring.close()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 22:40
+@Auth ： Ethan
+@File ：bench_motion.py
+@IDE ：PyCharm
+"""
+import argparse
+import multiprocessing
+import time
+import numpy as np
+
+from hardware.UR5 import UR5
+from hardware.simulator import URSimulator
+from hardware.telemetry import TelemetryRing
+from hardware.latency import now
+
+
+def wait_poll(telemetry, target, interval, tolerance=0.001):
+    '''
+    原有方式：按界面刷新周期读取最新一帧，直到关节位置在容差内
+    :return:    float: 判断到位的时间（perf_counter）
+    '''
+    while True:
+        q = telemetry.latest(copy=True)['实际关节位置']
+        if np.all(np.abs(q - target) <= tolerance):
+            return now()
+        time.sleep(interval)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='连续运动的衔接空档测试（本机模拟器）')
+    parser.add_argument('--moves', type=int, default=20, help='连续运动的次数')
+    parser.add_argument('--step', type=float, default=0.05, help='每次运动的关节位移，rad')
+    parser.add_argument('--poll', type=float, default=0.02, help='轮询方式的读取周期，s')
+    args = parser.parse_args()
+
+    simulator = URSimulator(realtime_port=0, dashboard_port=None, rate=500, seed=1).start()
+    config = {'UR_IP': '127.0.0.1', 'realtime_port': simulator.realtime_port, 'motion_dwell': 0.0}
+    telemetry = TelemetryRing(create=True, capacity=4096)
+    event = multiprocessing.Event()
+    control = multiprocessing.Manager().dict()
+    control['Process_flag'] = True
+
+    robot = UR5(config, telemetry, event, control)
+    robot.connect_30003()
+    robot.start()
+    while telemetry.seq == 0:
+        time.sleep(0.01)
+
+    home = telemetry.latest(copy=True)['实际关节位置'].astype(np.float64)
+    offsets = args.step * (np.arange(args.moves) % 2 + 1)[:, None] * np.array([1, 0, 0, 0, 0, 0])
+
+    # 到位时刻：模拟器中目标等于实际位置的第一帧被接收的时间
+    def arrived(target, after):
+        records = telemetry.last(telemetry.capacity)
+        hit = (np.all(np.abs(records['实际关节位置'] - target) <= 0.001, axis=1)
+               & (records['接收时间'] >= after))
+        return float(records['接收时间'][np.argmax(hit)])
+
+    results = {}
+    for name in ('轮询', 'Future'):
+        robot.movej(home.tolist(), 'radian').result(5)
+        dead = []
+        start = now()
+        for offset in offsets:
+            target = home + offset
+            sent = now()
+            future = robot.movej(target.tolist(), 'radian')
+            if name == '轮询':
+                future.cancel()
+                done = wait_poll(telemetry, target, args.poll)
+            else:
+                future.result(5)
+                done = now()
+            dead.append(done - arrived(target, sent))
+        results[name] = (now() - start, np.array(dead))
+
+    control['Process_flag'] = False
+    robot.join(2)
+    if robot.is_alive():
+        robot.terminate()
+    robot.close_30003()
+    simulator.stop()
+    telemetry.close()
+
+    print('连续运动 %d 次，每次 %.3f~%.3f rad' % (args.moves, args.step, args.step * 2))
+    for name, (total, dead) in results.items():
+        print('%-8s 总耗时 %.3f s  到位后空档: 平均 %.2f ms  最大 %.2f ms' % (
+            name, total, dead.mean() * 1e3, dead.max() * 1e3))
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 09:40
+@Auth ： Ethan
+@File ：bench_packet.py
+@IDE ：PyCharm
+"""
+import struct
+import time
+import numpy as np
+
+from hardware.packet import PacketDecoder, FIELDS_30003
+
+
+def make_frame(decoder):
+    '''
+    生成一帧随机的30003数据
+    :param decoder: PacketDecoder
+    :return:        bytes
+    '''
+    frame = np.zeros(1, dtype=decoder.dtype)
+    for name in decoder.names:
+        frame[name] = np.random.random(frame[name].shape)
+    frame['总计数据长度'] = decoder.size
+    return frame.tobytes()
+
+
+def legacy_decode(res, data):
+    '''
+    原UR5.run中的解析方式：每个double单独struct.unpack，逐个字段写入字典
+    :param res:     一帧数据
+    :param data:    接收结果的字典
+    :return:        None
+    '''
+    data['总计数据长度'] = int.from_bytes(res[0:4], byteorder='big')
+    offset = 4
+    for name, count in FIELDS_30003[1:42]:                  # 原代码解析到 UR安全状态3（1140字节）
+        if count == 1:
+            data[name] = struct.unpack('>d', res[offset:offset + 8])[0]
+        else:
+            data[name] = [struct.unpack('>d', res[offset + i * 8:offset + i * 8 + 8])[0] for i in range(count)]
+        offset += count * 8
+
+
+def bench(func, n):
+    '''
+    计时
+    :param func:    被测函数
+    :param n:       执行次数
+    :return:        float: 每秒执行次数
+    '''
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return n / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    decoder = PacketDecoder()
+    res = make_frame(decoder)
+    data = {}
+    n = 20000
+
+    legacy = bench(lambda: legacy_decode(res, data), n)
+    record = bench(lambda: decoder.decode(res), n)
+    as_dict = bench(lambda: data.update(decoder.to_dict(decoder.decode(res))), n)
+    frames = res * n
+    batch = bench(lambda: decoder.decode_many(frames)['实际关节位置'].astype(np.float64), 1) * n
+
+    print('原逐字段解析:          %10.0f 帧/s' % legacy)
+    print('结构化记录（视图）:    %10.0f 帧/s' % record)
+    print('结构化记录 + 转字典:   %10.0f 帧/s' % as_dict)
+    print('批量解析取关节位置（%d帧）:%10.0f 帧/s' % (n, batch))
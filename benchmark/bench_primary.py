@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 23:20
+@Auth ： Ethan
+@File ：bench_primary.py
+@IDE ：PyCharm
+"""
+import argparse
+import multiprocessing
+import random
+import struct
+import time
+
+from hardware.primary import (MESSAGE_HEADER, MESSAGE_ROBOT_STATE, SUBPACKAGES, FIELDS_PRIMARY, PrimaryParser,
+                              PrimaryReceiver)
+from hardware.packet import FIELDS_30003
+from hardware.simulator import URSimulator
+from hardware.telemetry import TelemetryRing
+
+
+def parse_naive(pieces):
+    '''
+    逐条切片的解析方式：收到的数据拼接到bytes，每条消息、每个子包都切出bytes，全部子包解析为字典
+    :param pieces:  按TCP分段的录制数据
+    :return:        int: 机器人状态消息数
+    '''
+    count = 0
+    data = b''
+    for piece in pieces:
+        data += piece
+        while len(data) >= MESSAGE_HEADER.size:
+            size, message_type = MESSAGE_HEADER.unpack(data[:MESSAGE_HEADER.size])
+            if len(data) < size:
+                break
+            message, data = data[MESSAGE_HEADER.size:size], data[size:]
+            if message_type != MESSAGE_ROBOT_STATE:
+                continue
+            state = {}
+            while len(message) >= MESSAGE_HEADER.size:
+                length, number = MESSAGE_HEADER.unpack(message[:MESSAGE_HEADER.size])
+                body, message = message[MESSAGE_HEADER.size:length], message[length:]
+                if number in SUBPACKAGES:
+                    name, fmt, outputs = SUBPACKAGES[number]
+                    values = struct.unpack(fmt, body[:struct.calcsize(fmt)])
+                    for field, positions, _ in outputs:
+                        state[field] = [values[i] for i in positions]
+            count += 1
+    return count
+
+
+def chunks(data, seed=1):
+    '''
+    按TCP分段的方式把录制数据切成随机长度的片段
+    '''
+    rng = random.Random(seed)
+    position = 0
+    result = []
+    while position < len(data):
+        n = rng.randint(512, 4096)
+        result.append(data[position:position + n])
+        position += n
+    return result
+
+
+def bench(name, func, repeat=3):
+    best = min(timeit(func) for _ in range(repeat))
+    return name, best
+
+
+def timeit(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='主/副接口（30001/30002）解析测试')
+    parser.add_argument('--capture', default=None, help='录制的30002原始数据文件，缺省由模拟器生成')
+    parser.add_argument('--messages', type=int, default=20000, help='生成的机器人状态消息数')
+    parser.add_argument('--save', default=None, help='保存生成的数据，供之后回放')
+    args = parser.parse_args()
+
+    if args.capture:
+        with open(args.capture, 'rb') as f:
+            data = f.read()
+    else:
+        simulator = URSimulator(realtime_port=None, dashboard_port=None)
+        data = b''.join(simulator.primary_message(i * 0.1) for i in range(args.messages))
+        if args.save:
+            with open(args.save, 'wb') as f:
+                f.write(data)
+    pieces = chunks(data)
+    fields = FIELDS_30003 + FIELDS_PRIMARY
+
+    def incremental(subpackages):
+        def run():
+            primary = PrimaryParser(subpackages, fields)
+            for piece in pieces:
+                primary.feed(piece)
+            return primary
+        return run
+
+    messages = incremental(None)().messages
+    results = [bench('逐条切片、全部解析为字典', lambda: parse_naive(pieces)),
+               bench('增量解析、全部子包', incremental(None)),
+               bench('增量解析、订阅关节数据', incremental(['关节数据'])),
+               bench('增量解析、订阅关节与主板', incremental(['关节数据', '主板数据']))]
+    print('数据 %.1f MB  机器人状态消息 %d  分段 %d' % (len(data) / 1e6, messages, len(pieces)))
+    for name, elapsed in results:
+        print('%-24s %8.0f 条/s  %6.2f us/条' % (name, messages / elapsed, elapsed / messages * 1e6))
+
+    # 端到端：模拟器 -> PrimaryReceiver -> TelemetryRing
+    simulator = URSimulator(realtime_port=None, dashboard_port=None, primary_port=0).start()
+    telemetry = TelemetryRing(create=True, capacity=64, fields=fields)
+    control = multiprocessing.Manager().dict()
+    control['Process_flag'] = True
+    receiver = PrimaryReceiver({'UR_IP': '127.0.0.1', 'primary_port': simulator.primary_port}, telemetry,
+                               multiprocessing.Event(), control)
+    receiver.start()
+    time.sleep(1.0)
+    control['Process_flag'] = False
+    receiver.join(1)
+    if receiver.is_alive():
+        receiver.terminate()
+    record = telemetry.latest(copy=True)
+    print('接收端发布 %d 帧  实际关节位置 %s  标定DH_d %s  工具温度 %.1f' % (
+        telemetry.seq, record['实际关节位置'].round(3), record['标定DH_d'].round(5), record['工具温度']))
+    simulator.stop()
+    telemetry.close()
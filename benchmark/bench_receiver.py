@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 15:20
+@Auth ： Ethan
+@File ：bench_receiver.py
+@IDE ：PyCharm
+"""
+import argparse
+import multiprocessing
+import time
+import numpy as np
+
+from hardware.UR5 import UR5
+from hardware.simulator import URSimulator
+from hardware.telemetry import TelemetryRing
+
+
+def gaps(times, rate):
+    '''
+    根据机器运行时长统计丢帧数
+    :param times:   机器运行时长序列
+    :param rate:    发送频率
+    :return:        int: 丢失的帧数
+    '''
+    steps = np.round(np.diff(times) * rate).astype(np.int64)
+    return int(np.sum(steps[steps > 1] - 1))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='30003接收进程压力测试（本机模拟器）')
+    parser.add_argument('--rate', type=int, default=500)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--split', type=float, default=0.2)
+    parser.add_argument('--merge', type=float, default=0.2)
+    parser.add_argument('--jitter', type=float, default=0.0005)
+    parser.add_argument('--garbage', type=float, default=0.0)
+    parser.add_argument('--frame-size', type=int, default=1220)
+    args = parser.parse_args()
+
+    simulator = URSimulator(realtime_port=0, dashboard_port=None, rate=args.rate, frame_size=args.frame_size,
+                            split=args.split, merge=args.merge, jitter=args.jitter, garbage=args.garbage,
+                            seed=1).start()
+    config = {'UR_IP': '127.0.0.1', 'realtime_port': simulator.realtime_port}
+    telemetry = TelemetryRing(create=True, capacity=int(args.rate * args.seconds * 2))
+    event = multiprocessing.Event()
+    control = multiprocessing.Manager().dict()
+    control['Process_flag'] = True
+
+    robot = UR5(config, telemetry, event, control)
+    robot.connect_30003()
+    robot.start()
+    time.sleep(args.seconds)
+    control['Process_flag'] = False
+    robot.join(2)
+    if robot.is_alive():
+        robot.terminate()
+    simulator.stop()
+
+    records = telemetry.last(telemetry.seq)
+    times = records['机器运行时长']
+    lost = gaps(times, args.rate)
+    print('频率 %dHz  帧长度 %d  拆包 %.0f%%  粘包 %.0f%%  抖动 %.1fms' % (
+        args.rate, args.frame_size, args.split * 100, args.merge * 100, args.jitter * 1e3))
+    print('发送帧数: %d  接收帧数: %d  丢帧: %d (%.3f%%)' % (
+        simulator.frames_sent, telemetry.seq, lost, lost / max(len(times), 1) * 100))
+    print('重新同步次数: %d  丢弃字节数: %d' % (telemetry.header['重新同步次数'], telemetry.header['丢弃字节数']))
+    for stage, item in telemetry.latency().summary().items():
+        if item['样本数']:
+            print('%s延迟 us: 样本 %d  p50 %.1f  p99 %.1f  最大 %.1f' % (
+                stage, item['样本数'], item['p50'] * 1e6, item['p99'] * 1e6, item['最大值'] * 1e6))
+    telemetry.close()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 13:50
+@Auth ： Ethan
+@File ：bench_recorder.py
+@IDE ：PyCharm
+"""
+import argparse
+import shutil
+import tempfile
+import time
+import numpy as np
+
+from hardware.packet import DECODERS
+from hardware.recorder import TelemetryRecorder, TelemetryReader
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='录制吞吐测试：按最快速度写入，折算为500Hz下可持续的时长')
+    parser.add_argument('--minutes', type=float, default=10, help='录制的数据时长（按500Hz计），8小时班次为480')
+    parser.add_argument('--compress', action='store_true', help='压缩块文件')
+    parser.add_argument('--dir', default=None, help='录制目录，默认使用临时目录')
+    args = parser.parse_args()
+
+    decoder = DECODERS[1220]
+    rate = 500
+    total = int(args.minutes * 60 * rate)
+    block = np.zeros(rate, dtype=decoder.dtype)                 # 每次生成1秒的数据
+    block['总计数据长度'] = decoder.size
+    block['实际关节位置'] = np.random.random((rate, 6))
+    directory = args.dir or tempfile.mkdtemp()
+
+    recorder = TelemetryRecorder(directory, decoder.size, compress=args.compress)
+    cost = np.empty(total)
+    start = time.perf_counter()
+    for second in range(total // rate):
+        block['机器运行时长'] = second + np.arange(rate) / rate
+        view = memoryview(block.tobytes())
+        for i in range(rate):
+            t = time.perf_counter()
+            recorder.append(view[i * decoder.size:(i + 1) * decoder.size])
+            cost[second * rate + i] = time.perf_counter() - t
+    recorder.close()
+    elapsed = time.perf_counter() - start
+
+    print('帧数: %d  录制耗时: %.1fs  相当于实时的 %.0f 倍' % (total, elapsed, total / rate / elapsed))
+    print('append 单帧耗时 us: 平均 %.2f  p99 %.2f  最大 %.1f' % (
+        cost.mean() * 1e6, np.percentile(cost, 99) * 1e6, cost.max() * 1e6))
+    print('写入线程跟不上次数: %d' % recorder.overflows)
+
+    reader = TelemetryReader(directory)
+    t = time.perf_counter()
+    frames = reader.query(total / rate / 2, total / rate / 2 + 10)
+    print('查询10s数据: %d帧  %.1f ms' % (len(frames), (time.perf_counter() - t) * 1e3))
+
+    if args.dir is None:
+        shutil.rmtree(directory)
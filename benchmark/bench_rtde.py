@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 22:00
+@Auth ： Ethan
+@File ：bench_rtde.py
+@IDE ：PyCharm
+"""
+import argparse
+import multiprocessing
+import time
+
+from hardware.packet import DECODERS
+from hardware.rtde import RTDEReceiver, RecipeDecoder, RTDE_OUTPUTS
+from hardware.simulator import URSimulator
+from hardware.telemetry import TelemetryRing
+from benchmark.bench_packet import make_frame, bench
+from benchmark.bench_receiver import gaps
+
+UI_FIELDS = ['机器运行时长', '实际关节位置', '数字输入', '数字输出']
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='RTDE输出配方与30003整帧对比（本机模拟器）')
+    parser.add_argument('--rate', type=int, default=500)
+    parser.add_argument('--seconds', type=float, default=3)
+    args = parser.parse_args()
+
+    # 单帧解析+写入共享内存
+    ring = TelemetryRing(create=True, capacity=1024)
+    decoder = DECODERS[1220]
+    frame = make_frame(decoder)
+    variables = ['timestamp', 'actual_q', 'actual_digital_input_bits', 'actual_digital_output_bits']
+    types = [RTDE_OUTPUTS[v][0] for v in variables]
+    recipe = RecipeDecoder(variables, types)
+    package = recipe.input.pack(1, 1.0, 1, 2, 3, 4, 5, 6, 3, 4)
+    record = bytearray(recipe.size)
+
+    def rtde_record():
+        recipe.decode_into(package, record)
+        ring.publish(record)
+
+    print('单帧 解析+发布，帧/s：')
+    print('  30003整帧 %4d 字节:  %10.0f' % (decoder.size, bench(lambda: ring.publish(decoder.decode(frame)), 100000)))
+    print('  RTDE配方  %4d 字节:  %10.0f  （先写入整条记录再发布）' % (recipe.input.size + 3, bench(rtde_record, 100000)))
+    print('  RTDE配方  %4d 字节:  %10.0f  （直接写入共享内存）' % (recipe.input.size + 3,
+                                                       bench(lambda: recipe.publish(package, ring, 0.0), 100000)))
+    ring.close()
+
+    # 接收进程
+    simulator = URSimulator(realtime_port=None, dashboard_port=None, rtde_port=0, rate=args.rate).start()
+    config = {'UR_IP': '127.0.0.1', 'rtde_port': simulator.rtde_port, 'rtde_frequency': args.rate,
+              'rtde_fields': UI_FIELDS}
+    telemetry = TelemetryRing(create=True, capacity=int(args.rate * args.seconds * 2))
+    control = multiprocessing.Manager().dict()
+    control['Process_flag'] = True
+    receiver = RTDEReceiver(config, telemetry, multiprocessing.Event(), control)
+    receiver.start()
+    time.sleep(args.seconds)
+    control['Process_flag'] = False
+    receiver.join(2)
+    if receiver.is_alive():
+        receiver.terminate()
+    simulator.stop()
+
+    records = telemetry.last(telemetry.seq)
+    print('RTDE %dHz %.0fs: 接收 %d 帧  丢帧 %d  带宽 %.1f KB/s（30003整帧为 %.1f KB/s）' % (
+        args.rate, args.seconds, telemetry.seq, gaps(records['机器运行时长'], args.rate),
+        simulator.rtde_bytes / args.seconds / 1024, decoder.size * args.rate / 1024))
+    print('最新一帧:', records[-1]['实际关节位置'], records[-1]['数字输出'])
+    telemetry.close()
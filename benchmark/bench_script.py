@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 20:40
+@Auth ： Ethan
+@File ：bench_script.py
+@IDE ：PyCharm
+"""
+import os
+import socket
+import tempfile
+import time
+
+from hardware.simulator import URSimulator
+from hardware.urscript import ScriptLibrary
+
+
+def legacy(sk, file_path):
+    '''
+    原实现：每次逐行读文件、字符串拼接、send
+    :param sk:          30003连接
+    :param file_path:   脚本路径
+    :return:            int: 实际发送的字节数（send可能只发送一部分）
+    '''
+    data2 = ''
+    with open('%s' % file_path, 'r', encoding='utf8') as f:
+        for i in f.readlines():
+            data2 += i
+    return sk.send(data2.encode('utf8'))
+
+
+if __name__ == '__main__':
+    simulator = URSimulator(realtime_port=0, dashboard_port=None, rate=125).start()
+    sk = socket.create_connection(('127.0.0.1', simulator.realtime_port))
+    path = os.path.join(tempfile.mkdtemp(), 'cycle.script')
+    with open(path, 'w', encoding='utf8') as f:
+        f.write('def cycle():\n')
+        for i in range(5000):
+            f.write('  movej([%d, -1.57, 0, -1.57, 0, 0], a={a}, v={v})\n' % (i % 3))
+        f.write('end\n')
+    size = os.path.getsize(path)
+    library = ScriptLibrary()
+    n = 50
+
+    start = time.perf_counter()
+    short = 0
+    for _ in range(n):
+        short += legacy(sk, path) < size
+    print('原实现 %d KB: %.3f ms/次  未发送完整 %d 次' % (size // 1024, (time.perf_counter() - start) / n * 1e3, short))
+
+    start = time.perf_counter()
+    upload = 0
+    for _ in range(n):
+        upload += library.upload(sk.sendall, path, a=0.5, v=0.3)
+    print('脚本库 %d KB: %.3f ms/次（其中sendall %.3f ms）' % (
+        size // 1024, (time.perf_counter() - start) / n * 1e3, upload / n * 1e3))
+    sk.close()
+    simulator.stop()
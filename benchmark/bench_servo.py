@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 20:20
+@Auth ： Ethan
+@File ：bench_servo.py
+@IDE ：PyCharm
+"""
+import argparse
+import multiprocessing
+import time
+import numpy as np
+
+from hardware.UR5 import UR5
+from hardware.simulator import URSimulator
+from hardware.telemetry import TelemetryRing
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='servoj流式控制节拍与滞后测试（本机模拟器）')
+    parser.add_argument('--rate', type=int, default=500, help='设定点频率，Hz')
+    parser.add_argument('--frame-rate', type=int, default=500, help='30003帧频率，Hz')
+    parser.add_argument('--seconds', type=float, default=4)
+    parser.add_argument('--jitter', type=float, default=0.0002)
+    args = parser.parse_args()
+
+    simulator = URSimulator(realtime_port=0, dashboard_port=None, rate=args.frame_rate, jitter=args.jitter,
+                            seed=1).start()
+    config = {'UR_IP': '127.0.0.1', 'realtime_port': simulator.realtime_port, 'servo_port': 0,
+              'frame_rate': args.frame_rate}
+    telemetry = TelemetryRing(create=True, capacity=4096)
+    event = multiprocessing.Event()
+    control = multiprocessing.Manager().dict()
+    control['Process_flag'] = True
+
+    robot = UR5(config, telemetry, event, control)
+    robot.connect_30003()
+    robot.start()
+    while telemetry.seq == 0:
+        time.sleep(0.01)
+
+    # 以当前位置为中心的正弦扫描轨迹
+    t = np.arange(int(args.seconds * args.rate)) / args.rate
+    start = telemetry.latest(copy=True)['实际关节位置'].astype(np.float64)
+    trajectory = start + 0.3 * np.sin(2 * np.pi * 0.5 * t)[:, None] * np.array([1, 0.5, 0.5, 0, 0, 1])
+    result = robot.servo_stream(trajectory, 'radian', rate=args.rate)
+
+    control['Process_flag'] = False
+    robot.join(2)
+    if robot.is_alive():
+        robot.terminate()
+    simulator.stop()
+    telemetry.close()
+
+    print('设定点频率 %dHz  帧频率 %dHz  设定点 %d' % (args.rate, args.frame_rate, result['设定点数']))
+    print('节拍抖动: 标准差 %.3f ms  最大 %.3f ms' % (result['抖动标准差'] * 1e3, result['抖动最大值'] * 1e3))
+    print('实测滞后: %.1f ms  滞后对齐后跟踪误差 %.5f rad  未对齐 %.5f rad' % (
+        result['滞后'] * 1e3, result['滞后时跟踪误差'], result['无滞后跟踪误差']))
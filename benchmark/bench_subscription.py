@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 16:50
+@Auth ： Ethan
+@File ：bench_subscription.py
+@IDE ：PyCharm
+"""
+
+from hardware.packet import DECODERS, FIELDS_30003, FieldSubscription, LazyFrame
+from hardware.telemetry import TelemetryRing
+from benchmark.bench_packet import make_frame, bench
+
+UI_FIELDS = ['实际关节位置', '数字输入', '数字输出', '机器运行时长']
+
+
+if __name__ == '__main__':
+    decoder = DECODERS[1220]
+    res = make_frame(decoder)
+    n = 50000
+
+    print('单帧解析，帧/s：')
+    print('  全部字段（转字典）:      %10.0f' % bench(lambda: decoder.to_dict(decoder.decode(res)), n // 10))
+    for names in ([name for name, _ in FIELDS_30003], UI_FIELDS, ['实际关节位置']):
+        fields = FieldSubscription(names)
+        print('  订阅%2d个字段:            %10.0f' % (len(names), bench(lambda: fields.decode(res), n)))
+    print('  惰性解析，访问4个字段:   %10.0f' % bench(lambda: [LazyFrame(res)[name] for name in UI_FIELDS], n))
+
+    ring = TelemetryRing(create=True, capacity=1024)
+    ring.publish(decoder.decode(res))
+    subscription = ring.subscribe(UI_FIELDS)
+    print('共享内存读取界面字段，帧/s：')
+    print('  结构化视图:              %10.0f' % bench(lambda: [ring.latest()[name] for name in UI_FIELDS], n))
+    print('  字段订阅:                %10.0f' % bench(subscription.latest, n))
+    ring.close()
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 11:20
+@Auth ： Ethan
+@File ：bench_telemetry.py
+@IDE ：PyCharm
+"""
+import multiprocessing
+import time
+
+from hardware.packet import PacketDecoder
+from hardware.telemetry import TelemetryRing
+from benchmark.bench_packet import make_frame
+
+UI_FIELDS = ('实际关节位置', '数字输入', '数字输出', '机器运行时长')     # UR5_updata 读取的字段
+
+
+def latency(func, n):
+    '''
+    计时
+    :param func:    被测函数
+    :param n:       执行次数
+    :return:        float: 单次耗时，us
+    '''
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def manager_keys(data30003, data):
+    # 原UR5.run：逐个字段写入共享字典，每次都是一次代理往返
+    for key, value in data.items():
+        data30003[key] = value
+
+
+def manager_read(data30003):
+    # 原UR5_updata/update_UR5_info：逐个字段读取
+    return [data30003[key] for key in UI_FIELDS]
+
+
+def ring_read(ring):
+    record = ring.latest()
+    return [record[key] for key in UI_FIELDS]
+
+
+if __name__ == '__main__':
+    decoder = PacketDecoder()
+    record = decoder.decode(make_frame(decoder))
+    data = decoder.to_dict(record)
+
+    manager = multiprocessing.Manager()
+    data30003 = manager.dict()
+    ring = TelemetryRing(create=True, capacity=1024)
+    n = 2000
+
+    print('发布一帧：')
+    print('  Manager.dict 逐字段写入:   %10.1f us' % latency(lambda: manager_keys(data30003, data), n // 10))
+    print('  Manager.dict 一次update:   %10.1f us' % latency(lambda: data30003.update(decoder.to_dict(record)), n))
+    print('  共享内存环形缓冲区:        %10.1f us' % latency(lambda: ring.publish(record), n * 10))
+    print('读取界面所需字段：')
+    print('  Manager.dict:              %10.1f us' % latency(lambda: manager_read(data30003), n))
+    print('  共享内存环形缓冲区:        %10.1f us' % latency(lambda: ring_read(ring), n * 10))
+    print('  最近100帧（视图）:         %10.1f us' % latency(lambda: ring.last(100)['实际关节位置'], n * 10))
+
+    ring.close()
+    manager.shutdown()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 19:40
+@Auth ： Ethan
+@File ：bench_urscript.py
+@IDE ：PyCharm
+"""
+import socket
+import time
+import numpy as np
+
+from hardware.simulator import URSimulator
+from hardware.urscript import ScriptProgram
+
+
+def legacy(sk, waypoints, a=0.2, v=0.2, t=0, r=0.01):
+    '''
+    原实现：每个路点单独格式化（逐个角度转弧度）并发送一次
+    :param sk:          30003连接
+    :param waypoints:   路点，角度
+    :return:            None
+    '''
+    for args in waypoints.tolist():
+        radian = []
+        for i in args:
+            radian.append(i * np.pi / 180)
+        data = 'movej(%s, a=%s, v=%s, t=%s, r=%s)\n' % (radian, a, v, t, r)
+        sk.send(data.encode('utf8'))
+
+
+def batched(sk, waypoints, a=0.2, v=0.2, t=0, r=0.01):
+    '''
+    整条路径生成一个程序，一次发送
+    :param sk:          30003连接
+    :param waypoints:   路点，角度
+    :return:            None
+    '''
+    sk.sendall(ScriptProgram().movej(waypoints, 'angle', a=a, v=v, t=t, r=r).build().encode('utf8'))
+
+
+if __name__ == '__main__':
+    simulator = URSimulator(realtime_port=0, dashboard_port=None, rate=125).start()
+    sk = socket.create_connection(('127.0.0.1', simulator.realtime_port))
+    waypoints = np.random.uniform(-180, 180, (200, 6))
+    for name, func in (('逐条发送', legacy), ('整条程序', batched)):
+        start = time.perf_counter()
+        for _ in range(50):
+            func(sk, waypoints)
+        print('%s 200个路点: %.3f ms' % (name, (time.perf_counter() - start) / 50 * 1e3))
+    print(ScriptProgram().movej(waypoints[:2], 'angle', r=0.01).add('set_digital_out(0, True)').build())
+    sk.close()
+    simulator.stop()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 23:55
+@Auth ： Ethan
+@File ：bench_watchdog.py
+@IDE ：PyCharm
+"""
+import argparse
+import multiprocessing
+import time
+
+from hardware.UR5 import UR5
+from hardware.simulator import URSimulator
+from hardware.telemetry import TelemetryRing
+
+
+def wait(condition, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='30003断流检测与重连恢复测试（本机模拟器）')
+    parser.add_argument('--rate', type=int, default=500)
+    parser.add_argument('--stall', type=float, default=0.5, help='断流时长，s')
+    parser.add_argument('--timeout', type=float, default=0.1, help='watchdog_timeout，s')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    simulator = URSimulator(realtime_port=0, dashboard_port=None, rate=args.rate, seed=1).start()
+    config = {'UR_IP': '127.0.0.1', 'realtime_port': simulator.realtime_port, 'frame_rate': args.rate,
+              'watchdog_timeout': args.timeout, 'reconnect_backoff': 0.02}
+    telemetry = TelemetryRing(create=True, capacity=4096)
+    header = telemetry.header
+    event = multiprocessing.Event()
+    control = multiprocessing.Manager().dict()
+    control['Process_flag'] = True
+
+    robot = UR5(config, telemetry, event, control)
+    robot.connect_30003()
+    robot.start()
+    wait(lambda: telemetry.seq > 100)
+
+    results = {'断流（连接保持）': [], '连接重置（RST）': []}
+    for name in results:
+        for _ in range(args.rounds):
+            disconnects, missed = int(header['断线次数']), int(header['丢失帧数'])
+            start = time.perf_counter()
+            if name.startswith('断流'):
+                simulator.stall(args.stall)
+            else:
+                simulator.reset()
+            wait(lambda: int(header['断线次数']) > disconnects)
+            marked = time.perf_counter() - start                # 界面可见陈旧标记的时间
+            wait(lambda: not header['数据陈旧'])
+            time.sleep(0.05)
+            results[name].append((marked, float(header['最近检测耗时']), float(header['最近恢复耗时']),
+                                  int(header['丢失帧数']) - missed))
+            time.sleep(0.2)
+
+    print('帧频率 %dHz  接收超时 %.0f ms  断流 %.0f ms' % (args.rate, args.timeout * 1e3, args.stall * 1e3))
+    for name, rounds in results.items():
+        marked, detect, recover, missed = zip(*rounds)
+        print('%-10s 标记陈旧 %6.1f ms  检测耗时 %6.1f ms  恢复耗时 %6.1f ms  统计丢帧 %s' % (
+            name, sum(marked) / len(marked) * 1e3, sum(detect) / len(detect) * 1e3,
+            sum(recover) / len(recover) * 1e3, list(missed)))
+    print('断线次数 %d  间隔次数 %d  接收进程存活 %s' % (header['断线次数'], header['间隔次数'], robot.is_alive()))
+
+    control['Process_flag'] = False
+    robot.join(2)
+    if robot.is_alive():
+        robot.terminate()
+    simulator.stop()
+    telemetry.close()
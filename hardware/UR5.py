@@ -5,23 +5,49 @@
 @File ：UR5.py
 @IDE ：PyCharm
 """
-import asyncio
+import os
 import time
 import socket
-import struct
+import warnings
 import threading
 import numpy as np
-from multiprocessing import Process
+from multiprocessing import Process, Pipe
+
+from hardware.packet import DECODERS, decoder_for_version
+from hardware.framing import FrameReader
+from hardware.recorder import TelemetryRecorder
+from hardware.latency import now
+from hardware.dashboard import DashboardClient
+from hardware.urscript import ScriptProgram, ScriptLibrary
+from hardware.servo import ServoStreamer, local_ip
+from hardware.motion import MotionTracker
+from hardware.watchdog import ReceiverWatchdog
+from hardware.telemetry import FrameNotifier
 
 
 class UR5(Process):
-    def __init__(self, config, data30003, event, UR5_process_control):
+    def __init__(self, config, telemetry, event, UR5_process_control):
         super(UR5, self).__init__()
         self.config = config                                # 主界面加载的配置文件
-        self.data30003 = data30003                          # 接收数据，并放入共享内存
+        self.telemetry = telemetry                          # 遥测环形缓冲区，接收数据放入共享内存
         self.event = event                                  # 数据接收状态（正常、休眠）
         self.UR5_process_control = UR5_process_control      # 控制进程状态
         self.control = True                                 # 控制进程中TCP的连接与断开
+        self.decoder = None                                 # 30003数据包解码器，由帧长度确定
+        self.scripts = ScriptLibrary()                      # 脚本文件缓存
+        self.motion = MotionTracker(config.get('motion_tolerance', 0.001),      # 运动完成跟踪，只在主进程使用
+                                    dwell=config.get('motion_dwell', 0.02))
+        self.monitor = self.motion.monitor                  # 运动完成检查，接收进程逐帧调用
+        self.frames = FrameNotifier()                       # 帧到达通知，servoj按帧节拍发送设定点
+        self.commands, self.command_sink = Pipe()           # 脚本发送：主进程 -> 接收进程，应答为None或异常
+        self.command_lock = threading.Lock()
+
+    def __getstate__(self):
+        # spawn启动接收进程时序列化：运动跟踪（含线程锁、Future）、发送锁留在主进程，接收进程只需要monitor、command_sink
+        state = self.__dict__.copy()
+        state['motion'] = None
+        state['command_lock'] = None                        # 只有主进程的send_30003使用
+        return state
     def connect_30003(self):
         '''
         连接realtime-30003
@@ -30,7 +56,9 @@ class UR5(Process):
         try:
             # 连接30003端口，用于接收数据，发送控制脚本
             self.sk30003 = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.sk30003.connect((self.config["UR_IP"], 30003))
+            self.sk30003.settimeout(self.config.get("connect_timeout", 2.0))     # 控制器不可达时不无限等待
+            self.sk30003.connect((self.config["UR_IP"], self.config.get("realtime_port", 30003)))
+            self.sk30003.settimeout(None)
         except Exception as e:
             return False
         return True
@@ -40,11 +68,13 @@ class UR5(Process):
         连接Dashboard-29999端口
         :return: bool
         '''
+        # 连接29999端口，用于控制硬件；应答按行分帧，断线后下次请求时自动重连
+        # 在界面线程调用，只尝试一次，不做退避重试，控制器不可达时最多等待connect_timeout
+        self.sk29999 = DashboardClient(self.config["UR_IP"], self.config.get("dashboard_port", 29999),
+                                       self.config.get("connect_timeout", 2.0), attempts=1)
         try:
-            # 连接29999端口，用于控制硬件
-            self.sk29999 = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.sk29999.connect((self.config["UR_IP"], 29999))
-        except Exception as e:
+            self.sk29999.connect()
+        except ConnectionError as e:
             return False
         return True
 
@@ -64,19 +94,25 @@ class UR5(Process):
 
     def dashboard(self, instruct: str, type: str):
         '''
-        执行DashBoard指令
+        执行DashBoard指令，每条指令都会读取应答，保证下一条指令的应答不错位
         :param instruct:    指令名称
         :param type:        指令是否有返回值
         :return:            指令所需的返回值
         '''
+        res = self.sk29999.request(instruct)
         if type == "return":
-            self.sk29999.send(instruct.encode('utf8'))
-            res = self.sk29999.recv(2000)
             return res
         else:
-            self.sk29999.send(instruct.encode('utf8'))
             return None
 
+    def dashboard_many(self, instructs: list):
+        '''
+        一次发送多条DashBoard指令（如robotmode、safetystatus、programState、running），按顺序返回应答
+        :param instructs:   指令列表
+        :return:            list: 应答
+        '''
+        return self.sk29999.request_many(instructs)
+
     def movej(self, args: list, type: str, a=0.2, v=0.2, t=0, r=0):
         '''
         移动至指定位置
@@ -86,7 +122,7 @@ class UR5(Process):
         :param v:       主轴联合速度，rad/s
         :param t:       运动时间，s，该设置优先级大于a和v
         :param r:       混合半径，m
-        :return:        None
+        :return:        Future: 到位或程序结束时完成，见MotionTracker
         '''
         if type == "pose":
             data = 'movej(get_inverse_kin(p%s), a=%s, v=%s, t=%s, r=%s)\n' % (args, a, v, t, r)
@@ -97,7 +133,8 @@ class UR5(Process):
             for i in args:
                 radian.append(i * np.pi / 180)
             data = 'movej(%s, a=%s, v=%s, t=%s, r=%s)\n' % (radian, a, v, t, r)
-        self.sk30003.send(data.encode('utf8'))
+        future = self.track_motion(args, type)
+        return self.send_motion(future, data.encode('utf8'))
 
     def movel(self, args: list, type: str, a=0.2, v=0.2, t=0, r=0):
         '''
@@ -108,7 +145,7 @@ class UR5(Process):
         :param v:       主轴联合速度，rad/s
         :param t:       运动时间，s，该设置优先级大于a和v
         :param r:       混合半径，m
-        :return:        None
+        :return:        Future: 到位或程序结束时完成，见MotionTracker
         '''
         if type == "pose":
             data = 'movel(p%s, a=%s, v=%s, t=%s, r=%s)\n' % (args, a, v ,t, r)
@@ -119,7 +156,8 @@ class UR5(Process):
             for i in args:
                 radian.append(i * np.pi / 180)
             data = 'movel(get_forward_kin(%s), a=%s, v=%s, t=%s, r=%s)\n' % (radian, a, v ,t, r)
-        self.sk30003.send(data.encode('utf8'))
+        future = self.track_motion(args, type)
+        return self.send_motion(future, data.encode('utf8'))
 
     def movec(self, args1: list, args2: list, type: str, a=0.2, v=0.2, r=0, mode=0):
         '''
@@ -131,7 +169,7 @@ class UR5(Process):
         :param v:       主轴联合速度，rad/s
         :param r:       混合半径，m
         :param mode:    0：无限制模式     1：保持于相对圆弧切线方向恒定
-        :return:        None
+        :return:        Future: 到位或程序结束时完成，见MotionTracker
         '''
         if type == "pose":
             data = 'movec(p%s, p%s, a=%s, v=%s, r=%s, mode=%s)\n' % (args1, args2, a, v, r, mode)
@@ -146,7 +184,8 @@ class UR5(Process):
                 radian2.append(args2[i] * np.pi / 180)
             data = 'movec(get_forward_kin(%s), get_forward_kin(%s), a=%s, v=%s, r=%s, mode=%s)\n' % (
                 radian1, radian2, a, v, r, mode)
-        self.sk30003.send(data.encode('utf8'))
+        future = self.track_motion(args2, type)
+        return self.send_motion(future, data.encode('utf8'))
 
     def movep(self, args: list, type: str, a=0.2, v=0.2, r=0):
         '''
@@ -156,7 +195,7 @@ class UR5(Process):
         :param a:       主关节加速度，rad/s^2
         :param v:       主轴联合速度，rad/s
         :param r:       混合半径，m
-        :return:        None
+        :return:        Future: 到位或程序结束时完成，见MotionTracker
         '''
 
         if type == 'pose':
@@ -168,19 +207,125 @@ class UR5(Process):
             for i in args:
                 radian.append(i * np.pi / 180)
             data = 'movep(get_forward_kin(%s), a=%s, v=%s, r=%s)\n' % (radian, a, v, r)
-        self.sk30003.send(data.encode('utf8'))
+        future = self.track_motion(args, type)
+        return self.send_motion(future, data.encode('utf8'))
+
+    def move_path(self, waypoints, type: str, kind='movej', a=0.2, v=0.2, t=0, r=0):
+        '''
+        沿多个路点运动，整条路径生成一个程序一次发送，路点之间按r混合
+        :param waypoints:   路点，shape=(N, 6)；movec为 shape=(N, 2, 6)
+        :param type:        数据类型：pose、angle、radian
+        :param kind:        运动指令：movej、movel、movep、movec
+        :param a:           加速度，标量或每段一个值
+        :param v:           速度，标量或每段一个值
+        :param t:           运动时间，标量或每段一个值（movej、movel）
+        :param r:           混合半径，标量或每段一个值，最后一段为0
+        :return:            Future: 到位或程序结束时完成，见MotionTracker
+        '''
+        waypoints = np.asarray(waypoints, dtype=np.float64)
+        future = self.track_motion(waypoints.reshape(-1, 6)[-1], type)  # 以最后一个路点为目标
+        program = ScriptProgram().move(kind, waypoints, type, a=a, v=v, t=t, r=r)     # 指令不支持的参数不会写入
+        return self.send_motion(future, program.build().encode('utf8'))
+
+    def track_motion(self, target, type: str, timeout=None):
+        '''
+        跟踪一次运动的完成，需在发送指令之前调用；关节目标比较实际关节位置，位姿目标比较TCP位姿
+        :param target:  目标点，[arg1, arg2, arg3, arg4, arg5, arg6]
+        :param type:    数据类型：pose、angle、radian
+        :param timeout: 超时，s，缺省使用配置motion_timeout
+        :return:        Future: 结果为dict，含原因（到位、程序结束）、帧序号、机器运行时长、完成延迟
+        '''
+        if type == 'angle':
+            target = np.radians(target)
+        if timeout is None:
+            timeout = self.config.get('motion_timeout') or None
+        return self.motion.track(target, 'pose' if type == 'pose' else 'joint', timeout=timeout)
+
+    def send_motion(self, future, data):
+        '''
+        发送运动指令，发送失败时取消对应的运动Future
+        :param future:  track_motion返回的Future
+        :param data:    bytes: 脚本
+        :return:        Future
+        '''
+        try:
+            self.send_30003(data)
+        except OSError:
+            future.cancel()
+            raise
+        return future
+
+    def send_program(self, program: ScriptProgram):
+        '''
+        发送ScriptProgram生成的程序
+        :param program: ScriptProgram
+        :return:        None
+        '''
+        self.send_30003(program.build().encode('utf8'))
 
-    def send_script(self, file_path: str):
+    def servo_stream(self, trajectory, type: str, rate=500, lookahead=0.1, gain=300):
         '''
-        发送机器人script脚本文件
-        :param:     file_name: 文件路径
+        servoj流式执行稠密轨迹，按30003帧节拍发送设定点（阻塞，界面中应在线程中调用）
+        :param trajectory:  关节轨迹 shape=(N, 6)，按rate等间隔
+        :param type:        数据类型：angle、radian
+        :param rate:        设定点频率，Hz（125/500）
+        :param lookahead:   servoj前瞻时间，s
+        :param gain:        servoj比例增益
+        :return:            dict: 节拍抖动、滞后等统计
+        '''
+        host = self.config.get('servo_host') or local_ip(self.config['UR_IP'])   # 缺省为连接控制器所用的本机IP
+        self.servo = ServoStreamer(self.telemetry, self.frames, self.send_30003, host,
+                                   self.config.get('servo_port', 50002), rate,
+                                   self.config.get('frame_rate') or self.telemetry.frame_rate(),
+                                   lookahead, gain)
+        return self.servo.stream(trajectory, type)
+
+    def send_script(self, file_path: str, **params):
+        '''
+        发送机器人script脚本文件，文件未修改时直接从缓存发送
+        :param file_path:   文件路径
+        :param params:      脚本中 {name} 占位符的参数
+        :return:            float: 上传耗时，s
+        '''
+        return self.scripts.upload(self.send_30003, file_path, **params)
+
+    def send_30003(self, data):
+        '''
+        经30003发送脚本
+        接收进程断线重连后主进程继承的socket已失效，因此接收进程运行时由它经当前连接代为发送，见serve_commands
+        :param data:    bytes
+        :return:        None
+        '''
+        if not self.is_alive():                             # 接收进程未启动，直接使用将被继承的socket
+            self.sk30003.sendall(data)
+            return
+        with self.command_lock:
+            while self.commands.poll():                     # 丢弃此前超时未取的应答
+                self.commands.recv()
+            self.commands.send_bytes(data)
+            if not self.commands.poll(self.config.get('connect_timeout', 2.0)):
+                raise ConnectionError('接收进程未应答，30003脚本可能未发送')
+            error = self.commands.recv()
+        if error is not None:
+            raise error
+
+    def serve_commands(self):
+        '''
+        接收进程中的发送线程：代主进程经当前的30003连接发送脚本，应答None或发送时的异常
+        接收循环阻塞在select上，socket保持阻塞模式，两个线程可同时收发
         :return:    None
         '''
-        data2 = ''
-        with open('%s' % file_path, 'r', encoding='utf8') as f:
-            for i in f.readlines():
-                data2 += i
-        self.sk30003.send(data2.encode('utf8'))
+        while True:
+            try:
+                data = self.command_sink.recv_bytes()
+            except (EOFError, OSError):                     # 主进程已退出
+                return
+            try:
+                self.sk30003.sendall(data)
+                error = None
+            except OSError as e:                            # 断线、重连中或休眠
+                error = ConnectionError('30003发送失败：%r' % e)
+            self.command_sink.send(error)
 
     def get_message(self):
         '''
@@ -199,169 +344,130 @@ class UR5(Process):
             response = "(0,0,11,22,33,0)"
             conn.send(response.encode())
 
+    def pin_cpu(self):
+        '''
+        按配置的cpu（核心序号或列表）绑定接收进程，多台机械臂时各接收进程互不抢占
+        Linux用os.sched_setaffinity，Windows等平台在安装了psutil时用psutil，都不可用时给出警告（macOS不支持绑定）
+        :return:    bool: 是否已绑定
+        '''
+        cpus = self.config.get('cpu')
+        if cpus is None:
+            return False
+        cpus = [cpus] if isinstance(cpus, int) else list(cpus)
+        if hasattr(os, 'sched_setaffinity'):
+            os.sched_setaffinity(0, set(cpus))
+            return True
+        try:
+            import psutil
+            psutil.Process().cpu_affinity(cpus)
+            return True
+        except (ImportError, AttributeError, OSError) as e:     # 未安装psutil、平台不支持（AttributeError）或核心序号无效
+            warnings.warn('接收进程未能绑定CPU%s：%r' % (cpus, e), RuntimeWarning)
+            return False
+
+    def detect_layout(self, reader):
+        '''
+        确定控制器的数据包布局：配置了UR_version时按版本选择，否则按收到的第一帧长度选择
+        确定后分帧锁定为该长度，接收循环中直接调用绑定的解码函数，不再按帧查找布局
+        :param reader:  FrameReader
+        :return:        (function, memoryview): 解码函数、用于确定布局的第一帧（按版本选择时为None），
+                        第一帧由接收循环与其他帧一样发布、录制
+        '''
+        frame = None
+        if self.config.get('UR_version'):
+            self.decoder = decoder_for_version(self.config['UR_version'])
+        else:
+            frame = reader.read_frame()
+            self.decoder = DECODERS[len(frame)]
+        reader.lock(self.decoder.size)
+        return self.decoder.decode, frame
+
+    def reconnect_30003(self, watchdog):
+        '''
+        接收进程中断流后按指数退避重连，期间进程被要求退出或进入休眠时放弃
+        :param watchdog:    ReceiverWatchdog
+        :return:            bool: 是否重连成功
+        '''
+        self.sk30003.close()
+        for delay in watchdog.delays():
+            if not self.UR5_process_control['Process_flag'] or self.event.is_set():
+                return False
+            if self.connect_30003():
+                return True
+            time.sleep(delay)
+
     def run(self):
         '''
         解析30003发送过来的数据
+        接收超时（watchdog_timeout）或连接异常时由看门狗标记数据陈旧，并按指数退避自动重连
         :return:
         '''
+        self.pin_cpu()                                                  # 按配置绑定CPU核心
+        watchdog = ReceiverWatchdog(self.telemetry, self.config.get('frame_rate') or None,     # 未配置时按机器运行时长测量
+                                    self.config.get('watchdog_timeout', 0.1),
+                                    self.config.get('reconnect_backoff', 0.05),
+                                    self.config.get('reconnect_max_backoff', 2.0))
+        reader = FrameReader(self.sk30003, tuple(DECODERS), timeout=watchdog.timeout)  # 按长度前缀分帧，接受所有已知布局
+        threading.Thread(target=self.serve_commands, daemon=True).start()   # 代主进程发送脚本
+        decode = None                                                   # 解码函数，连接后按控制器布局确定
+        resyncs = 0                                                     # 已发布的重新同步次数
+        recorder = None                                                 # 原始帧录制，配置了record_dir时开启
+        latency = self.telemetry.latency(self.config.get('latency_sample', 10))     # 解析、发布延迟，按间隔采样
+        monitor = self.monitor                                          # 运动完成检查
         while self.UR5_process_control['Process_flag']:
             if not self.event.is_set():                         # UR5连接开启才接收数据
                 if not self.control:
                     self.connect_30003()
+                    decode = None
                     self.control = True
-                res = self.sk30003.recv(2000)
-                if int.from_bytes(res[0:4], byteorder='big') == 1220:
-                    print('接受中==========')
-                    self.data30003['总计数据长度'] = int.from_bytes(res[0:4], byteorder='big')
-                    self.data30003['机器运行时长'] = struct.unpack('>d', res[4:12])[0]
-                    self.data30003['目标关节位置'] = [struct.unpack('>d', res[12:20])[0],
-                                                struct.unpack('>d', res[20:28])[0],
-                                                struct.unpack('>d', res[28:36])[0],
-                                                struct.unpack('>d', res[36:44])[0],
-                                                struct.unpack('>d', res[44:52])[0],
-                                                struct.unpack('>d', res[52:60])[0]]
-                    self.data30003['目标关节速度'] = [struct.unpack('>d', res[60:68])[0],
-                                                struct.unpack('>d', res[68:76])[0],
-                                                struct.unpack('>d', res[76:84])[0],
-                                                struct.unpack('>d', res[84:92])[0],
-                                                struct.unpack('>d', res[92:100])[0],
-                                                struct.unpack('>d', res[100:108])[0]]
-                    self.data30003['目标关节加速度'] = [struct.unpack('>d', res[108:116])[0],
-                                                struct.unpack('>d', res[116:124])[0],
-                                                struct.unpack('>d', res[124:132])[0],
-                                                struct.unpack('>d', res[132:140])[0],
-                                                struct.unpack('>d', res[140:148])[0],
-                                                struct.unpack('>d', res[148:156])[0]]
-                    self.data30003['目标关节电流'] = [struct.unpack('>d', res[156:164])[0],
-                                                struct.unpack('>d', res[164:172])[0],
-                                                struct.unpack('>d', res[172:180])[0],
-                                                struct.unpack('>d', res[180:188])[0],
-                                                struct.unpack('>d', res[188:196])[0],
-                                                struct.unpack('>d', res[196:204])[0]]
-                    self.data30003['目标关节力矩'] = [struct.unpack('>d', res[204:212])[0],
-                                                struct.unpack('>d', res[212:220])[0],
-                                                struct.unpack('>d', res[220:228])[0],
-                                                struct.unpack('>d', res[228:236])[0],
-                                                struct.unpack('>d', res[236:244])[0],
-                                                struct.unpack('>d', res[244:252])[0]]
-                    self.data30003['实际关节位置'] = [struct.unpack('>d', res[252:260])[0],
-                                                struct.unpack('>d', res[260:268])[0],
-                                                struct.unpack('>d', res[268:276])[0],
-                                                struct.unpack('>d', res[276:284])[0],
-                                                struct.unpack('>d', res[284:292])[0],
-                                                struct.unpack('>d', res[292:300])[0]]
-                    self.data30003['实际关节速度'] = [struct.unpack('>d', res[300:308])[0],
-                                                struct.unpack('>d', res[308:316])[0],
-                                                struct.unpack('>d', res[316:324])[0],
-                                                struct.unpack('>d', res[324:332])[0],
-                                                struct.unpack('>d', res[332:340])[0],
-                                                struct.unpack('>d', res[340:348])[0]]
-                    self.data30003['实际关节电流'] = [struct.unpack('>d', res[348:356])[0],
-                                                struct.unpack('>d', res[356:364])[0],
-                                                struct.unpack('>d', res[364:372])[0],
-                                                struct.unpack('>d', res[372:380])[0],
-                                                struct.unpack('>d', res[380:388])[0],
-                                                struct.unpack('>d', res[388:396])[0]]
-                    self.data30003['关节联合电流'] = [struct.unpack('>d', res[396:404])[0],
-                                                struct.unpack('>d', res[404:412])[0],
-                                                struct.unpack('>d', res[412:420])[0],
-                                                struct.unpack('>d', res[420:428])[0],
-                                                struct.unpack('>d', res[428:436])[0],
-                                                struct.unpack('>d', res[436:444])[0]]
-                    self.data30003['工具矢量'] = [struct.unpack('>d', res[444:452])[0],
-                                                struct.unpack('>d', res[452:460])[0],
-                                                struct.unpack('>d', res[460:468])[0],
-                                                struct.unpack('>d', res[468:476])[0],
-                                                struct.unpack('>d', res[476:484])[0],
-                                                struct.unpack('>d', res[484:492])[0]]
-                    self.data30003['TCP实际速度'] = [struct.unpack('>d', res[492:500])[0],
-                                                struct.unpack('>d', res[500:508])[0],
-                                                struct.unpack('>d', res[508:516])[0],
-                                                struct.unpack('>d', res[516:524])[0],
-                                                struct.unpack('>d', res[524:532])[0],
-                                                struct.unpack('>d', res[532:540])[0]]
-                    self.data30003['TCP一般力'] = [struct.unpack('>d', res[540:548])[0],
-                                                struct.unpack('>d', res[548:556])[0],
-                                                struct.unpack('>d', res[556:564])[0],
-                                                struct.unpack('>d', res[564:572])[0],
-                                                struct.unpack('>d', res[572:580])[0],
-                                                struct.unpack('>d', res[580:588])[0]]
-                    self.data30003['工具目标矢量'] = [struct.unpack('>d', res[588:596])[0],
-                                                struct.unpack('>d', res[596:604])[0],
-                                                struct.unpack('>d', res[604:612])[0],
-                                                struct.unpack('>d', res[612:620])[0],
-                                                struct.unpack('>d', res[620:628])[0],
-                                                struct.unpack('>d', res[628:636])[0]]
-                    self.data30003['工具目标速度'] = [struct.unpack('>d', res[636:644])[0],
-                                                struct.unpack('>d', res[644:652])[0],
-                                                struct.unpack('>d', res[652:660])[0],
-                                                struct.unpack('>d', res[660:668])[0],
-                                                struct.unpack('>d', res[668:676])[0],
-                                                struct.unpack('>d', res[676:684])[0]]
-                    self.data30003['数字输入'] = int.from_bytes(res[684:692], byteorder='big')
-                    self.data30003['电机温度'] = [struct.unpack('>d', res[692:700])[0],
-                                                struct.unpack('>d', res[700:708])[0],
-                                                struct.unpack('>d', res[708:716])[0],
-                                                struct.unpack('>d', res[716:724])[0],
-                                                struct.unpack('>d', res[724:732])[0],
-                                                struct.unpack('>d', res[732:740])[0]]
-                    self.data30003['控制器实时线程执行时间'] = struct.unpack('>d', res[740:748])[0]
-                    self.data30003['UR软件测试值'] = struct.unpack('>d', res[748:756])[0]
-                    self.data30003['机器人模式'] = struct.unpack('>d', res[756:764])[0]
-                    self.data30003['关节模式'] = [struct.unpack('>d', res[764:772])[0],
-                                                struct.unpack('>d', res[772:780])[0],
-                                                struct.unpack('>d', res[780:788])[0],
-                                                struct.unpack('>d', res[788:796])[0],
-                                                struct.unpack('>d', res[796:804])[0],
-                                                struct.unpack('>d', res[804:812])[0]]
-                    self.data30003['安全模式'] = struct.unpack('>d', res[812:820])[0]
-                    self.data30003['UR安全模式'] = [struct.unpack('>d', res[820:828])[0],
-                                                struct.unpack('>d', res[828:836])[0],
-                                                struct.unpack('>d', res[836:844])[0],
-                                                struct.unpack('>d', res[844:852])[0],
-                                                struct.unpack('>d', res[852:860])[0],
-                                                struct.unpack('>d', res[860:868])[0]]
-                    self.data30003['机器人工具加速度'] = [struct.unpack('>d', res[868:876])[0],
-                                                struct.unpack('>d', res[876:884])[0],
-                                                struct.unpack('>d', res[884:892])[0]]
-                    self.data30003['UR机器人工具加速度'] = [struct.unpack('>d', res[892:900])[0],
-                                                struct.unpack('>d', res[900:908])[0],
-                                                struct.unpack('>d', res[908:916])[0],
-                                                struct.unpack('>d', res[916:924])[0],
-                                                struct.unpack('>d', res[924:932])[0],
-                                                struct.unpack('>d', res[932:940])[0]]
-                    self.data30003['轨迹限制器速度缩放'] = struct.unpack('>d', res[940:948])[0]
-                    self.data30003['线性动量范数'] = struct.unpack('>d', res[948:956])[0]
-                    self.data30003['UR线性动量范数'] = struct.unpack('>d', res[956:964])[0]
-                    self.data30003['URS线性动量范数'] = struct.unpack('>d', res[964:972])[0]
-                    self.data30003['主电压'] = struct.unpack('>d', res[972:980])[0]
-                    self.data30003['机器人电压'] = struct.unpack('>d', res[980:988])[0]
-                    self.data30003['机器人实际电压'] = struct.unpack('>d', res[988:996])[0]
-                    self.data30003['关节实际电压'] = [struct.unpack('>d', res[996:1004])[0],
-                                                struct.unpack('>d', res[1004:1012])[0],
-                                                struct.unpack('>d', res[1012:1020])[0],
-                                                struct.unpack('>d', res[1020:1028])[0],
-                                                struct.unpack('>d', res[1028:1036])[0],
-                                                struct.unpack('>d', res[1036:1044])[0]]
-                    self.data30003['数字输出'] = int(struct.unpack('>d', res[1044:1052])[0])
-                    self.data30003['程序状态'] = struct.unpack('>d', res[1052:1060])[0]
-                    self.data30003['肘部位置'] = [struct.unpack('>d', res[1060:1068])[0],
-                                                struct.unpack('>d', res[1068:1076])[0],
-                                                struct.unpack('>d', res[1076:1084])[0]]
-                    self.data30003['肘部速度'] = [struct.unpack('>d', res[1084:1092])[0],
-                                                struct.unpack('>d', res[1092:1100])[0],
-                                                struct.unpack('>d', res[1100:1108])[0]]
-                    self.data30003['安全状态'] = struct.unpack('>d', res[1108:1116])[0]
-                    self.data30003['UR安全状态1'] = struct.unpack('>d', res[1116:1124])[0]
-                    self.data30003['UR安全状态2'] = struct.unpack('>d', res[1124:1132])[0]
-                    self.data30003['UR安全状态3'] = struct.unpack('>d', res[1132:1140])[0]
+                try:
+                    res = None
+                    if decode is None:                          # 新连接：清空分帧缓冲区，确定布局
+                        reader.reset(self.sk30003)
+                        reader.timeout = watchdog.timeout       # 测得帧周期后接收超时不小于3个帧周期
+                        decode, res = self.detect_layout(reader)
+                        if self.config.get('record_dir'):
+                            if recorder is None:
+                                recorder = TelemetryRecorder(self.config['record_dir'], self.decoder.size,
+                                                             self.config.get('record_chunk_frames', 30000),
+                                                             compress=self.config.get('record_compress', False))
+                            else:
+                                recorder.new_session()          # 控制器可能已重启，机器运行时长重新计时
+                                recorder.set_frame_size(self.decoder.size)
+                    if res is None:
+                        res = reader.read_frame()               # 读取完整的一帧
+                except OSError:                                 # 接收超时、连接断开或被重置
+                    watchdog.stalled()
+                    monitor.fail('30003断流，运动状态未知')         # 未完成的运动Future以ConnectionError结束
+                    self.reconnect_30003(watchdog)
+                    decode = None
+                    continue
+                received = now()                                # 接收时间，随帧写入共享内存
+                watchdog.frame(res, received)                   # 机器运行时长间隔统计，重连后清除陈旧标记
+                record = decode(res)                            # 整帧一次解析
+                if latency.sample():
+                    latency.record(0, now() - received)         # 解析
+                    seq = self.telemetry.publish(record, received)  # 写入共享内存，不经过Manager进程
+                    latency.record(1, now() - received)         # 发布
                 else:
-                    print('数据接收、长度不对', int.from_bytes(res[0:4], byteorder='big'))
+                    seq = self.telemetry.publish(record, received)
+                monitor.check(self.telemetry, seq)              # 逐帧检查未完成的运动，完成时通知主进程
+                self.frames.published(seq + 1)                  # 唤醒等待该帧的servoj节拍
+                if recorder is not None:
+                    recorder.append(res)                        # 追加至录制块，由写入线程落盘
+                if reader.resyncs != resyncs:                   # 分帧统计有变化时更新（重新同步次数、丢弃字节数）
+                    resyncs = reader.resyncs
+                    self.telemetry.set_stats(reader.stats())
             else:
                 if self.control:
                     self.close_30003()
                     self.control = False
+                monitor.receive()                               # 休眠期间继续取出登记的运动，命令管道不会写满
+                monitor.fail('数据接收已休眠，运动状态未知')
                 time.sleep(0.2)
+        monitor.fail('数据接收进程已退出')
+        if recorder is not None:
+            recorder.close()                                # 落盘未写满的录制块
         if self.control:
             self.close_30003()                              # 断开TCP连接
 class Test(Process):
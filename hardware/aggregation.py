@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 17:10
+@Auth ： Ethan
+@File ：aggregation.py
+@IDE ：PyCharm
+"""
+import numpy as np
+
+
+# 默认统计的字段
+AGGREGATE_FIELDS = ['实际关节电流', '电机温度', 'TCP一般力']
+STATS = ('最小值', '最大值', '平均值', '均方根')
+
+
+class FieldWindow:
+    '''
+    单个字段的滑动窗口：原始数据按块聚合，窗口由固定数量的块组成（块的环形数组）
+    每块保存最小值、最大值、和、平方和，窗口统计由块统计归约得到，新块进入、旧块移出时增量更新和与平方和
+    块序列本身即为降采样后的曲线，界面只需绘制块数个点
+    '''
+
+    def __init__(self, count, block, points):
+        '''
+        :param count:   字段的数值个数（如关节电流为6）
+        :param block:   每块的帧数
+        :param points:  窗口中的块数
+        '''
+        self.block = block
+        self.points = points
+        self.pending = np.empty((block, count))                 # 未满一块的数据
+        self.filled = 0                                         # pending中的帧数
+        self.mins = np.zeros((points, count))
+        self.maxs = np.zeros((points, count))
+        self.sums = np.zeros((points, count))
+        self.sumsq = np.zeros((points, count))
+        self.times = np.zeros(points)                           # 每块最后一帧的机器运行时长
+        self.head = 0                                           # 下一块写入的位置
+        self.blocks = 0                                         # 窗口中的块数
+        self.total = np.zeros(count)                            # 窗口内的和
+        self.total_sq = np.zeros(count)                         # 窗口内的平方和
+
+    def update(self, values, times):
+        '''
+        追加一批数据
+        :param values:  np.ndarray shape=(n, count)
+        :param times:   np.ndarray shape=(n,) 机器运行时长
+        :return:        None
+        '''
+        if self.filled:
+            values = np.concatenate((self.pending[:self.filled], values))
+            times = np.concatenate((np.full(self.filled, np.nan), times))
+        k = len(values) // self.block
+        rest = len(values) - k * self.block
+        self.pending[:rest] = values[k * self.block:]
+        self.filled = rest
+        if k == 0:
+            return
+        if k > self.points:                                     # 一次到达超过整个窗口的数据，只保留最后部分
+            values = values[(k - self.points) * self.block:]
+            times = times[(k - self.points) * self.block:]
+            k = self.points
+
+        blocks = values[:k * self.block].reshape(k, self.block, -1)
+        sums = blocks.sum(axis=1)
+        sumsq = np.einsum('ijk,ijk->ik', blocks, blocks)
+        index = (self.head + np.arange(k)) % self.points
+        self.total += sums.sum(axis=0) - self.sums[index].sum(axis=0)      # 新块进入、旧块移出
+        self.total_sq += sumsq.sum(axis=0) - self.sumsq[index].sum(axis=0)
+        self.mins[index] = blocks.min(axis=1)
+        self.maxs[index] = blocks.max(axis=1)
+        self.sums[index] = sums
+        self.sumsq[index] = sumsq
+        self.times[index] = times[self.block - 1:k * self.block:self.block]
+        self.blocks = min(self.blocks + k, self.points)
+        wrapped = self.head + k >= self.points
+        self.head = (self.head + k) % self.points
+        if wrapped:                                             # 每转一圈重新求和，消除增量累加的舍入误差
+            self.total = self.sums.sum(axis=0)
+            self.total_sq = self.sumsq.sum(axis=0)
+
+    def order(self):
+        '''
+        窗口中各块按时间先后的位置
+        :return:    np.ndarray
+        '''
+        return (self.head - self.blocks + np.arange(self.blocks)) % self.points
+
+    def stats(self):
+        '''
+        窗口统计（已聚合的块 + 未满一块的数据）
+        :return:    dict: 统计名 -> np.ndarray shape=(count,)，窗口为空时返回None
+        '''
+        n = self.blocks * self.block + self.filled
+        if n == 0:
+            return None
+        index = self.order()
+        pending = self.pending[:self.filled]
+        total = self.total + pending.sum(axis=0)
+        total_sq = self.total_sq + (pending * pending).sum(axis=0)
+        return {
+            '最小值': np.vstack((self.mins[index], pending)).min(axis=0),
+            '最大值': np.vstack((self.maxs[index], pending)).max(axis=0),
+            '平均值': total / n,
+            '均方根': np.sqrt(np.maximum(total_sq / n, 0)),
+        }
+
+    def series(self, stat='平均值'):
+        '''
+        降采样后的曲线，每块一个点
+        :param stat:    统计名，见STATS
+        :return:        (np.ndarray, np.ndarray): 时间 shape=(块数,)、数值 shape=(块数, count)
+        '''
+        index = self.order()
+        if stat == '最小值':
+            values = self.mins[index]
+        elif stat == '最大值':
+            values = self.maxs[index]
+        elif stat == '平均值':
+            values = self.sums[index] / self.block
+        elif stat == '均方根':
+            values = np.sqrt(self.sumsq[index] / self.block)
+        else:
+            raise ValueError('未知的统计量：%s' % stat)
+        return self.times[index], values
+
+
+class TelemetryAggregator:
+    '''
+    遥测滑动窗口统计：从TelemetryRing按帧序号增量读取，整批向量化计算，不逐帧循环
+    窗口长度 window 帧，按 points 个块降采样，例如500Hz下 window=5000、points=250 为10s窗口、每点40ms
+    '''
+
+    def __init__(self, ring, fields=AGGREGATE_FIELDS, window=5000, points=250):
+        '''
+        :param ring:    TelemetryRing
+        :param fields:  统计的字段名列表
+        :param window:  窗口长度，帧
+        :param points:  窗口中的点数（块数），window需为其整数倍
+        '''
+        if window % points:
+            raise ValueError('window需为points的整数倍')
+        self.ring = ring
+        self.window = window
+        self.seq = ring.seq                                     # 下一次读取的起始帧序号
+        self.dropped = 0                                        # 读取不及时或读取期间被覆盖的帧数
+        counts = dict(ring.fields)
+        self.windows = {name: FieldWindow(counts[name], window // points, points) for name in fields}
+
+    def poll(self):
+        '''
+        读取上次之后发布的帧并更新统计，由界面定时器或独立线程周期调用
+        :return:    int: 本次处理的帧数
+        '''
+        start = self.seq
+        records, self.seq = self.ring.since(start)
+        self.dropped += self.seq - start - len(records)        # 超过缓冲区容量或校验未通过的部分已被覆盖
+        return self.update(records)
+
+    def update(self, records):
+        '''
+        用一批记录更新统计
+        :param records: 结构化数组（TelemetryRing记录或PacketDecoder.decode_many结果）
+        :return:        int: 帧数
+        '''
+        if len(records) == 0:
+            return 0
+        times = records['机器运行时长'].astype(np.float64)
+        for name, window in self.windows.items():
+            window.update(records[name].astype(np.float64).reshape(len(records), -1), times)
+        return len(records)
+
+    def span(self, frame_rate):
+        '''
+        窗口覆盖的时长
+        :param frame_rate:  帧频率，Hz
+        :return:            float: s
+        '''
+        return self.window / frame_rate
+
+    def stats(self, name):
+        '''
+        字段的窗口统计
+        :param name:    字段名
+        :return:        dict: 统计名 -> np.ndarray，窗口为空时返回None
+        '''
+        return self.windows[name].stats()
+
+    def series(self, name, stat='平均值'):
+        '''
+        字段的降采样曲线
+        :param name:    字段名
+        :param stat:    统计名，见STATS
+        :return:        (np.ndarray, np.ndarray): 时间、数值
+        '''
+        return self.windows[name].series(stat)
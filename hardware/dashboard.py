@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 18:20
+@Auth ： Ethan
+@File ：dashboard.py
+@IDE ：PyCharm
+"""
+import time
+import socket
+import threading
+
+
+# 只读的查询指令，连接中断后可以安全地自动重发
+QUERIES = {'robotmode', 'safetystatus', 'programState', 'running', 'PolyscopeVersion', 'get robot model',
+           'is in remote control', 'isProgramSaved', 'get loaded program', 'get operational mode'}
+
+
+class DashboardClient:
+    '''
+    Dashboard-29999客户端（同步、线程安全）
+    应答按换行分帧，并按发送顺序与请求配对；多条指令可以一次写入（流水线），再依次读取应答
+    应答超时或连接异常时直接断开连接，避免迟到的应答串到下一条指令；下次请求时按指数退避重新连接
+    '''
+
+    def __init__(self, host, port=29999, timeout=2.0, backoff=0.1, max_backoff=5.0, attempts=5):
+        '''
+        :param host:        控制器IP
+        :param port:        Dashboard端口
+        :param timeout:     连接与单条应答的超时，s
+        :param backoff:     重连的初始等待时间，s，每次失败翻倍
+        :param max_backoff: 重连等待时间上限，s
+        :param attempts:    每次请求最多尝试连接的次数
+        '''
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.attempts = attempts
+        self.sock = None
+        self.buffer = bytearray()                               # 未分帧的接收数据
+        self.banner = None                                      # 连接时的欢迎信息
+        self.lock = threading.Lock()                            # 界面线程与轮询线程共用时保证请求、应答成对
+        self.connections = 0                                    # 建立连接的次数（含重连）
+
+    @property
+    def connected(self):
+        return self.sock is not None
+
+    def connect(self):
+        '''
+        建立连接并读取欢迎信息，失败时按指数退避重试
+        :return:    None，多次尝试仍失败时抛出ConnectionError
+        '''
+        delay = self.backoff
+        for attempt in range(self.attempts):
+            try:
+                self.sock = socket.create_connection((self.host, self.port), self.timeout)
+                self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.buffer.clear()
+                self.banner = self.readline()
+                self.connections += 1
+                return
+            except OSError:
+                self.drop()
+                if attempt < self.attempts - 1:
+                    time.sleep(delay)
+                    delay = min(delay * 2, self.max_backoff)
+        raise ConnectionError('无法连接Dashboard：%s:%s' % (self.host, self.port))
+
+    def drop(self):
+        '''
+        断开连接（不发送quit），缓冲区中残留的数据一并丢弃
+        :return:    None
+        '''
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self.buffer.clear()
+
+    def readline(self):
+        '''
+        读取一行应答
+        :return:    str: 去掉换行的应答
+        '''
+        while True:
+            end = self.buffer.find(b'\n')
+            if end >= 0:
+                line = bytes(self.buffer[:end])
+                del self.buffer[:end + 1]
+                return line.decode('utf8', 'replace').strip()
+            data = self.sock.recv(4096)
+            if not data:
+                raise ConnectionError('Dashboard连接已断开')
+            self.buffer += data
+
+    def request_many(self, instructs):
+        '''
+        一次写入多条指令，按顺序返回应答
+        连接异常时重新连接；全部为查询指令时自动重发一次，包含控制指令时抛出异常，由调用方决定是否重发
+        :param instructs:   指令列表
+        :return:            list: 应答
+        '''
+        instructs = [i.strip() for i in instructs]
+        payload = ''.join(i + '\n' for i in instructs).encode('utf8')
+        retry = all(i in QUERIES for i in instructs)
+        with self.lock:
+            while True:
+                if self.sock is None:
+                    self.connect()
+                try:
+                    self.sock.sendall(payload)
+                    return [self.readline() for _ in instructs]
+                except (OSError, ConnectionError):
+                    self.drop()                                 # 超时或断开，丢弃连接，避免应答错位
+                    if not retry:
+                        raise ConnectionError('Dashboard指令未完成：%s' % ', '.join(instructs))
+                    retry = False
+
+    def request(self, instruct):
+        '''
+        执行一条指令
+        :param instruct:    指令
+        :return:            str: 应答
+        '''
+        return self.request_many([instruct])[0]
+
+    def close(self):
+        '''
+        发送quit并断开连接
+        :return:    None
+        '''
+        with self.lock:
+            if self.sock is not None:
+                try:
+                    self.sock.sendall(b'quit\n')
+                except OSError:
+                    pass
+            self.drop()
+
+
+def parse_reply(command, reply):
+    '''
+    解析Dashboard应答
+    :param command: 指令
+    :param reply:   应答
+    :return:        robotmode/safetystatus -> str: 模式      programState -> (str, str): 程序状态、程序名
+                    running/is in remote control/isProgramSaved -> bool      其他 -> str: 原始应答
+    '''
+    if command in ('robotmode', 'safetystatus'):
+        return reply.split(':', 1)[-1].strip()
+    if command == 'programState':
+        state, _, program = reply.partition(' ')
+        return state, program
+    if command == 'running':
+        return reply.split(':', 1)[-1].strip().lower() == 'true'
+    if command in ('is in remote control', 'isProgramSaved'):
+        return reply.split(' ', 1)[0].lower() == 'true'
+    return reply
+
+
+class DashboardCache:
+    '''
+    Dashboard状态缓存：一次写入所有查询指令，解析后与缓存比较，返回发生变化的项
+    由轮询线程周期调用，界面只读缓存，不在界面线程等待网络
+    '''
+
+    def __init__(self, client, commands):
+        '''
+        :param client:      DashboardClient
+        :param commands:    dict: 名称 -> 指令（只能是QUERIES中的查询指令）
+        '''
+        for name, command in commands.items():
+            if command not in QUERIES:
+                raise ValueError('%s（%s）不是查询指令，不能轮询' % (name, command))
+        self.client = client
+        self.names = list(commands)
+        self.commands = [commands[name] for name in self.names]
+        self.values = {}                                        # 名称 -> 解析后的值
+        self.updated = 0.0                                      # 最近一次刷新的时间
+        self.lock = threading.Lock()
+
+    def poll(self):
+        '''
+        刷新一次
+        :return:    dict: 发生变化的项，名称 -> 新值；连接异常时抛出ConnectionError
+        '''
+        replies = self.client.request_many(self.commands)
+        changes = {}
+        with self.lock:
+            for name, command, reply in zip(self.names, self.commands, replies):
+                value = parse_reply(command, reply)
+                if self.values.get(name) != value:
+                    self.values[name] = value
+                    changes[name] = value
+            self.updated = time.time()
+        return changes
+
+    def get(self, name, default=None):
+        with self.lock:
+            return self.values.get(name, default)
+
+    def snapshot(self):
+        '''
+        缓存的拷贝
+        :return:    dict
+        '''
+        with self.lock:
+            return dict(self.values)
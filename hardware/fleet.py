@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 21:00
+@Auth ： Ethan
+@File ：fleet.py
+@IDE ：PyCharm
+"""
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+from hardware.UR5 import UR5
+from hardware.telemetry import TelemetryRing
+from hardware.dashboard import DashboardClient
+
+
+class ProcessControl:
+    '''
+    接收进程的控制标志，替代Manager().dict()
+    UR5.run每帧都会读取Process_flag，Manager字典每次读取都要经过Manager进程；多台机械臂时改用共享内存中的标志
+    '''
+
+    def __init__(self):
+        self.flag = multiprocessing.Value('b', 0, lock=False)
+
+    def __getitem__(self, key):
+        if key != 'Process_flag':
+            raise KeyError(key)
+        return bool(self.flag.value)
+
+    def __setitem__(self, key, value):
+        if key != 'Process_flag':
+            raise KeyError(key)
+        self.flag.value = 1 if value else 0
+
+
+class Robot:
+    '''
+    机群中的一台机械臂：接收进程、遥测共享内存、Dashboard连接
+    '''
+
+    def __init__(self, name, config):
+        '''
+        :param name:    名称
+        :param config:  该机械臂的配置（公共配置 + robots中该项的覆盖）
+        '''
+        self.name = name
+        self.config = config
+        self.telemetry = TelemetryRing(create=True, capacity=config.get('telemetry_capacity', 1024))
+        self.event = multiprocessing.Event()                    # 数据接收状态（正常、休眠）
+        self.control = ProcessControl()
+        self.ur5 = UR5(config, self.telemetry, self.event, self.control)
+        self.dashboard = DashboardClient(config['UR_IP'], config.get('dashboard_port', 29999))  # 首次请求时连接
+        self.started = False
+
+    def start(self):
+        '''
+        连接30003并启动接收进程
+        :return:    bool: 是否连接成功
+        '''
+        if not self.ur5.connect_30003():
+            return False
+        self.control['Process_flag'] = True
+        self.ur5.start()
+        self.started = True
+        return True
+
+    def stop(self, timeout=2.0):
+        '''
+        结束接收进程，断开Dashboard，释放共享内存
+        :param timeout: 等待进程结束的时间，s
+        :return:        None
+        '''
+        self.control['Process_flag'] = False
+        if self.started:
+            self.ur5.join(timeout)
+            if self.ur5.is_alive():
+                self.ur5.terminate()                            # 阻塞在recv上时强制结束
+            self.ur5.close_30003()
+        self.dashboard.close()
+        self.telemetry.close()
+
+
+class Fleet:
+    '''
+    多台机械臂的统一管理：按配置中的robots列表为每台机械臂启动一个接收进程
+    每台独立的遥测共享内存、Dashboard连接，接收进程可按cpu配置绑定核心
+    查询、控制统一按名称调用，如 fleet.latest('UR5-1')、fleet.dashboard('UR5-2', 'play')、fleet.command('UR5-1', 'movej', ...)
+    '''
+
+    def __init__(self, config):
+        '''
+        :param config:  主配置，robots为列表，每项为 {"name": ..., "UR_IP": ..., 其他覆盖公共配置的键}
+                        未配置robots时，按UR_IP作为名为UR5的单台机械臂
+        '''
+        entries = config.get('robots') or [{'name': 'UR5', 'UR_IP': config['UR_IP']}]
+        self.robots = {}
+        for entry in entries:
+            robot_config = {key: value for key, value in config.items() if key != 'robots'}
+            robot_config.update(entry)
+            if robot_config['name'] in self.robots:
+                raise ValueError('机械臂名称重复：%s' % robot_config['name'])
+            self.robots[robot_config['name']] = Robot(robot_config['name'], robot_config)
+        self.pool = ThreadPoolExecutor(max_workers=max(len(self.robots), 1))     # 同时向多台机械臂发送Dashboard指令
+
+    def __getitem__(self, name):
+        return self.robots[name]
+
+    def __iter__(self):
+        return iter(self.robots)
+
+    def start(self):
+        '''
+        启动所有机械臂的接收进程
+        :return:    dict: 名称 -> 是否连接成功
+        '''
+        return {name: robot.start() for name, robot in self.robots.items()}
+
+    def latest(self, name, copy=True):
+        '''
+        最新一帧遥测
+        :param name:    名称
+        :param copy:    是否返回拷贝，见TelemetryRing.latest
+        :return:        np.void
+        '''
+        return self.robots[name].telemetry.latest(copy)
+
+    def dashboard(self, name, instruct):
+        '''
+        执行Dashboard指令
+        :param name:        名称
+        :param instruct:    指令
+        :return:            str: 应答
+        '''
+        return self.robots[name].dashboard.request(instruct)
+
+    def dashboard_all(self, instructs, names=None):
+        '''
+        向多台机械臂同时发送一组Dashboard指令
+        :param instructs:   指令列表
+        :param names:       名称列表，缺省为全部
+        :return:            dict: 名称 -> 应答列表，连接失败时为ConnectionError
+        '''
+        names = list(names or self.robots)
+        futures = {name: self.pool.submit(self.robots[name].dashboard.request_many, instructs) for name in names}
+        result = {}
+        for name, future in futures.items():
+            try:
+                result[name] = future.result()
+            except ConnectionError as e:
+                result[name] = e
+        return result
+
+    def command(self, name, method, *args, **kwargs):
+        '''
+        调用某台机械臂UR5对象的方法（在主进程中，通过该机械臂的30003连接发送），如movej、move_path、send_script
+        :param name:    名称
+        :param method:  方法名
+        :return:        方法的返回值
+        '''
+        return getattr(self.robots[name].ur5, method)(*args, **kwargs)
+
+    def stats(self):
+        '''
+        各机械臂的接收统计
+        :return:    dict: 名称 -> {'接收帧数', '重新同步次数', '丢弃字节数'}
+        '''
+        return {name: {'接收帧数': robot.telemetry.seq,
+                       '重新同步次数': int(robot.telemetry.header['重新同步次数']),
+                       '丢弃字节数': int(robot.telemetry.header['丢弃字节数'])}
+                for name, robot in self.robots.items()}
+
+    def stop(self):
+        '''
+        停止所有机械臂
+        :return:    None
+        '''
+        for robot in self.robots.values():
+            robot.stop()
+        self.pool.shutdown()
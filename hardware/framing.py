@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 10:05
+@Auth ： Ethan
+@File ：framing.py
+@IDE ：PyCharm
+"""
+import select
+
+
+class FrameReader:
+    '''
+    30003数据流分帧：按4字节长度前缀从TCP流中拆出完整的一帧
+    TCP会把一帧拆成多段、或把多帧合成一段，recv得到的数据不能直接当作一帧解析
+    数据通过recv_into写入预分配的缓冲区，循环中不再为每帧申请内存
+    '''
+
+    def __init__(self, sock, frame_sizes=(1220,), capacity=65536, timeout=None):
+        '''
+        :param sock:            已连接的socket
+        :param frame_sizes:     合法的帧长度，长度前缀不在其中时视为失步
+        :param capacity:        缓冲区大小，需大于最大帧长度
+        :param timeout:         接收超时，s，为None时一直等待
+                                用select等待而不设置socket超时：30003 socket与主进程共享，设置超时会把它改为非阻塞
+        '''
+        self.sock = sock                                        # 30003 socket
+        self.timeout = timeout
+        self.all_sizes = tuple(frame_sizes)                     # 所有合法帧长度
+        self.lock(*self.all_sizes)
+        self.buffer = bytearray(max(capacity, self.max_size * 4))   # 预分配的接收缓冲区
+        self.view = memoryview(self.buffer)                     # 缓冲区视图，切片不拷贝
+        self.start = 0                                          # 未处理数据的起点
+        self.end = 0                                            # 已接收数据的终点
+        self.frames = 0                                         # 已拆出的帧数
+        self.resyncs = 0                                        # 重新同步次数
+        self.dropped_bytes = 0                                  # 因失步丢弃的字节数
+
+    def lock(self, *frame_sizes):
+        '''
+        限定合法的帧长度，确定控制器布局后锁定为单一长度
+        :param frame_sizes: 帧长度
+        :return:            None
+        '''
+        self.frame_sizes = set(frame_sizes)                     # 合法帧长度
+        self.headers = [size.to_bytes(4, byteorder='big') for size in self.frame_sizes]  # 用于重新同步的帧头
+        self.max_size = max(self.frame_sizes)                   # 最大帧长度
+
+    def reset(self, sock=None):
+        '''
+        清空缓冲区并恢复所有合法帧长度，重新连接后调用
+        :param sock:    新的socket，为None时沿用原socket
+        :return:        None
+        '''
+        if sock is not None:
+            self.sock = sock
+        self.lock(*self.all_sizes)
+        self.start = 0
+        self.end = 0
+
+    def read_frame(self):
+        '''
+        读取完整的一帧，数据不足时阻塞接收
+        返回的是缓冲区上的视图，下一次调用read_frame后失效，需要保留时自行拷贝
+        :return:    memoryview: 一帧数据（包含4字节长度前缀）
+        '''
+        while True:
+            frame = self.next_frame()
+            if frame is not None:
+                return frame
+            self.fill()
+
+    def next_frame(self):
+        '''
+        从已接收的数据中拆出一帧，不接收新数据
+        :return:    memoryview: 一帧数据，数据不足时返回None
+        '''
+        while True:
+            available = self.end - self.start
+            if available < 4:
+                return None
+            size = int.from_bytes(self.buffer[self.start:self.start + 4], byteorder='big')
+            if size not in self.frame_sizes:
+                self.resync()                                   # 长度前缀不合法，重新寻找帧头
+                continue
+            if available < size:
+                return None
+            frame = self.view[self.start:self.start + size]     # 一帧已完整，直接返回视图
+            self.start += size
+            self.frames += 1
+            return frame
+
+    def resync(self):
+        '''
+        长度前缀不合法时，向后寻找下一个合法的帧头，丢弃中间的数据
+        :return:    None
+        '''
+        self.resyncs += 1
+        found = -1
+        for header in self.headers:
+            index = self.buffer.find(header, self.start + 1, self.end)
+            if index != -1 and (found == -1 or index < found):
+                found = index
+        if found == -1:
+            found = max(self.start + 1, self.end - 3)           # 末尾3字节可能是被截断的帧头，保留
+        self.dropped_bytes += found - self.start
+        self.start = found
+
+    def recv_buffer(self):
+        '''
+        获取可写入的缓冲区尾部，剩余空间不足一帧时先把未处理数据移到缓冲区头部
+        :return:    memoryview: 可写入的缓冲区
+        '''
+        if self.start == self.end:
+            self.start = self.end = 0
+        elif len(self.buffer) - self.end < self.max_size:
+            length = self.end - self.start
+            self.view[:length] = self.view[self.start:self.end]    # memmove，不申请新内存
+            self.start, self.end = 0, length
+        return self.view[self.end:]
+
+    def advance(self, n):
+        '''
+        向recv_buffer写入n字节后调用
+        :param n:   写入的字节数
+        :return:    None
+        '''
+        self.end += n
+
+    def fill(self):
+        '''
+        从socket接收数据至缓冲区尾部，timeout秒内没有数据时抛出TimeoutError
+        :return:    None
+        '''
+        if self.timeout is not None and not select.select((self.sock,), (), (), self.timeout)[0]:
+            raise TimeoutError('30003接收超时')
+        n = self.sock.recv_into(self.recv_buffer())
+        if n == 0:
+            raise ConnectionError('30003连接已断开')
+        self.advance(n)
+
+    def stats(self):
+        '''
+        分帧统计信息
+        :return:    dict
+        '''
+        return {'接收帧数': self.frames, '重新同步次数': self.resyncs, '丢弃字节数': self.dropped_bytes}
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 17:45
+@Auth ： Ethan
+@File ：latency.py
+@IDE ：PyCharm
+"""
+import json
+import math
+import time
+import numpy as np
+
+
+# 遥测链路的各阶段，均为相对于30003收到该帧（接收时间）的耗时
+STAGES = ['解析', '发布', '界面读取', '渲染']
+PER_DECADE = 8                                                  # 每个数量级的桶数
+MIN_EXP = -6                                                    # 最小桶下限 1us
+NBINS = 7 * PER_DECADE                                          # 1us ~ 10s
+EDGES = 10.0 ** (np.arange(NBINS + 1) / PER_DECADE + MIN_EXP)   # 桶边界，s
+
+
+def format_time(seconds):
+    '''
+    耗时格式化，1ms以下以us显示
+    :param seconds: 耗时，s
+    :return:        str
+    '''
+    if seconds < 1e-3:
+        return '%.0fus' % (seconds * 1e6)
+    return '%.1fms' % (seconds * 1e3)
+
+
+def now():
+    '''
+    打点时间，perf_counter在Linux/Windows下均为系统范围的单调时钟，可跨进程比较
+    :return:    float: s
+    '''
+    return time.perf_counter()
+
+
+class LatencyHistogram:
+    '''
+    对数分桶的延迟直方图，记录一次只做一次对数和一次计数，可以在生产环境常开
+    计数数组可以放在TelemetryRing头部的共享内存中：接收进程写解析、发布两行，界面进程写界面读取、渲染两行
+    '''
+
+    def __init__(self, counts=None, maxima=None, sample_every=1):
+        '''
+        :param counts:          计数数组 shape=(阶段数, NBINS)，缺省时新建
+        :param maxima:          各阶段最大值 shape=(阶段数,)，缺省时新建
+        :param sample_every:    采样间隔，每隔多少帧记录一次
+        '''
+        self.counts = np.zeros((len(STAGES), NBINS), dtype=np.int64) if counts is None else counts
+        self.maxima = np.zeros(len(STAGES)) if maxima is None else maxima
+        self.sample_every = max(int(sample_every), 1)
+        self.ticks = 0
+
+    def sample(self):
+        '''
+        本帧是否采样，由调用方在打点前判断
+        :return:    bool
+        '''
+        self.ticks += 1
+        return self.ticks % self.sample_every == 0
+
+    def record(self, stage, elapsed):
+        '''
+        记录一次耗时
+        :param stage:   阶段序号，见STAGES
+        :param elapsed: 耗时，s
+        :return:        None
+        '''
+        if elapsed > 1e-6:
+            index = min(int((math.log10(elapsed) - MIN_EXP) * PER_DECADE), NBINS - 1)
+        else:
+            index = 0
+        self.counts[stage, index] += 1
+        if elapsed > self.maxima[stage]:
+            self.maxima[stage] = elapsed
+
+    def percentile(self, stage, q):
+        '''
+        分位数，返回所在桶的上边界（偏保守）
+        :param stage:   阶段序号
+        :param q:       分位，0~1
+        :return:        float: s，无样本时返回nan
+        '''
+        cumulative = np.cumsum(self.counts[stage])
+        if cumulative[-1] == 0:
+            return math.nan
+        index = int(np.searchsorted(cumulative, q * cumulative[-1]))
+        return float(EDGES[index + 1])
+
+    def summary(self):
+        '''
+        各阶段统计
+        :return:    dict: 阶段 -> {'样本数', 'p50', 'p99', '最大值'}，单位s
+        '''
+        return {stage: {'样本数': int(self.counts[i].sum()),
+                        'p50': self.percentile(i, 0.5),
+                        'p99': self.percentile(i, 0.99),
+                        '最大值': float(self.maxima[i])}
+                for i, stage in enumerate(STAGES)}
+
+    def text(self):
+        '''
+        状态栏显示的文字
+        :return:    str
+        '''
+        parts = []
+        for stage, item in self.summary().items():
+            if item['样本数']:
+                parts.append('%s %s/%s/%s' % (stage, format_time(item['p50']), format_time(item['p99']),
+                                              format_time(item['最大值'])))
+        return '延迟(p50/p99/最大) ' + '  '.join(parts) if parts else ''
+
+    def dump(self, path):
+        '''
+        统计与原始计数追加写入文件，每次一行JSON
+        :param path:    文件路径
+        :return:        None
+        '''
+        entry = {'时间': time.strftime('%Y-%m-%d %H:%M:%S'), '统计': self.summary(),
+                 '桶边界': EDGES.tolist(), '计数': self.counts.tolist()}
+        with open(path, 'a', encoding='utf8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def reset(self):
+        '''
+        清空计数
+        :return:    None
+        '''
+        self.counts[:] = 0
+        self.maxima[:] = 0
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 22:20
+@Auth ： Ethan
+@File ：motion.py
+@IDE ：PyCharm
+"""
+import time
+import itertools
+import threading
+import numpy as np
+from concurrent.futures import Future
+from multiprocessing import Pipe
+from multiprocessing.connection import wait
+
+from hardware.latency import now
+
+
+PROGRAM_RUNNING = 2                                             # 程序状态：2 运行中，其余视为空闲
+
+
+class Motion:
+    '''
+    一次运动的完成条件
+    到位：实际关节位置（或TCP位姿）连续dwell秒都在目标的容差内
+    程序结束：发出指令后曾观察到程序运行，之后程序状态变为空闲
+    '''
+
+    def __init__(self, target, kind, tolerance, dwell):
+        '''
+        :param target:      目标，关节角（rad）或TCP位姿 [x, y, z, rx, ry, rz]
+        :param kind:        joint、pose
+        :param tolerance:   容差，joint为rad；pose为 (位置m, 姿态rad)
+        :param dwell:       保持时间，s（按机器运行时长计）
+        '''
+        self.target = np.asarray(target, dtype=np.float64)
+        self.kind = kind
+        self.field = '实际关节位置' if kind == 'joint' else '工具矢量'
+        if kind == 'joint':
+            self.tolerance = np.full(6, tolerance)
+        else:
+            self.tolerance = np.repeat(np.asarray(tolerance, dtype=np.float64), 3)
+        self.dwell = dwell
+        self.inside_since = None                                # 进入容差的机器运行时长
+        self.seen_running = False
+
+    def check(self, records):
+        '''
+        用一批帧检查是否完成
+        :param records: 结构化数组（TelemetryRing记录）
+        :return:        dict: 完成信息，未完成时返回None
+        '''
+        times = records['机器运行时长']
+        inside = np.all(np.abs(records[self.field] - self.target) <= self.tolerance, axis=1)
+        outside = np.flatnonzero(~inside)
+        if len(outside):                                        # 批内离开过容差，从最后一次离开之后重新计时
+            last = outside[-1]
+            self.inside_since = float(times[last + 1]) if last + 1 < len(times) else None
+        elif self.inside_since is None:
+            self.inside_since = float(times[0])
+        if self.inside_since is not None:
+            settled = np.flatnonzero(inside & (times - self.inside_since >= self.dwell))
+            if len(settled):
+                return self.result(records, settled[0], '到位')
+
+        running = records['程序状态'] == PROGRAM_RUNNING
+        if not self.seen_running and running.any():
+            self.seen_running = True
+            first = int(np.argmax(running))
+            running, records = running[first:], records[first:]
+        if self.seen_running:
+            idle = np.flatnonzero(~running)
+            if len(idle):
+                return self.result(records, idle[0], '程序结束')
+        return None
+
+    def result(self, records, index, reason):
+        record = records[index]
+        return {'原因': reason, '帧序号': int(record['帧序号']), '机器运行时长': float(record['机器运行时长']),
+                '接收时间': float(record['接收时间']), '位置': np.array(record[self.field], dtype=np.float64)}
+
+
+class MotionMonitor:
+    '''
+    接收进程一侧的运动检查：每发布一帧检查一次未完成的运动，完成时经管道把结果发回主进程
+    运动由MotionTracker经命令管道登记，检查前先取出已到达的命令；断流、休眠、退出时由fail通知主进程运动失败
+    '''
+
+    def __init__(self, commands, results):
+        '''
+        :param commands:    命令管道的接收端：('track', 编号, 目标, 类型, 容差, 保持时间)、('cancel', 编号)、('clear',)
+        :param results:     结果管道的发送端：(编号, 完成信息dict或异常)
+        '''
+        self.commands = commands
+        self.results = results
+        self.pending = {}                                       # 编号 -> Motion
+
+    def receive(self):
+        '''
+        取出已到达的命令，不阻塞
+        :return:    None
+        '''
+        while self.commands.poll():
+            command = self.commands.recv()
+            if command[0] == 'track':
+                self.pending[command[1]] = Motion(*command[2:])
+            elif command[0] == 'cancel':
+                self.pending.pop(command[1], None)
+            else:
+                self.pending.clear()
+
+    def check(self, telemetry, seq):
+        '''
+        刚发布的一帧，接收进程发布之后调用
+        :param telemetry:   TelemetryRing
+        :param seq:         该帧的帧序号，publish的返回值
+        :return:            None
+        '''
+        self.receive()
+        if not self.pending:
+            return
+        index = seq % telemetry.capacity
+        records = telemetry.slots[index:index + 1]              # 共享内存上的视图，单写者，此时记录已完整
+        done = []
+        for number, motion in self.pending.items():
+            result = motion.check(records)
+            if result is not None:
+                self.results.send((number, result))
+                done.append(number)
+        for number in done:
+            del self.pending[number]
+
+    def fail(self, reason):
+        '''
+        未完成的运动全部以ConnectionError结束，接收进程断流、休眠或退出时调用
+        :param reason:  原因
+        :return:        None
+        '''
+        for number in self.pending:
+            self.results.send((number, ConnectionError(reason)))
+        self.pending.clear()
+
+
+class MotionTracker:
+    '''
+    运动完成跟踪：每条运动指令返回一个concurrent.futures.Future，到位或程序结束时完成
+    完成条件由接收进程逐帧检查（MotionMonitor），主进程的后台线程阻塞在结果管道上，收到结果即完成Future，不轮询遥测
+    需在接收进程启动之前创建：monitor随接收进程传递（fork继承或spawn时序列化），MotionTracker本身只在主进程使用
+    接收进程断流、休眠或退出时，未完成的Future以ConnectionError结束
+    Future可阻塞等待result()、add_done_callback，或在asyncio中 await asyncio.wrap_future(future)
+    '''
+
+    def __init__(self, tolerance=0.001, pose_tolerance=(0.0005, 0.005), dwell=0.02):
+        '''
+        :param tolerance:       关节容差，rad
+        :param pose_tolerance:  位姿容差，(位置m, 姿态rad)
+        :param dwell:           保持时间，s
+        '''
+        self.tolerance = tolerance
+        self.pose_tolerance = pose_tolerance
+        self.dwell = dwell
+        commands, self.commands = Pipe(duplex=False)
+        self.results, results = Pipe(duplex=False)
+        self.monitor = MotionMonitor(commands, results)         # 供接收进程使用
+        self.wakeup, self.wake = Pipe(duplex=False)             # 登记、取消运动时唤醒后台线程，重新计算超时
+        self.pending = {}                                       # 编号 -> (Future, 超时的时间点)
+        self.numbers = itertools.count()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def track(self, target, kind='joint', tolerance=None, dwell=None, timeout=None):
+        '''
+        跟踪一次运动，应在发送运动指令之前调用，保证不会漏掉指令之后的帧
+        :param target:      目标，关节角（rad）或TCP位姿
+        :param kind:        joint、pose
+        :param tolerance:   容差，缺省使用构造时的设置
+        :param dwell:       保持时间，s
+        :param timeout:     超时，s，超时后Future抛出TimeoutError
+        :return:            Future: 结果为完成信息dict
+        '''
+        if tolerance is None:
+            tolerance = self.tolerance if kind == 'joint' else self.pose_tolerance
+        future = Future()
+        number = next(self.numbers)
+        with self.lock:
+            self.pending[number] = (future, None if timeout is None else time.monotonic() + timeout)
+            self.commands.send(('track', number, np.asarray(target, dtype=np.float64), kind, tolerance,
+                                self.dwell if dwell is None else dwell))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+            self.wake.send(None)
+        future.add_done_callback(lambda f: f.cancelled() and self.cancel(number))
+        return future
+
+    def cancel(self, number):
+        '''
+        Future被取消或超时后，接收进程不再检查该运动
+        :param number:  运动编号
+        :return:        None
+        '''
+        with self.lock:
+            if self.pending.pop(number, None) is not None:
+                self.commands.send(('cancel', number))
+                self.wake.send(None)
+
+    def run(self):
+        while True:
+            with self.lock:
+                deadlines = [deadline for _, deadline in self.pending.values() if deadline is not None]
+            timeout = max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+            wait([self.results, self.wakeup], timeout)          # 阻塞到有结果、有新运动或最近的超时
+            while self.wakeup.poll():
+                self.wakeup.recv()
+            while self.results.poll():
+                number, result = self.results.recv()
+                with self.lock:
+                    future, _ = self.pending.pop(number, (None, None))
+                if future is None or not future.set_running_or_notify_cancel():
+                    continue
+                if isinstance(result, Exception):                   # 接收进程断流、休眠或退出
+                    future.set_exception(result)
+                else:
+                    result['完成延迟'] = now() - result['接收时间']     # 收到完成帧到Future完成的时间
+                    future.set_result(result)
+            self.expire()
+
+    def expire(self):
+        '''
+        超时的运动以TimeoutError结束
+        :return:    None
+        '''
+        current = time.monotonic()
+        with self.lock:
+            expired = [number for number, (_, deadline) in self.pending.items()
+                       if deadline is not None and current > deadline]
+            futures = [self.pending.pop(number)[0] for number in expired]
+            for number in expired:
+                self.commands.send(('cancel', number))
+        for future in futures:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(TimeoutError('运动未在规定时间内完成'))
+
+    def stop(self):
+        '''
+        停止跟踪，未完成的运动全部取消，管道保留，重新连接后可继续使用
+        :return:    None
+        '''
+        with self.lock:
+            futures = [future for future, _ in self.pending.values()]
+            self.pending = {}
+            if futures:
+                self.commands.send(('clear',))
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 09:12
+@Auth ： Ethan
+@File ：packet.py
+@IDE ：PyCharm
+"""
+import struct
+import numpy as np
+
+
+# realtime-30003 数据包字段表：(字段名, 数量)，除数据长度外均为大端double
+FIELDS_30003 = [
+    ('总计数据长度', 1),
+    ('机器运行时长', 1),
+    ('目标关节位置', 6),
+    ('目标关节速度', 6),
+    ('目标关节加速度', 6),
+    ('目标关节电流', 6),
+    ('目标关节力矩', 6),
+    ('实际关节位置', 6),
+    ('实际关节速度', 6),
+    ('实际关节电流', 6),
+    ('关节联合电流', 6),
+    ('工具矢量', 6),
+    ('TCP实际速度', 6),
+    ('TCP一般力', 6),
+    ('工具目标矢量', 6),
+    ('工具目标速度', 6),
+    ('数字输入', 1),
+    ('电机温度', 6),
+    ('控制器实时线程执行时间', 1),
+    ('UR软件测试值', 1),
+    ('机器人模式', 1),
+    ('关节模式', 6),
+    ('安全模式', 1),
+    ('UR安全模式', 6),
+    ('机器人工具加速度', 3),
+    ('UR机器人工具加速度', 6),
+    ('轨迹限制器速度缩放', 1),
+    ('线性动量范数', 1),
+    ('UR线性动量范数', 1),
+    ('URS线性动量范数', 1),
+    ('主电压', 1),
+    ('机器人电压', 1),
+    ('机器人实际电压', 1),
+    ('关节实际电压', 6),
+    ('数字输出', 1),
+    ('程序状态', 1),
+    ('肘部位置', 3),
+    ('肘部速度', 3),
+    ('安全状态', 1),
+    ('UR安全状态1', 1),
+    ('UR安全状态2', 1),
+    ('UR安全状态3', 1),
+    ('负载质量', 1),
+    ('负载重心', 3),
+    ('负载惯量', 6),
+]
+
+# 以整数形式提供给界面的字段（位号、数据长度）
+INT_FIELDS = ('总计数据长度', '数字输入', '数字输出')
+
+# 各控制器软件版本的帧长度，新版本只在末尾追加字段，因此每种布局都是完整字段表的前缀
+FRAME_LENGTHS = (1044, 1060, 1108, 1116, 1140, 1220)
+
+# 控制器软件版本 -> 帧长度（版本号不低于该值时适用），以实际收到的帧长度为准
+VERSION_LENGTHS = [
+    ((3, 0), 1044),
+    ((3, 2), 1060),
+    ((3, 5), 1108),
+    ((3, 10), 1116),
+    ((3, 14), 1140),
+    ((5, 9), 1220),
+]
+
+
+def build_dtype(fields, byteorder='>'):
+    '''
+    根据字段表生成numpy结构化数据类型
+    :param fields:      字段表 [(字段名, 数量), ...]
+    :param byteorder:   字节序，'>'为大端（网络数据），'='为本机字节序
+    :return:            np.dtype
+    '''
+    dtype = []
+    for name, count in fields:
+        fmt = byteorder + ('i4' if name == '总计数据长度' else 'f8')
+        if count == 1:
+            dtype.append((name, fmt))
+        else:
+            dtype.append((name, fmt, (count,)))
+    return np.dtype(dtype)
+
+
+class PacketDecoder:
+    '''
+    30003数据包解码器，按字段表一次性解析整帧，返回numpy结构化记录（零拷贝视图）
+    '''
+    __slots__ = ('fields', 'names', 'dtype', 'size')
+
+    def __init__(self, fields=FIELDS_30003):
+        self.fields = list(fields)                              # 字段表
+        self.names = [name for name, _ in self.fields]          # 字段名
+        self.dtype = build_dtype(self.fields)                   # 大端结构化类型，整帧一次解析
+        self.size = self.dtype.itemsize                         # 帧长度
+
+    def decode(self, res):
+        '''
+        解析一帧数据
+        :param res:     bytes / bytearray / memoryview，长度需等于帧长度
+        :return:        np.void: 结构化记录，record['实际关节位置'] 为6维数组
+        '''
+        return np.frombuffer(res, dtype=self.dtype, count=1)[0]
+
+    def decode_many(self, res):
+        '''
+        批量解析连续的多帧数据（录制回放、离线分析）
+        :param res:     多帧拼接的字节数据
+        :return:        np.ndarray: 结构化数组，shape=(N,)
+        '''
+        return np.frombuffer(res, dtype=self.dtype, count=len(res) // self.size)
+
+    def to_dict(self, record):
+        '''
+        将记录转为与原共享字典一致的格式（数组 -> list，标量 -> float/int）
+        :param record:  decode 返回的结构化记录
+        :return:        dict
+        '''
+        ret = record.item()                                     # 一次性转为Python对象
+        data = {}
+        for name, value in zip(self.names, ret):
+            if isinstance(value, np.ndarray):
+                data[name] = value.tolist()
+            elif name in INT_FIELDS:
+                data[name] = int(value)
+            else:
+                data[name] = value
+        return data
+
+
+def field_structs(fields):
+    '''
+    为每个字段生成单独的解析器
+    :param fields:  字段表
+    :return:        dict: 字段名 -> (偏移, struct.Struct)
+    '''
+    structs = {}
+    offset = 0
+    for name, count in fields:
+        unpacker = struct.Struct('>%d%s' % (count, 'i' if name == '总计数据长度' else 'd'))
+        structs[name] = (offset, unpacker)
+        offset += unpacker.size
+    return structs
+
+
+class FieldSubscription:
+    '''
+    字段订阅：消费者声明需要的字段，只解析这些字段
+    按字段偏移生成一个struct.Struct，未订阅的字段用填充字节跳过，一次unpack_from得到全部所需字段
+    '''
+    __slots__ = ('names', 'struct', 'slices', 'size')
+
+    def __init__(self, names, fields=FIELDS_30003):
+        '''
+        :param names:   需要的字段名，decode按此顺序返回
+        :param fields:  字段表
+        '''
+        structs = field_structs(fields)
+        counts = dict(fields)
+        self.names = list(names)
+        self.size = sum(unpacker.size for _, unpacker in structs.values())
+        layout = sorted((structs[name][0], name) for name in set(self.names))
+        fmt = '>'
+        position = 0                                            # 当前解析到的字节位置
+        index = 0                                               # 当前字段在结果元组中的位置
+        spans = {}
+        for offset, name in layout:
+            unpacker = structs[name][1]
+            if offset > position:
+                fmt += '%dx' % (offset - position)
+            fmt += unpacker.format.lstrip('>')
+            count = counts[name]
+            spans[name] = (index, count)
+            position = offset + unpacker.size
+            index += count
+        self.struct = struct.Struct(fmt)
+        # 结果元组中各字段的切片，标量字段直接取值
+        self.slices = [spans[name][0] if spans[name][1] == 1 else slice(spans[name][0], sum(spans[name]))
+                       for name in self.names]
+
+    def decode(self, buffer, offset=0):
+        '''
+        解析订阅的字段
+        :param buffer:  一帧数据，或包含一帧数据的缓冲区
+        :param offset:  帧在缓冲区中的起始位置
+        :return:        tuple: 按订阅顺序排列的字段值，多值字段为tuple
+        '''
+        values = self.struct.unpack_from(buffer, offset)
+        return tuple([values[i] for i in self.slices])
+
+
+class LazyFrame:
+    '''
+    惰性解析的帧：访问某个字段时才从原始数据中解析该字段
+    '''
+    __slots__ = ('buffer', 'offset', 'cache')
+
+    structs = field_structs(FIELDS_30003)                       # 字段名 -> (偏移, struct.Struct)，各实例共用
+
+    def __init__(self, buffer, offset=0):
+        '''
+        :param buffer:  一帧数据，或包含一帧数据的缓冲区（在使用期间不能被覆盖）
+        :param offset:  帧在缓冲区中的起始位置
+        '''
+        self.buffer = buffer
+        self.offset = offset
+        self.cache = {}
+
+    def __getitem__(self, name):
+        if name not in self.cache:
+            offset, unpacker = self.structs[name]
+            values = unpacker.unpack_from(self.buffer, self.offset + offset)
+            self.cache[name] = values[0] if len(values) == 1 else values
+        return self.cache[name]
+
+
+def layout_fields(length, fields=FIELDS_30003):
+    '''
+    截取帧长度对应的字段表前缀
+    :param length:  帧长度
+    :param fields:  完整字段表
+    :return:        list: 字段表
+    '''
+    size = 0
+    for i, (name, count) in enumerate(fields):
+        if size == length:
+            return list(fields[:i])
+        size += 4 if name == '总计数据长度' else count * 8
+    if size == length:
+        return list(fields)
+    raise ValueError('帧长度%s与字段表不对应' % length)
+
+
+# 布局注册表：帧长度 -> 解码器，启动时一次性生成，接收循环中不再查找
+DECODERS = {length: PacketDecoder(layout_fields(length)) for length in FRAME_LENGTHS}
+
+
+def decoder_for_version(version):
+    '''
+    根据控制器软件版本选择解码器
+    :param version: 版本号字符串，如 "3.15.7" 或 Dashboard PolyscopeVersion 的返回值 "URSoftware 5.11.1.108318 (...)"
+    :return:        PacketDecoder
+    '''
+    number = [word for word in version.replace('(', ' ').split() if word[:1].isdigit()][0]
+    key = tuple(int(i) for i in number.split('.')[:2])
+    length = VERSION_LENGTHS[0][1]
+    for start, size in VERSION_LENGTHS:
+        if key >= start:
+            length = size
+    return DECODERS[length]
@@ -0,0 +1,371 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 23:00
+@Auth ： Ethan
+@File ：primary.py
+@IDE ：PyCharm
+"""
+import time
+import socket
+import struct
+from operator import itemgetter
+from multiprocessing import Process
+
+from hardware.packet import FIELDS_30003, field_structs
+from hardware.latency import now
+from hardware.watchdog import ReceiverWatchdog
+
+
+MESSAGE_HEADER = struct.Struct('>iB')                           # 消息/子包头：长度（含头部）、类型
+MESSAGE_ROBOT_STATE = 16                                        # 机器人状态消息，由若干子包组成
+PRIMARY_RATE = 10                                               # 机器人状态消息的发送频率，Hz
+
+
+def program_state(running, paused):
+    # 与30003的程序状态一致：1 停止，2 运行，4 暂停
+    return 4.0 if paused else (2.0 if running else 1.0)
+
+
+# 子包定义：类型 -> (名称, 格式, 输出)
+# 格式只包含各版本共有的前缀，子包更长时多出的部分跳过，更短时（旧版本）整个子包跳过
+# 输出为 (记录字段, 取值位置, 换算)，换算为比例系数或函数（参数为各取值位置的值）
+JOINT = 'dddffffB'                                              # 每个关节：实际位置、目标位置、实际速度、电流、电压、电机温度、微处理器温度、关节模式
+SUBPACKAGES = {
+    0: ('机器人模式', '>QBBBBBBBBBddd', [
+        ('机器运行时长', [0], 1e-6),
+        ('急停', [4], 1),
+        ('保护性停止', [5], 1),
+        ('程序运行中', [6], 1),
+        ('程序暂停', [7], 1),
+        ('程序状态', [6, 7], program_state),
+        ('机器人模式', [8], 1),
+        ('控制模式', [9], 1),
+        ('目标速度比例', [10], 1),
+        ('轨迹限制器速度缩放', [11], 1),
+    ]),
+    1: ('关节数据', '>' + JOINT * 6, [
+        ('实际关节位置', [j * 8 for j in range(6)], 1),
+        ('目标关节位置', [j * 8 + 1 for j in range(6)], 1),
+        ('实际关节速度', [j * 8 + 2 for j in range(6)], 1),
+        ('实际关节电流', [j * 8 + 3 for j in range(6)], 1),
+        ('关节实际电压', [j * 8 + 4 for j in range(6)], 1),
+        ('电机温度', [j * 8 + 5 for j in range(6)], 1),
+        ('关节微处理器温度', [j * 8 + 6 for j in range(6)], 1),
+        ('关节模式', [j * 8 + 7 for j in range(6)], 1),
+    ]),
+    2: ('工具数据', '>bbddfBffB', [
+        ('工具模拟输入', [2, 3], 1),
+        ('工具电压', [4], 1),
+        ('工具输出电压', [5], 1),
+        ('工具电流', [6], 1),
+        ('工具温度', [7], 1),
+        ('工具模式', [8], 1),
+    ]),
+    3: ('主板数据', '>iibbddbbddffffBB', [
+        ('数字输入', [0], 1),
+        ('数字输出', [1], 1),
+        ('模拟输入', [4, 5], 1),
+        ('模拟输出', [8, 9], 1),
+        ('主板温度', [10], 1),
+        ('机器人电压', [11], 1),
+        ('机器人实际电压', [12], 1),                             # 30003字段表中机器人电流的字段名
+        ('主板IO电流', [13], 1),
+        ('安全模式', [14], 1),
+        ('缩减模式', [15], 1),
+    ]),
+    4: ('笛卡尔信息', '>12d', [
+        ('工具矢量', list(range(6)), 1),
+        ('TCP偏移', list(range(6, 12)), 1),
+    ]),
+    5: ('运动学信息', '>6I24dI', [
+        ('标定DH_theta', list(range(6, 12)), 1),
+        ('标定DH_a', list(range(12, 18)), 1),
+        ('标定DH_d', list(range(18, 24)), 1),
+        ('标定DH_alpha', list(range(24, 30)), 1),
+    ]),
+}
+SUBPACKAGE_TYPES = {name: number for number, (name, _, _) in SUBPACKAGES.items()}
+
+# 30003中没有的字段，追加在30003字段表之后：TelemetryRing(fields=FIELDS_30003 + FIELDS_PRIMARY)
+FIELDS_PRIMARY = [
+    ('急停', 1),
+    ('保护性停止', 1),
+    ('程序运行中', 1),
+    ('程序暂停', 1),
+    ('控制模式', 1),
+    ('目标速度比例', 1),
+    ('关节微处理器温度', 6),
+    ('工具模拟输入', 2),
+    ('工具电压', 1),
+    ('工具输出电压', 1),
+    ('工具电流', 1),
+    ('工具温度', 1),
+    ('工具模式', 1),
+    ('模拟输入', 2),
+    ('模拟输出', 2),
+    ('主板温度', 1),
+    ('主板IO电流', 1),
+    ('缩减模式', 1),
+    ('TCP偏移', 6),
+    ('标定DH_theta', 6),
+    ('标定DH_a', 6),
+    ('标定DH_d', 6),
+    ('标定DH_alpha', 6),
+]
+
+
+class SubpackageDecoder:
+    '''
+    单个子包的解析器：一个struct从接收缓冲区原地解析子包，再按记录布局写入
+    写入按记录中连续的字段分段，每段一个struct（填充字节会覆盖其他子包写入的字段，因此不跨段填充）
+    记录中没有的字段（如未追加FIELDS_PRIMARY）不写入
+    '''
+    __slots__ = ('input', 'outputs', 'pick', 'fixups')
+
+    def __init__(self, number, structs):
+        '''
+        :param number:  子包类型
+        :param structs: 记录的字段解析器，field_structs的返回值
+        '''
+        _, fmt, outputs = SUBPACKAGES[number]
+        self.input = struct.Struct(fmt)
+        layout = sorted((structs[field][0], field, positions, convert)
+                        for field, positions, convert in outputs if field in structs)
+        runs = []                                               # [起始偏移, 格式, 取值个数]
+        position = None
+        order = []                                              # 写入顺序对应的取值位置
+        self.fixups = []                                        # 需要换算的值：(写入位置, 取值位置, 换算)
+        for offset, field, positions, convert in layout:
+            unpacker = structs[field][1]
+            if offset != position:
+                runs.append([offset, '>', 0])
+            runs[-1][1] += unpacker.format.lstrip('>')
+            position = offset + unpacker.size
+            if callable(convert):
+                self.fixups.append((len(order), tuple(positions), convert))
+                order.append(positions[0])
+            else:
+                if convert != 1:
+                    self.fixups.extend((len(order) + k, i, convert) for k, i in enumerate(positions))
+                order.extend(positions)
+            runs[-1][2] = len(order)
+        self.pick = itemgetter(*order) if order else None
+        self.outputs = []                                       # (起始偏移, struct.Struct, 取值起始, 取值结束)
+        start = 0
+        for offset, run, end in runs:
+            self.outputs.append((offset, struct.Struct(run), start, end))
+            start = end
+
+    def decode_into(self, buffer, offset, record):
+        '''
+        :param buffer:  接收缓冲区
+        :param offset:  子包内容（不含子包头）在缓冲区中的位置
+        :param record:  记录缓冲区（bytearray）
+        :return:        None
+        '''
+        if self.pick is None:
+            return
+        values = self.input.unpack_from(buffer, offset)
+        out = self.pick(values)
+        if self.fixups:
+            out = list(out)
+            for position, index, convert in self.fixups:
+                out[position] = convert(*[values[i] for i in index]) if callable(convert) else values[index] * convert
+        if len(self.outputs) == 1:
+            position, packer, _, _ = self.outputs[0]
+            packer.pack_into(record, position, *out)
+            return
+        for position, packer, start, end in self.outputs:
+            packer.pack_into(record, position, *out[start:end])
+
+
+class PrimaryParser:
+    '''
+    主/副接口（30001/30002）增量解析：数据按到达顺序送入，凑齐一条消息即解析
+    机器人状态消息由若干变长子包组成，只解析订阅的子包类型，其余按子包头的长度直接跳过
+    子包在接收缓冲区上原地解析（unpack_from），不做切片拷贝
+    '''
+
+    def __init__(self, subpackages=None, fields=FIELDS_30003, buffer_size=65536):
+        '''
+        :param subpackages: 订阅的子包名称（见SUBPACKAGES），缺省为全部
+        :param fields:      记录的字段表，与TelemetryRing一致
+        :param buffer_size: 接收缓冲区大小
+        '''
+        structs = field_structs(fields)
+        names = subpackages or [name for name, _, _ in SUBPACKAGES.values()]
+        unknown = [name for name in names if name not in SUBPACKAGE_TYPES]
+        if unknown:
+            raise ValueError('未知的子包类型：%s' % ', '.join(unknown))
+        self.decoders = {SUBPACKAGE_TYPES[name]: SubpackageDecoder(SUBPACKAGE_TYPES[name], structs)
+                         for name in names}
+        self.size = max(offset + unpacker.size for offset, unpacker in structs.values())
+        self.record = bytearray(self.size)                      # 最新状态，各子包只更新自己的字段
+        struct.pack_into('>i', self.record, 0, self.size)
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.start_pos = 0                                      # 未处理数据的起始位置
+        self.end_pos = 0                                        # 未处理数据的结束位置
+        self.messages = 0                                       # 解析的机器人状态消息数
+        self.skipped = 0                                        # 跳过的子包数（未订阅或长度不足）
+
+    def writable(self):
+        '''
+        接收缓冲区中可写入的部分，用于 sock.recv_into(parser.writable())
+        :return:    memoryview
+        '''
+        if self.start_pos and self.end_pos > len(self.buffer) // 2:     # 剩余数据移到开头
+            available = self.end_pos - self.start_pos
+            self.buffer[:available] = self.buffer[self.start_pos:self.end_pos]
+            self.start_pos, self.end_pos = 0, available
+        if self.end_pos == len(self.buffer):                    # 单条消息超过缓冲区，扩大
+            buffer = bytearray(len(self.buffer) * 2)            # 已导出memoryview的bytearray不能改变大小，换新缓冲区
+            buffer[:self.end_pos] = self.buffer[:self.end_pos]
+            self.buffer = buffer
+            self.view = memoryview(buffer)
+        return self.view[self.end_pos:]
+
+    def written(self, n):
+        '''
+        :param n:   recv_into写入的字节数
+        :return:    int: 本次解析出的机器人状态消息数
+        '''
+        self.end_pos += n
+        return self.parse()
+
+    def feed(self, data):
+        '''
+        送入一段数据（录制回放、测试）
+        :param data:    bytes
+        :return:        int: 本次解析出的机器人状态消息数
+        '''
+        count = 0
+        data = memoryview(data)
+        while len(data):
+            target = self.writable()
+            n = min(len(target), len(data))
+            target[:n] = data[:n]
+            data = data[n:]
+            count += self.written(n)
+        return count
+
+    def parse(self):
+        '''
+        解析缓冲区中完整的消息
+        :return:    int: 解析的机器人状态消息数
+        '''
+        count = 0
+        buffer = self.buffer
+        while self.end_pos - self.start_pos >= MESSAGE_HEADER.size:
+            size, message_type = MESSAGE_HEADER.unpack_from(buffer, self.start_pos)
+            if size < MESSAGE_HEADER.size:
+                raise ValueError('主/副接口消息长度错误：%d' % size)
+            end = self.start_pos + size
+            if end > self.end_pos:
+                break                                           # 消息不完整，等待更多数据
+            if message_type == MESSAGE_ROBOT_STATE:
+                self.parse_state(self.start_pos + MESSAGE_HEADER.size, end)
+                count += 1
+            self.start_pos = end
+        if self.start_pos == self.end_pos:
+            self.start_pos = self.end_pos = 0
+        self.messages += count
+        return count
+
+    def parse_state(self, position, end):
+        '''
+        解析一条机器人状态消息中的子包
+        :param position:    第一个子包的位置
+        :param end:         消息结束位置
+        :return:            None
+        '''
+        decoders = self.decoders
+        while position + MESSAGE_HEADER.size <= end:
+            size, number = MESSAGE_HEADER.unpack_from(self.buffer, position)
+            if size < MESSAGE_HEADER.size:
+                break
+            decoder = decoders.get(number)
+            if decoder is not None and size - MESSAGE_HEADER.size >= decoder.input.size:
+                decoder.decode_into(self.buffer, position + MESSAGE_HEADER.size, self.record)
+            else:
+                self.skipped += 1
+            position += size
+
+
+class PrimaryReceiver(Process):
+    '''
+    主/副接口数据接收进程，可替代UR5的30003接收：结果按30003布局发布到同一个TelemetryRing
+    TelemetryRing按 FIELDS_30003 + FIELDS_PRIMARY 创建时，30003中没有的数据（工具、主板模拟量、标定DH参数等）一并保存
+    '''
+
+    def __init__(self, config, telemetry, event, UR5_process_control):
+        '''
+        :param config:              配置，使用UR_IP、primary_port、primary_subpackages
+        :param telemetry:           TelemetryRing
+        :param event:               数据接收状态（正常、休眠）
+        :param UR5_process_control: 控制进程状态，Process_flag
+        '''
+        super(PrimaryReceiver, self).__init__()
+        self.config = config
+        self.telemetry = telemetry
+        self.event = event
+        self.UR5_process_control = UR5_process_control
+        self.subpackages = config.get('primary_subpackages') or None
+        PrimaryParser(self.subpackages, telemetry.fields)      # 在主进程中检查配置
+
+    def connect(self, timeout=None):
+        '''
+        连接主/副接口
+        :param timeout: 接收超时，s
+        :return:        socket
+        '''
+        sock = socket.create_connection((self.config['UR_IP'], self.config.get('primary_port', 30002)), 2.0)
+        sock.settimeout(timeout)
+        return sock
+
+    def cancelled(self):
+        '''
+        进程被要求退出或进入休眠
+        :return:    bool
+        '''
+        return not self.UR5_process_control['Process_flag'] or self.event.is_set()
+
+    def run(self):
+        '''
+        接收机器人状态消息并发布
+        接收超时（watchdog_timeout，不小于3个消息周期）或连接异常时由看门狗标记数据陈旧，并按指数退避自动重连
+        :return:    None
+        '''
+        watchdog = ReceiverWatchdog(self.telemetry, PRIMARY_RATE, self.config.get('watchdog_timeout', 0.1),
+                                    self.config.get('reconnect_backoff', 0.05),
+                                    self.config.get('reconnect_max_backoff', 2.0))
+        connect = lambda: self.connect(watchdog.timeout)
+        sock = parser = None
+        while self.UR5_process_control['Process_flag']:
+            if self.event.is_set():                             # 休眠时断开
+                if sock is not None:
+                    sock.close()
+                    sock = parser = None
+                time.sleep(0.2)
+                continue
+            try:
+                if sock is None:
+                    sock = connect()
+                if parser is None:                              # 每次连接从消息边界重新解析
+                    parser = PrimaryParser(self.subpackages, self.telemetry.fields)
+                n = sock.recv_into(parser.writable())
+                if n == 0:
+                    raise ConnectionError('主/副接口连接已断开')
+            except OSError:                                     # 连接失败、接收超时、连接断开或被重置
+                watchdog.stalled()
+                if sock is not None:
+                    sock.close()
+                sock = watchdog.reconnect(connect, self.cancelled)
+                parser = None
+                continue
+            received = now()
+            if parser.written(n):
+                self.telemetry.publish(parser.record, received)
+                watchdog.frame(parser.record, received)
+        if sock is not None:
+            sock.close()
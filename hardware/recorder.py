@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 13:10
+@Auth ： Ethan
+@File ：recorder.py
+@IDE ：PyCharm
+"""
+import os
+import json
+import zlib
+import queue
+import threading
+import numpy as np
+
+from hardware.packet import DECODERS
+
+
+class TelemetryRecorder:
+    '''
+    30003原始帧录制，只追加写入
+    接收循环中只把帧拷贝进预分配的块缓冲区，写满一块后交给写入线程落盘，不阻塞接收
+    每块一个文件：未压缩时为定长帧直接拼接，可用np.memmap直接映射；压缩时为zlib
+    写入线程同时从块中提取机器运行时长，生成稀疏时间索引，按时间段查询时只读取相关的块
+    机器运行时长在控制器重启后从0开始，每次连接为一个会话，索引按会话区分，查询时不会混入其他会话的帧
+    '''
+
+    def __init__(self, directory, frame_size=1220, chunk_frames=30000, index_step=250, compress=False):
+        '''
+        :param directory:       录制文件目录
+        :param frame_size:      帧长度
+        :param chunk_frames:    每块的帧数，500Hz下30000帧为1分钟
+        :param index_step:      稀疏索引间隔，每隔多少帧记录一次时间
+        :param compress:        是否用zlib压缩块文件
+        '''
+        self.directory = directory
+        self.frame_size = frame_size
+        self.chunk_frames = chunk_frames
+        self.index_step = index_step
+        self.compress = compress
+        os.makedirs(directory, exist_ok=True)
+
+        index = read_index(directory)
+        self.chunk_id = len(index)                              # 接着已有的块继续编号
+        self.session = max((entry.get('会话', 0) for entry in index), default=-1) + 1   # 本次连接的会话编号
+        self.free = queue.Queue()                               # 空闲的块缓冲区
+        for _ in range(3):
+            self.free.put(bytearray(frame_size * chunk_frames))
+        self.buffer = self.free.get()                           # 当前写入的块缓冲区
+        self.count = 0                                          # 当前块中的帧数
+        self.overflows = 0                                      # 写入线程跟不上时临时申请缓冲区的次数
+
+        self.tasks = queue.Queue()                              # 待落盘的块
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+
+    def append(self, frame):
+        '''
+        追加一帧，在接收循环中调用
+        :param frame:   一帧原始数据（bytes / memoryview），长度等于frame_size
+        :return:        None
+        '''
+        start = self.count * self.frame_size
+        self.buffer[start:start + self.frame_size] = frame
+        self.count += 1
+        if self.count == self.chunk_frames:
+            self.rotate()
+
+    def rotate(self):
+        '''
+        当前块交给写入线程，换上空闲缓冲区
+        :return:    None
+        '''
+        if self.count == 0:
+            return
+        self.tasks.put((self.chunk_id, self.buffer, self.count, self.frame_size, self.session))
+        self.chunk_id += 1
+        self.count = 0
+        try:
+            self.buffer = self.free.get_nowait()
+        except queue.Empty:
+            self.overflows += 1
+            self.buffer = bytearray(self.frame_size * self.chunk_frames)
+
+    def new_session(self):
+        '''
+        重新连接后开始新的会话，当前块先落盘，之后的帧属于新会话
+        :return:    None
+        '''
+        self.rotate()
+        self.session += 1
+
+    def set_frame_size(self, frame_size):
+        '''
+        重新连接后控制器布局可能变化，帧长度变化时先落盘当前块
+        :param frame_size:  帧长度
+        :return:            None
+        '''
+        if frame_size != self.frame_size:
+            self.rotate()
+            self.frame_size = frame_size
+            while not self.free.empty():                        # 按新的帧长度重新分配缓冲区
+                self.free.get_nowait()
+            for _ in range(2):
+                self.free.put(bytearray(frame_size * self.chunk_frames))
+            self.buffer = bytearray(frame_size * self.chunk_frames)
+
+    def write_loop(self):
+        '''
+        写入线程：块文件落盘、生成稀疏索引
+        :return:    None
+        '''
+        while True:
+            task = self.tasks.get()
+            if task is None:
+                break
+            chunk_id, buffer, count, frame_size, session = task
+            data = memoryview(buffer)[:count * frame_size]
+            frames = np.frombuffer(data, dtype=np.uint8).reshape(count, frame_size)
+            times = frames[:, 4:12].copy().view('>f8')[:, 0]     # 机器运行时长
+
+            name = 'chunk_%06d.bin' % chunk_id
+            with open(os.path.join(self.directory, name), 'wb') as f:
+                f.write(zlib.compress(data, 1) if self.compress else data)
+            np.save(os.path.join(self.directory, 'chunk_%06d.idx.npy' % chunk_id), times[::self.index_step])
+
+            entry = {'块': chunk_id, '会话': session, '文件': name, '帧长度': frame_size, '帧数': count, '压缩': self.compress,
+                     '开始时间': float(times[0]), '结束时间': float(times[-1]), '索引间隔': self.index_step}
+            with open(os.path.join(self.directory, 'index.jsonl'), 'a', encoding='utf8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+            if len(buffer) == self.frame_size * self.chunk_frames:
+                self.free.put(buffer)                           # 缓冲区回收
+
+    def close(self):
+        '''
+        落盘未写满的块，结束写入线程
+        :return:    None
+        '''
+        self.rotate()
+        self.tasks.put(None)
+        self.writer.join()
+
+
+def read_index(directory):
+    '''
+    读取录制目录的块索引
+    :param directory:   录制文件目录
+    :return:            list: 每块的索引信息
+    '''
+    path = os.path.join(directory, 'index.jsonl')
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r', encoding='utf8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class TelemetryReader:
+    '''
+    读取TelemetryRecorder录制的数据，按机器运行时长查询
+    '''
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.index = read_index(directory)
+        for entry in self.index:
+            entry.setdefault('会话', 0)                          # 旧录制没有会话编号，视为同一会话
+
+    def sessions(self):
+        '''
+        录制中的各会话及其时间范围
+        :return:    dict: 会话编号 -> (开始时间, 结束时间, 帧数)
+        '''
+        result = {}
+        for entry in self.index:
+            start, end, count = result.get(entry['会话'], (np.inf, -np.inf, 0))
+            result[entry['会话']] = (min(start, entry['开始时间']), max(end, entry['结束时间']), count + entry['帧数'])
+        return result
+
+    def load_chunk(self, entry):
+        '''
+        读取一块的原始帧，未压缩的块直接内存映射
+        :param entry:   块索引信息
+        :return:        np.ndarray: uint8 shape=(帧数, 帧长度)
+        '''
+        path = os.path.join(self.directory, entry['文件'])
+        shape = (entry['帧数'], entry['帧长度'])
+        if entry['压缩']:
+            with open(path, 'rb') as f:
+                return np.frombuffer(zlib.decompress(f.read()), dtype=np.uint8).reshape(shape)
+        return np.memmap(path, dtype=np.uint8, mode='r', shape=shape)
+
+    def query(self, start, end, raw=False, session=None):
+        '''
+        查询某个会话中机器运行时长在 [start, end] 之间的帧
+        先按块的起止时间筛选，再用稀疏索引确定块内的帧范围，只读取需要的部分
+        :param start:   开始时间，s
+        :param end:     结束时间，s
+        :param raw:     True -> 返回原始帧     False -> 返回解析后的结构化数组
+        :param session: 会话编号，缺省为最后一个会话，见sessions()
+        :return:        np.ndarray
+        '''
+        if session is None and self.index:
+            session = self.index[-1]['会话']
+        parts = []
+        frame_size = None
+        for entry in self.index:
+            if entry['会话'] != session or entry['结束时间'] < start or entry['开始时间'] > end:
+                continue
+            if frame_size is not None and entry['帧长度'] != frame_size:
+                raise ValueError('查询范围内的帧长度不一致')
+            frame_size = entry['帧长度']
+
+            sparse = np.load(os.path.join(self.directory, entry['文件'].replace('.bin', '.idx.npy')))
+            step = entry['索引间隔']
+            lo = max(np.searchsorted(sparse, start, side='right') - 1, 0) * step
+            hi = min(np.searchsorted(sparse, end, side='right') * step, entry['帧数'])
+
+            frames = self.load_chunk(entry)[lo:hi]
+            times = frames[:, 4:12].copy().view('>f8')[:, 0]
+            parts.append(frames[(times >= start) & (times <= end)])
+
+        if not parts:
+            return np.empty((0,), dtype=np.uint8 if raw else DECODERS[max(DECODERS)].dtype)
+        frames = np.ascontiguousarray(np.concatenate(parts))
+        if raw:
+            return frames
+        return DECODERS[frame_size].decode_many(frames.tobytes())
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 21:40
+@Auth ： Ethan
+@File ：rtde.py
+@IDE ：PyCharm
+"""
+import time
+import socket
+import struct
+from operator import itemgetter
+from multiprocessing import Process
+
+from hardware.packet import FIELDS_30003, field_structs
+from hardware.latency import now
+from hardware.watchdog import ReceiverWatchdog
+
+
+# RTDE消息类型
+RTDE_REQUEST_PROTOCOL_VERSION = 86          # 'V'
+RTDE_GET_URCONTROL_VERSION = 118            # 'v'
+RTDE_TEXT_MESSAGE = 77                      # 'M'
+RTDE_DATA_PACKAGE = 85                      # 'U'
+RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS = 79     # 'O'
+RTDE_CONTROL_PACKAGE_START = 83             # 'S'
+RTDE_CONTROL_PACKAGE_PAUSE = 80             # 'P'
+
+HEADER = struct.Struct('>HB')               # 消息长度（含头部）、消息类型
+
+# RTDE数据类型 -> struct格式
+RTDE_TYPES = {
+    'BOOL': '?', 'UINT8': 'B', 'UINT32': 'I', 'UINT64': 'Q', 'INT32': 'i', 'DOUBLE': 'd',
+    'VECTOR3D': '3d', 'VECTOR6D': '6d', 'VECTOR6INT32': '6i', 'VECTOR6UINT32': '6I',
+}
+
+# RTDE输出变量 -> (类型, 30003数据包字段)，接收结果写入同一遥测结构，界面无需区分数据来源
+RTDE_OUTPUTS = {
+    'timestamp': ('DOUBLE', '机器运行时长'),
+    'target_q': ('VECTOR6D', '目标关节位置'),
+    'target_qd': ('VECTOR6D', '目标关节速度'),
+    'target_qdd': ('VECTOR6D', '目标关节加速度'),
+    'target_current': ('VECTOR6D', '目标关节电流'),
+    'target_moment': ('VECTOR6D', '目标关节力矩'),
+    'actual_q': ('VECTOR6D', '实际关节位置'),
+    'actual_qd': ('VECTOR6D', '实际关节速度'),
+    'actual_current': ('VECTOR6D', '实际关节电流'),
+    'joint_control_output': ('VECTOR6D', '关节联合电流'),
+    'actual_TCP_pose': ('VECTOR6D', '工具矢量'),
+    'actual_TCP_speed': ('VECTOR6D', 'TCP实际速度'),
+    'actual_TCP_force': ('VECTOR6D', 'TCP一般力'),
+    'target_TCP_pose': ('VECTOR6D', '工具目标矢量'),
+    'target_TCP_speed': ('VECTOR6D', '工具目标速度'),
+    'actual_digital_input_bits': ('UINT64', '数字输入'),
+    'joint_temperatures': ('VECTOR6D', '电机温度'),
+    'actual_execution_time': ('DOUBLE', '控制器实时线程执行时间'),
+    'robot_mode': ('INT32', '机器人模式'),
+    'joint_mode': ('VECTOR6INT32', '关节模式'),
+    'safety_mode': ('INT32', '安全模式'),
+    'actual_tool_accelerometer': ('VECTOR3D', '机器人工具加速度'),
+    'speed_scaling': ('DOUBLE', '轨迹限制器速度缩放'),
+    'actual_momentum': ('DOUBLE', '线性动量范数'),
+    'actual_main_voltage': ('DOUBLE', '主电压'),
+    'actual_robot_voltage': ('DOUBLE', '机器人电压'),
+    'actual_robot_current': ('DOUBLE', '机器人实际电压'),
+    'actual_joint_voltage': ('VECTOR6D', '关节实际电压'),
+    'actual_digital_output_bits': ('UINT64', '数字输出'),
+    'runtime_state': ('UINT32', '程序状态'),
+    'elbow_position': ('VECTOR3D', '肘部位置'),
+    'elbow_velocity': ('VECTOR3D', '肘部速度'),
+    'safety_status': ('INT32', '安全状态'),
+    'payload': ('DOUBLE', '负载质量'),
+    'payload_cog': ('VECTOR3D', '负载重心'),
+    'payload_inertia': ('VECTOR6D', '负载惯量'),
+}
+FIELD_VARIABLES = {field: variable for variable, (_, field) in RTDE_OUTPUTS.items()}
+
+
+class RecipeDecoder:
+    '''
+    按输出配方生成的解析器：一个struct解析RTDE数据包，另一个struct按30003布局写入记录
+    写入用的struct只包含配方中的字段，字段之间用填充字节跳过，一次pack_into完成整条记录
+    publish直接写入共享内存中的记录，不经过整条30003记录的中间缓冲区
+    '''
+
+    def __init__(self, variables, types, fields=FIELDS_30003):
+        '''
+        :param variables:   配方中的输出变量名，需在RTDE_OUTPUTS中
+        :param types:       控制器返回的变量类型
+        :param fields:      记录的字段表
+        '''
+        self.input = struct.Struct('>B' + ''.join(RTDE_TYPES[t] for t in types))     # 配方号 + 各变量
+        structs = field_structs(fields)
+        self.size = max(offset + packer.size for offset, packer in structs.values())   # 记录长度
+
+        # 变量在解析结果中的位置（跳过配方号）
+        positions = {}
+        index = 1
+        self.runtime_offset = None                              # 机器运行时长在数据包中的字节位置，供看门狗读取
+        offset = 1
+        for variable, rtde_type in zip(variables, types):
+            count = int(RTDE_TYPES[rtde_type][:-1] or 1)
+            positions[RTDE_OUTPUTS[variable][1]] = list(range(index, index + count))
+            if RTDE_OUTPUTS[variable][1] == '机器运行时长':
+                self.runtime_offset = offset
+            index += count
+            offset += struct.calcsize('>' + RTDE_TYPES[rtde_type])
+
+        # 按记录中的偏移排列，生成写入格式与取值顺序
+        layout = sorted((structs[name][0], name) for name in positions)
+        fmt = '>i'                                              # 总计数据长度
+        position = 4
+        self.order = []
+        for offset, name in layout:
+            packer = structs[name][1]
+            if offset > position:
+                fmt += '%dx' % (offset - position)
+            fmt += packer.format.lstrip('>')
+            position = offset + packer.size
+            self.order.extend(positions[name])
+        self.output = struct.Struct(fmt)
+        self.pick = itemgetter(*self.order) if len(self.order) > 1 else lambda values: (values[self.order[0]],)
+
+    def decode_into(self, package, record):
+        '''
+        RTDE数据包写入记录
+        :param package: 数据包（不含消息头）
+        :param record:  记录缓冲区（bytearray），按30003布局
+        :return:        None
+        '''
+        values = self.input.unpack_from(package)
+        self.output.pack_into(record, 0, self.size, *self.pick(values))
+
+    def publish(self, package, telemetry, stamp):
+        '''
+        RTDE数据包直接写入遥测共享内存
+        :param package:     数据包（不含消息头）
+        :param telemetry:   TelemetryRing
+        :param stamp:       接收时间
+        :return:            int: 帧序号
+        '''
+        return telemetry.publish_packed(self.output, (self.size,) + self.pick(self.input.unpack_from(package)), stamp)
+
+
+class RTDEClient:
+    '''
+    RTDE-30004客户端（协议版本2），只订阅需要的输出变量，控制器按设定频率只发送这些变量
+    '''
+
+    def __init__(self, host, port=30004, timeout=2.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.sock = None
+        self.buffer = bytearray(65536)                          # 接收缓冲区
+        self.view = memoryview(self.buffer)
+        self.start_pos = 0                                      # 未处理数据的起始位置
+        self.end_pos = 0                                        # 未处理数据的结束位置
+        self.recipe = None                                      # 配方号
+        self.bytes_received = 0
+
+    def connect(self):
+        '''
+        建立连接并协商协议版本
+        :return:    None
+        '''
+        self.sock = socket.create_connection((self.host, self.port), self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.start_pos = self.end_pos = 0
+        reply = self.request(RTDE_REQUEST_PROTOCOL_VERSION, struct.pack('>H', 2))
+        if not reply[0]:
+            raise ConnectionError('控制器不支持RTDE协议版本2')
+
+    def send(self, message_type, payload=b''):
+        self.sock.sendall(HEADER.pack(HEADER.size + len(payload), message_type) + payload)
+
+    def receive(self):
+        '''
+        读取一条消息
+        :return:    (int, memoryview): 消息类型、消息内容（下次receive前有效）
+        '''
+        while True:
+            available = self.end_pos - self.start_pos
+            if available >= HEADER.size:
+                size, message_type = HEADER.unpack_from(self.buffer, self.start_pos)
+                if available >= size:
+                    payload = self.view[self.start_pos + HEADER.size:self.start_pos + size]
+                    self.start_pos += size
+                    return message_type, payload
+            if self.end_pos == len(self.buffer):                # 缓冲区尾部不够，剩余数据移到开头
+                self.buffer[:available] = self.buffer[self.start_pos:self.end_pos]
+                self.start_pos, self.end_pos = 0, available
+            n = self.sock.recv_into(self.view[self.end_pos:])
+            if n == 0:
+                raise ConnectionError('RTDE连接已断开')
+            self.end_pos += n
+            self.bytes_received += n
+
+    def request(self, message_type, payload=b''):
+        '''
+        发送请求并等待同类型的应答，期间的文本消息、数据包忽略
+        :return:    memoryview: 应答内容
+        '''
+        self.send(message_type, payload)
+        while True:
+            reply_type, reply = self.receive()
+            if reply_type == message_type:
+                return reply
+
+    def controller_version(self):
+        '''
+        :return:    tuple: (major, minor, bugfix, build)
+        '''
+        return struct.unpack('>IIII', self.request(RTDE_GET_URCONTROL_VERSION))
+
+    def setup_outputs(self, variables, frequency=500):
+        '''
+        设置输出配方
+        :param variables:   输出变量名列表
+        :param frequency:   输出频率，Hz（e系列最高500）
+        :return:            list: 各变量的类型
+        '''
+        reply = self.request(RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS,
+                             struct.pack('>d', frequency) + ','.join(variables).encode('utf8'))
+        self.recipe = reply[0]
+        types = bytes(reply[1:]).decode('utf8').split(',')
+        missing = [v for v, t in zip(variables, types) if t not in RTDE_TYPES]
+        if missing:
+            raise ValueError('控制器不支持的RTDE输出变量：%s' % ', '.join(missing))
+        return types
+
+    def start(self):
+        if not self.request(RTDE_CONTROL_PACKAGE_START)[0]:
+            raise ConnectionError('RTDE同步启动失败')
+
+    def pause(self):
+        self.request(RTDE_CONTROL_PACKAGE_PAUSE)
+
+    def read_package(self):
+        '''
+        读取下一个数据包
+        :return:    memoryview: 数据包内容（配方号 + 各变量）
+        '''
+        while True:
+            message_type, payload = self.receive()
+            if message_type == RTDE_DATA_PACKAGE:
+                return payload
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+class RTDEReceiver(Process):
+    '''
+    RTDE数据接收进程，可替代UR5的30003接收：只订阅需要的字段，结果按30003布局发布到同一个TelemetryRing
+    未订阅的字段在记录中为0
+    '''
+
+    def __init__(self, config, telemetry, event, UR5_process_control):
+        '''
+        :param config:              配置，使用UR_IP、rtde_port、rtde_frequency、rtde_fields（30003字段名）
+        :param telemetry:           TelemetryRing
+        :param event:               数据接收状态（正常、休眠）
+        :param UR5_process_control: 控制进程状态，Process_flag
+        '''
+        super(RTDEReceiver, self).__init__()
+        self.config = config
+        self.telemetry = telemetry
+        self.event = event
+        self.UR5_process_control = UR5_process_control
+        self.fields = list(config.get('rtde_fields') or ['机器运行时长', '实际关节位置', '数字输入', '数字输出'])
+        if '机器运行时长' not in self.fields:
+            self.fields.insert(0, '机器运行时长')                   # 看门狗按机器运行时长统计丢帧
+        unknown = [field for field in self.fields if field not in FIELD_VARIABLES]
+        if unknown:
+            raise ValueError('RTDE没有对应的输出变量：%s' % ', '.join(unknown))
+        self.variables = [FIELD_VARIABLES[field] for field in self.fields]
+
+    def connect(self, timeout=None):
+        '''
+        连接RTDE，设置配方并开始同步
+        :param timeout: 开始同步后的接收超时，s
+        :return:        (RTDEClient, RecipeDecoder)
+        '''
+        client = RTDEClient(self.config['UR_IP'], self.config.get('rtde_port', 30004))
+        try:
+            client.connect()
+            types = client.setup_outputs(self.variables, self.config.get('rtde_frequency', 500))
+            client.start()
+            client.sock.settimeout(timeout)
+        except OSError:
+            client.close()
+            raise
+        return client, RecipeDecoder(self.variables, types, self.telemetry.fields)
+
+    def cancelled(self):
+        '''
+        进程被要求退出或进入休眠
+        :return:    bool
+        '''
+        return not self.UR5_process_control['Process_flag'] or self.event.is_set()
+
+    def run(self):
+        '''
+        接收RTDE数据包并发布
+        接收超时（watchdog_timeout）或连接异常时由看门狗标记数据陈旧，并按指数退避自动重连
+        :return:    None
+        '''
+        watchdog = ReceiverWatchdog(self.telemetry, self.config.get('rtde_frequency', 500),
+                                    self.config.get('watchdog_timeout', 0.1),
+                                    self.config.get('reconnect_backoff', 0.05),
+                                    self.config.get('reconnect_max_backoff', 2.0))
+        connect = lambda: self.connect(watchdog.timeout)
+        client = decoder = None
+        while self.UR5_process_control['Process_flag']:
+            if self.event.is_set():                             # 休眠时断开
+                if client is not None:
+                    client.close()
+                    client = None
+                time.sleep(0.2)
+                continue
+            try:
+                if client is None:
+                    client, decoder = connect()
+                package = client.read_package()
+            except OSError:                                     # 连接失败、接收超时、连接断开或被重置
+                watchdog.stalled()
+                if client is not None:
+                    client.close()
+                client, decoder = watchdog.reconnect(connect, self.cancelled) or (None, None)
+                continue
+            received = now()
+            decoder.publish(package, self.telemetry, received)     # 配方字段直接写入共享内存
+            watchdog.frame(package, received, decoder.runtime_offset)
+        if client is not None:
+            client.close()
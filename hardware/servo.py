@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 20:00
+@Auth ： Ethan
+@File ：servo.py
+@IDE ：PyCharm
+"""
+import time
+import socket
+import struct
+import numpy as np
+
+
+SERVO_SCALE = 1000000                                           # 关节角按整数发送，rad * SERVO_SCALE
+SERVO_MESSAGE = struct.Struct('>7i')                            # [继续标志, q1..q6]，控制器端 socket_read_binary_integer(7)
+
+# 伺服程序：控制器回连上位机，循环读取设定点并执行servoj；超时未收到设定点或收到停止标志时停止
+SERVO_PROGRAM = '''def servo_stream():
+  socket_open("{host}", {port}, "servo")
+  while True:
+    msg = socket_read_binary_integer(7, "servo", {timeout})
+    if msg[0] != 7 or msg[1] == 0:
+      break
+    end
+    q = [msg[2] / {scale}, msg[3] / {scale}, msg[4] / {scale}, msg[5] / {scale}, msg[6] / {scale}, msg[7] / {scale}]
+    servoj(q, 0, 0, {t}, {lookahead}, {gain})
+  end
+  stopj(2.0)
+  socket_close("servo")
+end
+'''
+
+
+def local_ip(host, port=30003):
+    '''
+    连接host所用的本机IP：UDP的connect只选择路由，不发送数据
+    :param host:    控制器IP
+    :param port:    任一端口
+    :return:        str
+    '''
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.connect((host, port))
+        return sock.getsockname()[0]
+    finally:
+        sock.close()
+
+
+class ServoStreamer:
+    '''
+    servoj流式控制：伺服程序只上传一次，之后按控制器的节拍逐点发送预先计算好的关节轨迹
+    节拍由30003的帧序号驱动（遥测环形缓冲区每收到一帧写入序号加1），阻塞在接收进程发出的帧到达通知上，不依赖time.sleep的精度
+    发送的同时记录每个设定点对应的实测关节位置，用于统计节拍抖动与实测路径的滞后
+    '''
+
+    def __init__(self, telemetry, frames, send, host, port=50002, rate=500, frame_rate=500, lookahead=0.1, gain=300,
+                 timeout=1.0):
+        '''
+        :param telemetry:   TelemetryRing，用帧序号作为节拍，并读取实际关节位置
+        :param frames:      FrameNotifier，接收进程每发布一帧调用published
+        :param send:        发送脚本的函数，如 UR5.send_30003
+        :param host:        上位机IP（控制器回连的地址）
+        :param port:        上位机监听的端口，为0时由系统分配
+        :param rate:        设定点频率，Hz（125/500），不超过frame_rate
+        :param frame_rate:  30003帧频率，Hz
+        :param lookahead:   servoj前瞻时间，s，0.03~0.2，越大越平滑、滞后越大
+        :param gain:        servoj比例增益，100~2000
+        :param timeout:     控制器等待设定点、上位机等待新帧的超时，s
+        '''
+        self.telemetry = telemetry
+        self.frames = frames
+        self.send = send
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.frames_per_point = max(int(round(frame_rate / rate)), 1)
+        self.lookahead = lookahead
+        self.gain = gain
+        self.timeout = timeout
+        self.measured = telemetry.subscribe(['实际关节位置'])
+        self.stopped = False
+
+    def program(self, port):
+        '''
+        生成伺服程序
+        :param port:    上位机实际监听的端口
+        :return:        str
+        '''
+        return SERVO_PROGRAM.format(host=self.host, port=port, timeout=self.timeout, scale=SERVO_SCALE,
+                                    t=1 / self.rate, lookahead=self.lookahead, gain=self.gain)
+
+    def wait_frame(self, seq):
+        '''
+        等待写入序号达到seq（30003收到对应的帧）
+        :param seq: 帧序号
+        :return:    None，超时抛出TimeoutError
+        '''
+        if not self.frames.wait(self.telemetry, seq, self.timeout):
+            raise TimeoutError('超过%.1fs未收到30003数据' % self.timeout)
+
+    def stream(self, trajectory, type='radian'):
+        '''
+        执行一条轨迹（阻塞，直到最后一个设定点发出）
+        :param trajectory:  关节轨迹 shape=(N, 6)，按rate等间隔
+        :param type:        数据类型：angle、radian
+        :return:            dict: 统计结果，见report
+        '''
+        trajectory = np.asarray(trajectory, dtype=np.float64).reshape(-1, 6)
+        if type == 'angle':
+            trajectory = np.radians(trajectory)
+        setpoints = np.round(trajectory * SERVO_SCALE).astype(np.int64)
+        n = len(trajectory)
+        sent = np.zeros(n)                                      # 每个设定点的发送时间
+        measured = np.zeros((n, 6))                             # 发送时的实际关节位置
+
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(('', self.port))
+        server.listen(1)
+        server.settimeout(self.timeout * 5)
+        self.stopped = False
+        try:
+            self.send(self.program(server.getsockname()[1]).encode('utf8'))    # 上传伺服程序
+            conn, _ = server.accept()
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            try:
+                seq = self.telemetry.seq
+                for i in range(n):
+                    if self.stopped:
+                        n = i
+                        break
+                    seq += self.frames_per_point
+                    self.wait_frame(seq)                        # 以30003帧为节拍
+                    conn.sendall(SERVO_MESSAGE.pack(1, *setpoints[i]))
+                    sent[i] = time.perf_counter()
+                    measured[i] = self.measured.latest()[0]
+                conn.sendall(SERVO_MESSAGE.pack(0, 0, 0, 0, 0, 0, 0))   # 停止
+            finally:
+                conn.close()
+        finally:
+            server.close()
+        return self.report(trajectory[:n], measured[:n], sent[:n])
+
+    def stop(self):
+        '''
+        中止正在执行的轨迹（从其他线程调用）
+        :return:    None
+        '''
+        self.stopped = True
+
+    def report(self, commanded, measured, sent, max_lag=100):
+        '''
+        统计节拍抖动与实测路径的滞后
+        滞后取使 |实测[i+k] - 设定[i]| 均值最小的k
+        :param commanded:   设定的关节轨迹 shape=(N, 6)
+        :param measured:    发送每个设定点时的实际关节位置 shape=(N, 6)
+        :param sent:        发送时间 shape=(N,)
+        :param max_lag:     搜索的最大滞后，设定点数
+        :return:            dict
+        '''
+        period = 1 / self.rate
+        jitter = np.diff(sent) - period
+        result = {'设定点数': len(sent),
+                  '抖动标准差': float(jitter.std()) if len(jitter) else 0.0,
+                  '抖动最大值': float(np.abs(jitter).max()) if len(jitter) else 0.0}
+        lags = range(min(max_lag, len(sent) // 2))
+        if len(lags):
+            errors = np.array([np.abs(measured[k:] - commanded[:len(commanded) - k]).mean() for k in lags])
+            lag = int(errors.argmin())
+            result.update({'滞后': lag * period,
+                           '滞后时跟踪误差': float(errors[lag]),
+                           '无滞后跟踪误差': float(errors[0])})
+        return result
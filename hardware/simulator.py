@@ -0,0 +1,601 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 14:30
+@Auth ： Ethan
+@File ：simulator.py
+@IDE ：PyCharm
+"""
+import re
+import time
+import random
+import socket
+import struct
+import argparse
+import threading
+import numpy as np
+
+from hardware.packet import DECODERS
+from hardware.recorder import TelemetryReader
+from hardware.rtde import (RTDE_OUTPUTS, RTDE_TYPES, RTDE_REQUEST_PROTOCOL_VERSION, RTDE_GET_URCONTROL_VERSION,
+                           RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS, RTDE_CONTROL_PACKAGE_START,
+                           RTDE_CONTROL_PACKAGE_PAUSE, RTDE_DATA_PACKAGE)
+from hardware.primary import MESSAGE_HEADER, MESSAGE_ROBOT_STATE, SUBPACKAGES
+
+
+# Dashboard指令的默认回复，{state}等占位符由模拟器当前状态填充
+DASHBOARD_REPLIES = {
+    'robotmode': 'Robotmode: {robotmode}',
+    'safetystatus': 'Safetystatus: NORMAL',
+    'programState': '{program_state} <unnamed>',
+    'running': 'Program running: {running}',
+    'PolyscopeVersion': 'URSoftware 5.11.1.108318 (Mar 22 2022)',
+    'get robot model': 'UR5',
+    'is in remote control': 'true',
+    'isProgramSaved': 'true <unnamed>',
+    'get loaded program': 'No program loaded',
+    'get operational mode': 'NONE',
+    'play': 'Starting program',
+    'stop': 'Stopped',
+    'pause': 'Pausing program',
+    'power on': 'Powering on',
+    'power off': 'Powering off',
+    'brake release': 'Brake releasing',
+    'unlock protective stop': 'Protective stop releasing',
+    'close popup': 'closing popup',
+    'close safety popup': 'closing safety popup',
+    'restart safety': 'Restarting safety',
+    'clear operational mode': 'No longer controlling the operational mode. ',
+}
+
+
+class URSimulator:
+    '''
+    UR控制器替身，在本机模拟realtime-30003与Dashboard-29999，用于无实机时的压力测试
+    30003：按设定频率发送完整的数据帧（合成数据或回放录制数据），可注入拆包、粘包、抖动、断线
+    29999：按行应答Dashboard指令
+    收到的movej指令会让模拟的关节匀速运动至目标位置，便于测试运动相关功能
+    '''
+
+    def __init__(self, host='127.0.0.1', realtime_port=30003, dashboard_port=29999, rate=500, frame_size=1220,
+                 replay=None, split=0.0, merge=0.0, jitter=0.0, garbage=0.0, disconnect_every=0.0,
+                 dashboard_delay=0.0, seed=None, rtde_port=None, primary_port=None):
+        '''
+        :param host:                监听地址
+        :param realtime_port:       30003端口，为None时不启用
+        :param dashboard_port:      29999端口，为None时不启用
+        :param rate:                发送频率，Hz（125/500/1000）
+        :param frame_size:          帧长度，对应控制器软件版本
+        :param replay:              录制目录，指定时回放录制的数据帧（最后一个会话），录制的帧长度须与frame_size一致
+        :param split:               每帧被拆成多段发送的概率
+        :param merge:               每帧与下一帧合并发送的概率
+        :param jitter:              发送时间抖动的标准差，s
+        :param garbage:             每帧前插入无效字节的概率，用于测试重新同步
+        :param disconnect_every:    每隔多少秒主动断开30003连接，0为不断开
+        :param dashboard_delay:     Dashboard每条指令的应答延时，s
+        :param seed:                随机种子
+        :param rtde_port:           RTDE-30004端口，为None时不启用
+        :param primary_port:        主/副接口端口（30001/30002），为None时不启用，按10Hz发送机器人状态消息
+        '''
+        self.host = host
+        self.realtime_port = realtime_port
+        self.dashboard_port = dashboard_port
+        self.rtde_port = rtde_port
+        self.primary_port = primary_port
+        self.rate = rate
+        self.decoder = DECODERS[frame_size]
+        self.split = split
+        self.merge = merge
+        self.jitter = jitter
+        self.garbage = garbage
+        self.disconnect_every = disconnect_every
+        self.dashboard_delay = dashboard_delay
+        self.random = random.Random(seed)
+
+        self.replay = None
+        if replay:
+            self.replay = TelemetryReader(replay).query(-np.inf, np.inf, raw=True)
+            if len(self.replay) and self.replay.shape[1] != frame_size:     # 截断会使长度前缀与实际长度不符，分帧失步
+                raise ValueError('录制的帧长度为%d，与回放的帧长度%d不一致，请指定frame_size=%d' % (
+                    self.replay.shape[1], frame_size, self.replay.shape[1]))
+
+        # 模拟的机器人状态
+        self.lock = threading.Lock()
+        self.q = np.array([0., -np.pi / 2, 0., -np.pi / 2, 0., 0.])    # 关节位置，rad
+        self.target = self.q.copy()                                 # movej目标
+        self.speed = 1.0                                            # 关节速度，rad/s
+        self.robotmode = 'RUNNING'
+        self.program_state = 'STOPPED'
+        self.scripts = []                                           # 30003收到的脚本，供测试检查
+
+        # 统计
+        self.frames_sent = 0
+        self.connections = 0
+        self.dashboard_commands = 0
+        self.rtde_packages = 0
+        self.rtde_bytes = 0
+        self.primary_messages = 0
+
+        self.running = False
+        self.servers = []
+        self.clients = []                                           # 已接受的连接，停止时一并断开
+        self.stream_clients = []                                    # 30003、RTDE、主接口连接，reset时断开
+        self.stalled_until = 0.0                                    # 断流的结束时间
+        self.threads = []
+
+    def start(self):
+        '''
+        开启监听
+        :return:    URSimulator
+        '''
+        self.running = True
+        self.started = time.perf_counter()
+        if self.realtime_port is not None:
+            self.realtime_port = self.listen(self.realtime_port, self.serve_realtime)
+        if self.dashboard_port is not None:
+            self.dashboard_port = self.listen(self.dashboard_port, self.serve_dashboard)
+        if self.rtde_port is not None:
+            self.rtde_port = self.listen(self.rtde_port, self.serve_rtde)
+        if self.primary_port is not None:
+            self.primary_port = self.listen(self.primary_port, self.serve_primary)
+        return self
+
+    def listen(self, port, handler):
+        '''
+        监听端口，每个连接一个线程
+        :param port:        端口，为0时由系统分配
+        :param handler:     连接处理函数
+        :return:            int: 实际监听的端口
+        '''
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((self.host, port))
+        server.listen(8)
+        server.settimeout(0.2)
+        self.servers.append(server)
+
+        def accept():
+            while self.running:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    continue
+                except OSError:
+                    break
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.clients.append(conn)
+                thread = threading.Thread(target=handler, args=(conn,), daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+        thread = threading.Thread(target=accept, daemon=True)
+        thread.start()
+        self.threads.append(thread)
+        return server.getsockname()[1]
+
+    def stop(self):
+        '''
+        停止模拟器
+        :return:    None
+        '''
+        self.running = False
+        for server in self.servers:
+            server.close()
+        for conn in self.clients:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        for thread in self.threads:
+            thread.join(1)
+        self.servers = []
+        self.clients = []
+        self.threads = []
+
+    def stall(self, seconds):
+        '''
+        30003、RTDE、主接口断流：连接保持，seconds秒内不发送数据（机器运行时长照常增加）
+        :param seconds: 断流时长，s
+        :return:        None
+        '''
+        self.stalled_until = time.perf_counter() + seconds
+
+    def reset(self):
+        '''
+        以RST方式断开所有30003、RTDE、主接口连接，模拟网线插拔、控制器重启
+        :return:        None
+        '''
+        for conn in self.stream_clients:
+            try:
+                conn.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+                conn.shutdown(socket.SHUT_RDWR)                     # 唤醒阻塞在recv上的脚本接收线程，close才会真正断开
+                conn.close()
+            except OSError:
+                pass
+        self.stream_clients = []
+
+    def make_frames(self):
+        '''
+        数据帧生成器：回放录制数据，或根据模拟状态合成
+        :return:    generator: bytes
+        '''
+        size = self.decoder.size
+        if self.replay is not None:
+            while True:
+                for frame in self.replay:
+                    yield frame.tobytes()
+        frame = np.zeros(1, dtype=DECODERS[max(DECODERS)].dtype)
+        frame['总计数据长度'] = size
+        frame['机器人模式'] = 7
+        frame['安全模式'] = 1
+        frame['电机温度'] = 30
+        period = 1 / self.rate
+        tick = int((time.perf_counter() - self.started) * self.rate)   # 机器运行时长从模拟器启动开始计时，断线重连后连续
+        while True:
+            with self.lock:
+                step = np.clip(self.target - self.q, -self.speed * period, self.speed * period)
+                self.q += step
+                moving = bool(np.any(step != 0))
+                frame['实际关节位置'] = self.q
+                frame['目标关节位置'] = self.target
+                frame['实际关节速度'] = step / period
+                frame['程序状态'] = 2 if moving or self.program_state == 'PLAYING' else 1
+            frame['机器运行时长'] = tick * period
+            frame['数字输入'] = (tick // self.rate) % 256           # 每秒变化一次的位号
+            frame['数字输出'] = 1 << ((tick // self.rate) % 8)
+            tick += 1
+            yield frame.tobytes()[:size]
+
+    def serve_realtime(self, conn):
+        '''
+        30003连接：按频率发送数据帧，同时接收脚本
+        :param conn:    客户端连接
+        :return:        None
+        '''
+        self.connections += 1
+        self.stream_clients.append(conn)
+        alive = [True]
+        receiver = threading.Thread(target=self.receive_script, args=(conn, alive), daemon=True)
+        receiver.start()
+
+        frames = self.make_frames()
+        period = 1 / self.rate
+        start = time.perf_counter()
+        pending = b''                                               # 待合并发送的数据
+        index = 0
+        try:
+            while self.running and alive[0]:
+                if self.disconnect_every and time.perf_counter() - start > self.disconnect_every:
+                    break
+                data = next(frames)
+                if self.random.random() < self.garbage:
+                    data = bytes(self.random.randrange(256) for _ in range(self.random.randint(1, 16))) + data
+                pending += data
+                index += 1
+                self.frames_sent += 1
+                if self.random.random() < self.merge:
+                    continue                                        # 与下一帧一起发送
+                delay = start + index * period + self.random.gauss(0, self.jitter) - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                if time.perf_counter() < self.stalled_until:        # 断流：连接保持，帧照常生成但不发送
+                    pending = b''
+                    continue
+                if self.random.random() < self.split and len(pending) > 1:
+                    cut = self.random.randint(1, len(pending) - 1)
+                    conn.sendall(pending[:cut])
+                    time.sleep(period / 4)
+                    conn.sendall(pending[cut:])
+                else:
+                    conn.sendall(pending)
+                pending = b''
+        except OSError:
+            pass
+        finally:
+            alive[0] = False
+            conn.close()
+
+    def receive_script(self, conn, alive):
+        '''
+        接收30003上发来的脚本，解析movej目标
+        :param conn:    客户端连接
+        :param alive:   连接状态，[bool]
+        :return:        None
+        '''
+        while self.running and alive[0]:
+            try:
+                data = conn.recv(65536)
+            except OSError:
+                break
+            if not data:
+                break
+            text = data.decode('utf8', errors='ignore')
+            self.scripts.append(text)
+            match = re.findall(r'movej\(\[([^\]]+)\]', text)
+            if match:
+                with self.lock:
+                    self.target = np.array([float(i) for i in match[-1].split(',')])
+            servo = re.search(r'socket_open\("([^"]+)", (\d+), "servo"\)', text)
+            if servo:
+                threading.Thread(target=self.run_servo, args=(servo.group(1), int(servo.group(2))),
+                                 daemon=True).start()
+        alive[0] = False
+
+    def run_servo(self, host, port):
+        '''
+        模拟伺服程序（hardware/servo.py）：回连上位机，读取设定点作为目标，关节以伺服速度跟随
+        :param host:    上位机IP
+        :param port:    上位机端口
+        :return:        None
+        '''
+        message = struct.Struct('>7i')
+        try:
+            conn = socket.create_connection((host, port), 2)
+        except OSError:
+            return
+        speed = self.speed
+        self.speed = np.pi                                          # servoj下关节最大速度
+        buffer = b''
+        try:
+            while self.running:
+                data = conn.recv(4096)
+                if not data:
+                    break
+                buffer += data
+                while len(buffer) >= message.size:
+                    values = message.unpack(buffer[:message.size])
+                    buffer = buffer[message.size:]
+                    if values[0] == 0:
+                        return
+                    with self.lock:
+                        self.target = np.array(values[1:]) / 1e6
+        except OSError:
+            pass
+        finally:
+            self.speed = speed
+            conn.close()
+
+    def serve_dashboard(self, conn):
+        '''
+        29999连接：按行应答Dashboard指令
+        :param conn:    客户端连接
+        :return:        None
+        '''
+        conn.sendall(b'Connected: Universal Robots Dashboard Server\n')
+        buffer = b''
+        try:
+            while self.running:
+                data = conn.recv(4096)
+                if not data:
+                    break
+                buffer += data
+                while b'\n' in buffer:
+                    line, buffer = buffer.split(b'\n', 1)
+                    command = line.decode('utf8').strip()
+                    if not command:
+                        continue
+                    self.dashboard_commands += 1
+                    if self.dashboard_delay:
+                        time.sleep(self.dashboard_delay)
+                    if command == 'quit':
+                        conn.sendall(b'Disconnected\n')
+                        return
+                    conn.sendall((self.dashboard_reply(command) + '\n').encode('utf8'))
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def dashboard_reply(self, command):
+        '''
+        生成Dashboard应答，并更新模拟状态
+        :param command: 指令
+        :return:        str
+        '''
+        key = command.lower()
+        if key == 'play':
+            self.program_state = 'PLAYING'
+        elif key == 'stop':
+            self.program_state = 'STOPPED'
+        elif key == 'pause':
+            self.program_state = 'PAUSED'
+        elif key == 'power on':
+            self.robotmode = 'IDLE'
+        elif key == 'brake release':
+            self.robotmode = 'RUNNING'
+        elif key == 'power off':
+            self.robotmode = 'POWER_OFF'
+        for name, reply in DASHBOARD_REPLIES.items():
+            if name.lower() == key:
+                return reply.format(robotmode=self.robotmode, program_state=self.program_state,
+                                    running=str(self.program_state == 'PLAYING').lower())
+        if key.startswith('load '):
+            return 'Loading program: %s' % command[5:]
+        if key.startswith('popup '):
+            return 'showing popup'
+        if key.startswith('addtolog '):
+            return 'Added log message'
+        return "could not understand: '%s'" % command
+
+    def primary_message(self, timestamp):
+        '''
+        机器人状态消息（主/副接口），子包按e系列的长度在已知前缀后补齐字节，并带一个未解析的配置数据子包
+        :param timestamp:   机器运行时长，s
+        :return:            bytes
+        '''
+        with self.lock:
+            q, target = self.q.copy(), self.target.copy()
+            moving = bool(np.any(q != target))
+        values = {
+            0: [int(timestamp * 1e6), 1, 1, 1, 0, 0, int(moving or self.program_state == 'PLAYING'),
+                int(self.program_state == 'PAUSED'), 7, 0, 1.0, 1.0, 1.0],
+            1: [value for j in range(6) for value in (q[j], target[j], 0.0, 0.5, 48.0, 30.0, 35.0, 253)],
+            2: [0, 0, 0.0, 0.0, 24.0, 0, 0.1, 32.0, 253],
+            3: [int(timestamp) % 256, 1 << (int(timestamp) % 8), 0, 0, 0.0, 0.0, 0, 0, 0.0, 0.0, 35.0, 48.0, 1.5,
+                0.1, 1, 0],
+            4: [0.0] * 12,
+            5: [0] * 6 + [0.0] * 6 + [0.0, -0.425, -0.39225, 0.0, 0.0, 0.0] + [0.089159, 0.0, 0.0, 0.10915, 0.09465,
+                0.0823] + [np.pi / 2, 0.0, 0.0, np.pi / 2, -np.pi / 2, 0.0] + [0],
+        }
+        extra = {0: 1, 3: 14}                                       # e系列比已知前缀多出的字节
+        body = b''
+        for number, (_, fmt, _) in SUBPACKAGES.items():
+            data = struct.pack(fmt, *values[number]) + bytes(extra.get(number, 0))
+            body += MESSAGE_HEADER.pack(MESSAGE_HEADER.size + len(data), number) + data
+        body += MESSAGE_HEADER.pack(MESSAGE_HEADER.size + 440, 6) + bytes(440)    # 配置数据
+        return MESSAGE_HEADER.pack(MESSAGE_HEADER.size + len(body), MESSAGE_ROBOT_STATE) + body
+
+    def serve_primary(self, conn):
+        '''
+        主/副接口连接：先发送版本消息，之后按10Hz发送机器人状态消息
+        :param conn:    客户端连接
+        :return:        None
+        '''
+        version = b'\xfe\x03\x07URControl\x05\x0b\x01\x00\x00\x00\x00'
+        period = 0.1
+        start = time.perf_counter()
+        tick = 0
+        self.stream_clients.append(conn)
+        try:
+            conn.sendall(MESSAGE_HEADER.pack(MESSAGE_HEADER.size + len(version), 20) + version)
+            while self.running:
+                if time.perf_counter() >= self.stalled_until:       # 断流：连接保持，不发送消息
+                    conn.sendall(self.primary_message(time.perf_counter() - self.started))
+                    self.primary_messages += 1
+                tick += 1
+                delay = start + tick * period - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def rtde_value(self, variable, timestamp):
+        '''
+        RTDE输出变量的模拟值（不推进关节运动，运动由30003帧生成器推进）
+        :param variable:    变量名
+        :param timestamp:   机器运行时长，s
+        :return:            float / int / list
+        '''
+        count = int(RTDE_TYPES[RTDE_OUTPUTS[variable][0]][:-1] or 1)
+        if variable == 'timestamp':
+            return timestamp
+        if variable == 'actual_q':
+            return list(self.q)
+        if variable == 'target_q':
+            return list(self.target)
+        if variable == 'actual_digital_input_bits':
+            return int(timestamp) % 256
+        if variable == 'actual_digital_output_bits':
+            return 1 << (int(timestamp) % 8)
+        if variable == 'robot_mode':
+            return 7
+        if variable == 'safety_mode':
+            return 1
+        if variable == 'joint_temperatures':
+            return [30.0] * 6
+        return 0 if count == 1 else [0] * count
+
+    def serve_rtde(self, conn):
+        '''
+        30004连接：协议版本、控制器版本、输出配方、开始/暂停，开始后按配方频率发送数据包
+        :param conn:    客户端连接
+        :return:        None
+        '''
+        self.stream_clients.append(conn)
+        header = struct.Struct('>HB')
+        variables, package, frequency = [], None, self.rate
+        streaming = [False]
+
+        def send(message_type, payload=b''):
+            conn.sendall(header.pack(header.size + len(payload), message_type) + payload)
+
+        def stream():
+            period = 1 / frequency
+            start = time.perf_counter()
+            base = int((start - self.started) * frequency)          # 机器运行时长从模拟器启动开始计时
+            tick = 0
+            while self.running and streaming[0]:
+                values = [1]
+                for variable in variables:
+                    value = self.rtde_value(variable, (base + tick) * period)
+                    values.extend(value if isinstance(value, list) else [value])
+                data = package.pack(*values)
+                tick += 1
+                if time.perf_counter() >= self.stalled_until:       # 断流：连接保持，数据包照常生成但不发送
+                    try:
+                        send(RTDE_DATA_PACKAGE, data)
+                    except OSError:
+                        break
+                    self.rtde_packages += 1
+                    self.rtde_bytes += header.size + len(data)
+                delay = start + tick * period - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+        buffer = b''
+        try:
+            while self.running:
+                data = conn.recv(4096)
+                if not data:
+                    break
+                buffer += data
+                while len(buffer) >= header.size and len(buffer) >= header.unpack_from(buffer)[0]:
+                    size, message_type = header.unpack_from(buffer)
+                    payload, buffer = buffer[header.size:size], buffer[size:]
+                    if message_type == RTDE_REQUEST_PROTOCOL_VERSION:
+                        send(message_type, b'\x01')
+                    elif message_type == RTDE_GET_URCONTROL_VERSION:
+                        send(message_type, struct.pack('>IIII', 5, 11, 1, 0))
+                    elif message_type == RTDE_CONTROL_PACKAGE_SETUP_OUTPUTS:
+                        frequency = min(struct.unpack('>d', payload[:8])[0], 500)
+                        variables = payload[8:].decode('utf8').split(',')
+                        types = [RTDE_OUTPUTS[v][0] if v in RTDE_OUTPUTS else 'NOT_FOUND' for v in variables]
+                        if 'NOT_FOUND' not in types:
+                            package = struct.Struct('>B' + ''.join(RTDE_TYPES[t] for t in types))
+                        send(message_type, b'\x01' + ','.join(types).encode('utf8'))
+                    elif message_type == RTDE_CONTROL_PACKAGE_START:
+                        send(message_type, b'\x01' if package is not None else b'\x00')
+                        if package is not None and not streaming[0]:
+                            streaming[0] = True
+                            threading.Thread(target=stream, daemon=True).start()
+                    elif message_type == RTDE_CONTROL_PACKAGE_PAUSE:
+                        streaming[0] = False
+                        send(message_type, b'\x01')
+        except OSError:
+            pass
+        finally:
+            streaming[0] = False
+            conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='UR控制器替身（30003/29999）')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--realtime-port', type=int, default=30003)
+    parser.add_argument('--dashboard-port', type=int, default=29999)
+    parser.add_argument('--rate', type=int, default=500, help='发送频率 125/500/1000 Hz')
+    parser.add_argument('--frame-size', type=int, default=1220, choices=sorted(DECODERS))
+    parser.add_argument('--replay', default=None, help='回放的录制目录')
+    parser.add_argument('--split', type=float, default=0.0, help='拆包概率')
+    parser.add_argument('--merge', type=float, default=0.0, help='粘包概率')
+    parser.add_argument('--jitter', type=float, default=0.0, help='发送抖动标准差，s')
+    parser.add_argument('--garbage', type=float, default=0.0, help='插入无效字节的概率')
+    parser.add_argument('--disconnect-every', type=float, default=0.0, help='每隔多少秒断开30003')
+    parser.add_argument('--dashboard-delay', type=float, default=0.0, help='Dashboard应答延时，s')
+    parser.add_argument('--rtde-port', type=int, default=30004)
+    parser.add_argument('--primary-port', type=int, default=30002)
+    args = parser.parse_args()
+
+    simulator = URSimulator(args.host, args.realtime_port, args.dashboard_port, args.rate, args.frame_size,
+                            args.replay, args.split, args.merge, args.jitter, args.garbage,
+                            args.disconnect_every, args.dashboard_delay, rtde_port=args.rtde_port,
+                            primary_port=args.primary_port).start()
+    print('模拟器已启动 %s  30003->%s  29999->%s  %sHz' % (args.host, args.realtime_port, args.dashboard_port, args.rate))
+    try:
+        while True:
+            time.sleep(1)
+            print('已发送帧数: %d  连接次数: %d  Dashboard指令: %d' % (
+                simulator.frames_sent, simulator.connections, simulator.dashboard_commands))
+    except KeyboardInterrupt:
+        simulator.stop()
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 10:40
+@Auth ： Ethan
+@File ：telemetry.py
+@IDE ：PyCharm
+"""
+import os
+import numpy as np
+import multiprocessing
+from multiprocessing import shared_memory
+
+from hardware.packet import FIELDS_30003, FieldSubscription, build_dtype
+from hardware.latency import STAGES, NBINS, LatencyHistogram, now
+
+
+# 共享内存头部：写入序号（已发布的帧数）、容量、接收端统计信息、看门狗状态及链路延迟直方图
+HEADER_DTYPE = np.dtype([
+    ('写入序号', '<i8'),
+    ('容量', '<i8'),
+    ('重新同步次数', '<i8'),
+    ('丢弃字节数', '<i8'),
+    ('数据陈旧', '<i8'),                  # 接收端断流、重连中为1，见ReceiverWatchdog
+    ('断线次数', '<i8'),
+    ('间隔次数', '<i8'),                  # 机器运行时长不连续的次数
+    ('丢失帧数', '<i8'),
+    ('最近检测耗时', '<f8'),               # 最后一帧到检测出断流，s
+    ('最近恢复耗时', '<f8'),               # 检测出断流到重连后收到第一帧，s
+    ('帧周期', '<f8'),                    # 接收端使用的帧周期，s，未知时为0
+    ('保留', '<i8', (5,)),
+    ('延迟计数', '<i8', (len(STAGES), NBINS)),
+    ('延迟最大值', '<f8', (len(STAGES),)),
+])
+
+
+def telemetry_dtype(fields=FIELDS_30003):
+    '''
+    共享内存中每条记录的数据类型：帧序号 + 数据包字段
+    数据包字段保持网络字节序（大端），发布时整帧按字节拷贝，不做逐字段转换
+    :param fields:  字段表
+    :return:        np.dtype
+    '''
+    return np.dtype([('帧序号', '<i8'), ('接收时间', '<f8')] + build_dtype(fields).descr)
+
+
+class TelemetryRing:
+    '''
+    基于multiprocessing.shared_memory的遥测环形缓冲区，替代Manager().dict()
+    接收进程直接写入共享内存，不经过Manager进程；读取端拿到的是共享内存上的numpy视图
+    每条记录带帧序号：写入前置为-1，写完后置为帧序号，读取端据此判断记录是否完整
+    '''
+
+    def __init__(self, name=None, create=False, capacity=1024, fields=FIELDS_30003):
+        '''
+        :param name:        共享内存名称，create=False时按名称连接
+        :param create:      True -> 创建共享内存     False -> 连接已有的共享内存
+        :param capacity:    可保存的记录条数
+        :param fields:      字段表
+        '''
+        self.fields = list(fields)
+        self.dtype = telemetry_dtype(self.fields)
+        self.names = [name for name, _ in self.fields]
+        self.create = create
+        if create:
+            size = HEADER_DTYPE.itemsize + capacity * self.dtype.itemsize
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.untrack()
+        self.name = self.shm.name
+        header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        self.header = header[0]
+        self.written = header['写入序号']                          # 写入序号的数组视图 shape=(1,)，比按字段访问np.void快
+        if create:
+            self.header['写入序号'] = 0
+            self.header['容量'] = capacity
+        self.capacity = int(self.header['容量'])
+        self.slots = np.ndarray((self.capacity,), dtype=self.dtype, buffer=self.shm.buf,
+                                offset=HEADER_DTYPE.itemsize)
+        self.raw = self.slots.view(np.uint8).reshape(self.capacity, self.dtype.itemsize)   # 按字节访问的视图
+        self.seqs = self.slots['帧序号']                          # 各记录帧序号、接收时间的视图，发布时按列写入
+        self.stamps = self.slots['接收时间']
+        self.offset = self.dtype.fields['总计数据长度'][1]       # 数据包在记录中的起始位置
+
+    def untrack(self):
+        '''
+        POSIX下连接方也会被resource_tracker登记，进程退出时会误删共享内存，此处取消登记
+        :return:    None
+        '''
+        if os.name == 'posix':
+            try:
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.shm._name, 'shared_memory')
+            except Exception:
+                pass
+
+    def __getstate__(self):
+        # 跨进程传递时只传递名称，子进程中按名称重新连接
+        return {'name': self.name, 'fields': self.fields}
+
+    def __setstate__(self, state):
+        self.__init__(state['name'], create=False, fields=state['fields'])
+
+    @property
+    def seq(self):
+        '''
+        已发布的帧数
+        :return:    int
+        '''
+        return int(self.header['写入序号'])
+
+    def age(self):
+        '''
+        最新一帧距今的时间，接收进程卡死、退出时也能据此发现数据过期
+        :return:    float: s，尚无数据时为inf
+        '''
+        seq = int(self.header['写入序号'])
+        if seq == 0:
+            return float('inf')
+        return now() - float(self.slots[(seq - 1) % self.capacity]['接收时间'])
+
+    def is_stale(self, max_age=0.5):
+        '''
+        数据是否过期：接收端标记了断流，或最新一帧超过max_age未更新
+        :param max_age: 最大帧龄，s
+        :return:        bool
+        '''
+        return bool(self.header['数据陈旧']) or self.age() > max_age
+
+    def frame_rate(self, default=500):
+        '''
+        接收端使用的帧频率（看门狗按机器运行时长测得或按配置设置）
+        :param default: 尚未测得时的帧频率，Hz
+        :return:        float: Hz
+        '''
+        period = float(self.header['帧周期'])
+        return 1 / period if period > 0 else default
+
+    def latency(self, sample_every=1):
+        '''
+        头部共享内存上的链路延迟直方图
+        :param sample_every:    采样间隔，每隔多少帧记录一次
+        :return:                LatencyHistogram
+        '''
+        return LatencyHistogram(self.header['延迟计数'], self.header['延迟最大值'], sample_every)
+
+    def publish(self, record, stamp=0.0):
+        '''
+        发布一帧数据，仅由接收进程调用（单写者）
+        :param record:  PacketDecoder.decode 返回的结构化记录，或一帧原始数据
+        :param stamp:   接收时间，latency.now()
+        :return:        int: 该帧的帧序号
+        '''
+        frame = np.frombuffer(record, dtype=np.uint8)
+        seq = int(self.written[0])
+        index = seq % self.capacity
+        self.seqs[index] = -1                                   # 写入中
+        self.stamps[index] = stamp
+        self.raw[index, self.offset:self.offset + len(frame)] = frame  # 整帧按字节拷贝
+        self.seqs[index] = seq                                  # 写入完成
+        self.written[0] = seq + 1
+        return seq
+
+    def publish_packed(self, packer, values, stamp=0.0):
+        '''
+        按struct直接写入共享内存中的记录，只写packer覆盖的范围，不经过整条记录的中间缓冲区
+        用于只有部分字段的数据源（RTDE配方），仅由接收进程调用（单写者）
+        :param packer:  struct.Struct，从总计数据长度开始按记录布局排列，填充字节写为0
+        :param values:  packer的各个值
+        :param stamp:   接收时间，latency.now()
+        :return:        int: 该帧的帧序号
+        '''
+        seq = int(self.written[0])
+        index = seq % self.capacity
+        self.seqs[index] = -1                                   # 写入中
+        self.stamps[index] = stamp
+        packer.pack_into(self.shm.buf, HEADER_DTYPE.itemsize + index * self.dtype.itemsize + self.offset, *values)
+        self.seqs[index] = seq                                  # 写入完成
+        self.written[0] = seq + 1
+        return seq
+
+    def set_stats(self, stats):
+        '''
+        更新头部的接收端统计信息
+        :param stats:   dict: 字段名 -> 数值，字段名需在HEADER_DTYPE中
+        :return:        None
+        '''
+        for key, value in stats.items():
+            if key in HEADER_DTYPE.names:
+                self.header[key] = value
+
+    def latest(self, copy=False):
+        '''
+        获取最新的一帧
+        :param copy:    False -> 返回共享内存上的视图（零拷贝，容量帧之后会被覆盖）
+                        True  -> 返回校验过的拷贝
+        :return:        np.void: 记录，尚无数据时返回None
+        '''
+        while True:
+            seq = int(self.header['写入序号'])
+            if seq == 0:
+                return None
+            record = self.slots[(seq - 1) % self.capacity]
+            if copy:
+                record = record.copy()
+            if record['帧序号'] == seq - 1:                       # 帧序号一致，说明读取期间未被覆盖
+                return record
+
+    def last(self, n):
+        '''
+        获取最近的n帧，按时间先后排列
+        未跨越缓冲区尾部时为共享内存上的视图，跨越时拼接为拷贝
+        :param n:   帧数，不超过容量与已发布的帧数
+        :return:    np.ndarray: 结构化数组 shape=(n,)
+        '''
+        seq = int(self.header['写入序号'])
+        n = min(n, seq, self.capacity - 1)                      # 留出正在写入的一条
+        end = seq % self.capacity
+        start = end - n
+        if start >= 0:
+            return self.slots[start:end]
+        return np.concatenate((self.slots[start:], self.slots[:end]))
+
+    def since(self, seq):
+        '''
+        获取帧序号seq之后（含seq）发布的所有帧，用于增量消费
+        返回校验过帧序号的拷贝：写入端按时间先后覆盖，读取期间被覆盖的记录只会在开头，丢弃到最后一条不一致的记录为止
+        :param seq: 起始帧序号
+        :return:    (np.ndarray, int): 记录（可能少于end-seq条）、下一次调用的起始帧序号
+        '''
+        end = int(self.header['写入序号'])
+        records = np.array(self.last(end - seq))                # 先拷贝再校验，校验之后不会再被覆盖
+        torn = np.flatnonzero(records['帧序号'] != np.arange(end - len(records), end))
+        if len(torn):
+            records = records[torn[-1] + 1:]
+        return records, end
+
+    def subscribe(self, names):
+        '''
+        订阅字段，读取时只解析这些字段
+        :param names:   字段名列表
+        :return:        RingSubscription
+        '''
+        return RingSubscription(self, names)
+
+    def close(self):
+        '''
+        断开共享内存，创建方同时释放共享内存
+        :return:    None
+        '''
+        self.header = self.slots = self.raw = self.written = self.seqs = self.stamps = None
+        self.shm.close()
+        if self.create:
+            self.shm.unlink()
+
+
+class RingSubscription:
+    '''
+    环形缓冲区上的字段订阅：直接从共享内存解析所需字段，解析后校验帧序号，读取期间被覆盖时重读
+    '''
+
+    def __init__(self, ring, names):
+        '''
+        :param ring:    TelemetryRing
+        :param names:   字段名列表
+        '''
+        self.ring = ring
+        self.fields = FieldSubscription(names, ring.fields)
+        self.base = HEADER_DTYPE.itemsize + ring.offset        # 第0条记录中数据包的起始位置
+        self.itemsize = ring.dtype.itemsize
+        self.seqs = ring.slots['帧序号']                          # 各记录帧序号的视图
+        self.stamps = ring.slots['接收时间']                       # 各记录接收时间的视图
+        self.stamp = 0.0                                        # 最近一次读取的帧的接收时间
+
+    def latest(self):
+        '''
+        解析最新一帧的订阅字段
+        :return:    tuple: 按订阅顺序排列的字段值，尚无数据时返回None
+        '''
+        ring = self.ring
+        while True:
+            seq = int(ring.header['写入序号'])
+            if seq == 0:
+                return None
+            index = (seq - 1) % ring.capacity
+            values = self.fields.decode(ring.shm.buf, self.base + index * self.itemsize)
+            stamp = float(self.stamps[index])
+            if self.seqs[index] == seq - 1:                     # 解析期间未被覆盖
+                self.stamp = stamp
+                return values
+
+
+class FrameNotifier:
+    '''
+    帧到达通知：读取端登记要等待的写入序号后阻塞在事件上，接收进程发布到该帧时置位事件，读取端不轮询
+    登记与检查在同一把锁内进行，发布与登记交错时不会漏掉通知；没有读取端等待时接收进程每帧只比较一次
+    '''
+
+    def __init__(self):
+        self.target = multiprocessing.Value('q', 0)            # 等待的写入序号，0为没有读取端等待
+        self.event = multiprocessing.Event()
+
+    def published(self, written):
+        '''
+        接收进程发布一帧后调用
+        :param written: 发布后的写入序号（帧序号+1）
+        :return:        None
+        '''
+        with self.target.get_lock():
+            target = self.target.value
+            if target and written >= target:
+                self.target.value = 0
+                self.event.set()
+
+    def wait(self, telemetry, written, timeout=None):
+        '''
+        等待写入序号达到written，仅供一个读取线程使用
+        :param telemetry:   TelemetryRing
+        :param written:     写入序号
+        :param timeout:     超时，s
+        :return:            bool: 是否已达到，超时为False
+        '''
+        with self.target.get_lock():
+            if telemetry.seq >= written:
+                return True
+            self.event.clear()
+            self.target.value = written
+        if self.event.wait(timeout):
+            return True
+        with self.target.get_lock():                            # 超时，撤销登记
+            self.target.value = 0
+        return telemetry.seq >= written
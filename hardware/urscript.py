@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 19:20
+@Auth ： Ethan
+@File ：urscript.py
+@IDE ：PyCharm
+"""
+import os
+import re
+import time
+import numpy as np
+
+
+# 各运动指令的参数
+MOVE_PARAMS = {
+    'movej': ('a', 'v', 't', 'r'),
+    'movel': ('a', 'v', 't', 'r'),
+    'movep': ('a', 'v', 'r'),
+    'movec': ('a', 'v', 'r', 'mode'),
+}
+PARAM_FORMAT = {'a': 'a=%.4f', 'v': 'v=%.4f', 't': 't=%.4f', 'r': 'r=%.4f', 'mode': 'mode=%d'}
+PLACEHOLDER = re.compile(r'\{(\w+)\}')                            # 脚本中的参数占位符 {name}
+
+
+def target_format(kind, type):
+    '''
+    目标点的格式，与UR5.movej等单条指令保持一致：
+    movej的位姿目标用get_inverse_kin，其余指令的关节目标用get_forward_kin
+    :param kind:    运动指令
+    :param type:    数据类型：pose、radian（angle已转换为radian）
+    :return:        str
+    '''
+    values = ', '.join(['%.6f'] * 6)
+    if type == 'pose':
+        return ('get_inverse_kin(p[%s])' if kind == 'movej' else 'p[%s]') % values
+    return ('[%s]' if kind == 'movej' else 'get_forward_kin([%s])') % values
+
+
+class ScriptProgram:
+    '''
+    URScript程序生成：整条路径的路点一次向量化转换单位，生成一个 def ... end 程序，只发送一次
+    控制器按整个程序执行，路点之间的混合（r）不会因为逐条发送而被打断
+    '''
+
+    def __init__(self, name='path'):
+        '''
+        :param name:    程序名
+        '''
+        self.name = name
+        self.items = []                                         # 原始脚本行（str）或路径段（行格式, 参数表, 混合半径所在列）
+
+    def move(self, kind, waypoints, type='radian', a=0.2, v=0.2, t=0, r=0, mode=0):
+        '''
+        追加一段路径
+        :param kind:        运动指令：movej、movel、movep、movec
+        :param waypoints:   路点 shape=(N, 6)；movec为 shape=(N, 2, 6)，依次为途径点、终点
+        :param type:        数据类型：pose、angle、radian
+        :param a:           加速度，标量或每段一个值 shape=(N,)
+        :param v:           速度，标量或 shape=(N,)
+        :param t:           运动时间，标量或 shape=(N,)（movej、movel）
+        :param r:           混合半径，标量或 shape=(N,)，整个程序的最后一段固定为0，保证路径终点停稳
+        :param mode:        movec的模式，标量或 shape=(N,)
+        :return:            ScriptProgram
+        '''
+        if kind not in MOVE_PARAMS:
+            raise ValueError('未知的运动指令：%s' % kind)
+        points = np.asarray(waypoints, dtype=np.float64)
+        shape = (-1, 2, 6) if kind == 'movec' else (-1, 6)
+        points = points.reshape(shape)
+        if type == 'angle':
+            points = np.radians(points)                         # 整条路径一次转换
+            type = 'radian'
+        n = len(points)
+        if n == 0:
+            return self
+
+        values = {'a': a, 'v': v, 't': t, 'r': r, 'mode': mode}
+        params = MOVE_PARAMS[kind]
+        columns = [points.reshape(n, -1)]
+        for name in params:
+            columns.append(np.broadcast_to(np.asarray(values[name], dtype=np.float64), (n,))[:, None])
+        table = np.hstack(columns)
+
+        target = target_format(kind, type)
+        targets = ', '.join([target] * (2 if kind == 'movec' else 1))
+        line = '%s(%s, %s)' % (kind, targets, ', '.join(PARAM_FORMAT[name] for name in params))
+        self.items.append((line, table, columns[0].shape[1] + params.index('r')))
+        return self
+
+    def movej(self, waypoints, type='radian', a=0.2, v=0.2, t=0, r=0):
+        return self.move('movej', waypoints, type, a=a, v=v, t=t, r=r)
+
+    def movel(self, waypoints, type='radian', a=0.2, v=0.2, t=0, r=0):
+        return self.move('movel', waypoints, type, a=a, v=v, t=t, r=r)
+
+    def movep(self, waypoints, type='radian', a=0.2, v=0.2, r=0):
+        return self.move('movep', waypoints, type, a=a, v=v, r=r)
+
+    def movec(self, waypoints, type='radian', a=0.2, v=0.2, r=0, mode=0):
+        return self.move('movec', waypoints, type, a=a, v=v, r=r, mode=mode)
+
+    def add(self, line):
+        '''
+        追加一行原始脚本，如 set_digital_out(0, True)、sleep(0.5)
+        :param line:    脚本
+        :return:        ScriptProgram
+        '''
+        self.items.append(line.strip())
+        return self
+
+    def build(self):
+        '''
+        生成程序文本
+        :return:    str
+        '''
+        moves = [i for i, item in enumerate(self.items) if not isinstance(item, str)]
+        lines = []
+        for i, item in enumerate(self.items):
+            if isinstance(item, str):
+                lines.append(item)
+                continue
+            line, table, r = item
+            if i == moves[-1]:
+                table = table.copy()
+                table[-1, r] = 0                                # 最后一段不混合
+            lines.extend(line % tuple(row) for row in table.tolist())
+        return 'def %s():\n%s\nend\n' % (self.name, '\n'.join('  ' + line for line in lines))
+
+
+class ScriptLibrary:
+    '''
+    脚本库：脚本文件按（路径, 修改时间）缓存，文件未修改时不再读盘
+    读入时把 {name} 占位符预先拆分好，发送时只做拼接；无参数的脚本直接缓存编码后的字节
+    上传使用sendall分块发送，并记录每个脚本的上传耗时
+    '''
+
+    def __init__(self, chunk_size=16384):
+        '''
+        :param chunk_size:  每次sendall的字节数
+        '''
+        self.chunk_size = chunk_size
+        self.scripts = {}                                       # 路径 -> (修改时间, 拆分后的片段, 占位符名称)
+        self.rendered = {}                                      # (路径, 参数) -> 编码后的脚本
+        self.uploads = {}                                       # 路径 -> (最近一次上传耗时 s, 字节数)
+
+    def load(self, path):
+        '''
+        读取脚本，文件修改时间未变时直接使用缓存
+        :param path:    脚本路径
+        :return:        (list, set): 片段（偶数位为原文，奇数位为占位符名称）、占位符名称
+        '''
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
+        cached = self.scripts.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+        with open(path, 'r', encoding='utf8') as f:
+            text = f.read()
+        if not text.endswith('\n'):
+            text += '\n'                                        # 控制器按行解析，末尾需要换行
+        parts = PLACEHOLDER.split(text)
+        names = set(parts[1::2])
+        self.scripts[path] = (mtime, parts, names)
+        self.rendered = {key: value for key, value in self.rendered.items() if key[0] != path}
+        return parts, names
+
+    def render(self, path, **params):
+        '''
+        生成要发送的脚本
+        :param path:    脚本路径
+        :param params:  占位符参数
+        :return:        bytes
+        '''
+        parts, names = self.load(path)
+        missing = names - set(params)
+        if missing:
+            raise ValueError('脚本%s缺少参数：%s' % (path, ', '.join(sorted(missing))))
+        key = (os.path.abspath(path), tuple(sorted((name, str(params[name])) for name in names)))
+        data = self.rendered.get(key)
+        if data is None:
+            text = list(parts)
+            for i in range(1, len(text), 2):
+                text[i] = str(params[text[i]])
+            data = ''.join(text).encode('utf8')
+            if len(self.rendered) >= 64:                        # 参数组合过多时清空，避免无限增长
+                self.rendered.clear()
+            self.rendered[key] = data
+        return data
+
+    def upload(self, sendall, path, **params):
+        '''
+        上传脚本
+        :param sendall: 发送函数，如 UR5.send_30003
+        :param path:    脚本路径
+        :param params:  占位符参数
+        :return:        float: 上传耗时，s
+        '''
+        data = memoryview(self.render(path, **params))
+        start = time.perf_counter()
+        for offset in range(0, len(data), self.chunk_size):
+            sendall(data[offset:offset + self.chunk_size])
+        elapsed = time.perf_counter() - start
+        self.uploads[os.path.abspath(path)] = (elapsed, len(data))
+        return elapsed
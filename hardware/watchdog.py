@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 23:40
+@Auth ： Ethan
+@File ：watchdog.py
+@IDE ：PyCharm
+"""
+import time
+import struct
+
+from hardware.latency import now
+
+
+RUNTIME = struct.Struct('>d')                                   # 机器运行时长，紧跟4字节长度前缀
+
+
+class ReceiverWatchdog:
+    '''
+    接收看门狗：在接收进程（30003、RTDE、主/副接口）中使用，统计写入遥测共享内存的头部，界面等读取端据此判断数据是否可信
+    - 断流：socket超时（timeout秒内没有数据）或连接异常时标记数据陈旧，记录检测耗时
+    - 重连：按指数退避重连，收到第一帧后清除陈旧标记，记录恢复耗时
+    - 丢帧：相邻两帧的机器运行时长之差超过1.5个周期时计为一次间隔，按周期数估算丢失的帧数（含断线期间）
+    - 帧周期：未指定帧频率时取相邻两帧机器运行时长之差的最小值（CB3为125Hz，e系列为500Hz，1140字节的布局两者都有）
+    '''
+
+    def __init__(self, telemetry, frame_rate=None, timeout=0.1, backoff=0.05, max_backoff=2.0):
+        '''
+        :param telemetry:   TelemetryRing
+        :param frame_rate:  帧频率，Hz，为None时按机器运行时长测量，测得的帧周期写入共享内存头部
+        :param timeout:     接收超时，s，不小于3个帧周期
+        :param backoff:     首次重连的等待时间，s
+        :param max_backoff: 重连等待时间上限，s
+        '''
+        self.telemetry = telemetry
+        self.measure = frame_rate is None                       # 是否测量帧周期
+        self.period = None                                      # 帧周期，s，测量前为None
+        self.timeout = timeout
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.last_runtime = None                                # 上一帧的机器运行时长
+        self.last_received = None                               # 上一帧的接收时间
+        self.detected = None                                    # 检测到断流的时间
+        self.stale = False
+        self.disconnects = 0
+        self.gaps = 0
+        self.missed = 0
+        if frame_rate is not None:
+            self.set_period(1 / frame_rate)
+
+    def set_period(self, period):
+        '''
+        设置帧周期，接收超时不小于3个帧周期
+        :param period:  帧周期，s
+        :return:        None
+        '''
+        self.period = period
+        self.timeout = max(self.timeout, 3 * period)
+        self.publish({'帧周期': period})
+
+    def frame(self, res, received, offset=4):
+        '''
+        每收到一帧调用
+        :param res:         一帧原始数据
+        :param received:    接收时间
+        :param offset:      机器运行时长在res中的位置，30003布局为4
+        :return:            None
+        '''
+        runtime = RUNTIME.unpack_from(res, offset)[0]
+        if self.last_runtime is not None:
+            delta = runtime - self.last_runtime
+            if self.measure and delta > 0 and (self.period is None or delta < self.period * 0.9):
+                self.set_period(delta)                          # 丢帧时的差值是周期的整数倍，取最小值
+            steps = delta / self.period if self.period is not None else 0.0
+            if steps > 1.5:
+                self.gaps += 1
+                self.missed += int(round(steps)) - 1
+                self.publish({'间隔次数': self.gaps, '丢失帧数': self.missed})
+        self.last_runtime = runtime
+        self.last_received = received
+        if self.stale:                                          # 重连后的第一帧
+            self.stale = False
+            self.publish({'数据陈旧': 0, '最近恢复耗时': received - self.detected})
+
+    def stalled(self):
+        '''
+        接收超时或连接异常时调用，标记数据陈旧
+        :return:    None
+        '''
+        detected = now()
+        if self.stale:                                          # 重连过程中再次失败，沿用首次检测的时间
+            return
+        self.stale = True
+        self.detected = detected
+        self.disconnects += 1
+        since = detected - self.last_received if self.last_received is not None else 0.0
+        self.publish({'数据陈旧': 1, '断线次数': self.disconnects, '最近检测耗时': since})
+
+    def delays(self):
+        '''
+        重连的等待时间序列：backoff, 2*backoff, 4*backoff ... 不超过max_backoff
+        :return:    generator: float
+        '''
+        delay = self.backoff
+        while True:
+            yield delay
+            delay = min(delay * 2, self.max_backoff)
+
+    def reconnect(self, connect, cancelled):
+        '''
+        按指数退避重连，期间cancelled()为True时（进程被要求退出或进入休眠）放弃
+        :param connect:     连接函数，失败时抛出OSError
+        :param cancelled:   是否放弃重连
+        :return:            connect的返回值，放弃时为None
+        '''
+        for delay in self.delays():
+            if cancelled():
+                return None
+            try:
+                return connect()
+            except OSError:
+                time.sleep(delay)
+
+    def publish(self, stats):
+        self.telemetry.set_stats(stats)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+@Time ： 2026/10/18 19:00
+@Auth ： Ethan
+@File ：dashboard_poller.py
+@IDE ：PyCharm
+"""
+import json
+import threading
+from PySide2.QtCore import QThread, Signal
+
+from hardware.dashboard import DashboardClient, DashboardCache
+
+
+class DashboardPoller(QThread):
+    '''
+    Dashboard状态轮询线程：按固定频率刷新配置的查询指令，结果放在缓存中
+    只有值发生变化时才发出changed信号，界面控件连接信号或读取缓存，不会阻塞在网络上
+    使用单独的Dashboard连接，不占用UR5.dashboard所用的连接
+    '''
+    changed = Signal(str, object)                               # 名称、新值
+    connection = Signal(bool)                                   # Dashboard连接状态变化
+
+    def __init__(self, config, names=None, interval=None):
+        '''
+        :param config:      主界面加载的配置文件，使用UR_IP、dashboard_port、dashboard_poll、dashboard_poll_rate
+        :param names:       轮询的指令名称（static/Dashboard.json中的键），缺省使用dashboard_poll
+        :param interval:    轮询间隔，ms，缺省使用dashboard_poll_rate
+        '''
+        super(DashboardPoller, self).__init__()
+        with open('static/Dashboard.json', 'r', encoding='utf8') as json_file:
+            instructs = json.load(json_file)
+        names = names or config.get('dashboard_poll', ['机器人模式', '安全状态查询', '程序状态', '运行状态查询'])
+        self.interval = (interval or config.get('dashboard_poll_rate', 500)) / 1000
+        self.client = DashboardClient(config['UR_IP'], config.get('dashboard_port', 29999), attempts=1)
+        self.cache = DashboardCache(self.client, {name: instructs[name] for name in names})
+        self.online = None                                      # 最近一次的连接状态
+        self.stopped = threading.Event()
+
+    def run(self):
+        self.stopped.clear()
+        while not self.stopped.is_set():
+            try:
+                changes = self.cache.poll()
+                online = True
+            except ConnectionError:
+                changes = {}
+                online = False
+            if online != self.online:
+                self.online = online
+                self.connection.emit(online)
+            for name, value in changes.items():
+                self.changed.emit(name, value)
+            self.stopped.wait(self.interval)                    # 断线时同样按间隔重试，可随时被stop唤醒
+        self.client.close()
+
+    def get(self, name, default=None):
+        '''
+        读取缓存
+        :param name:    指令名称
+        :param default: 尚未取得时的返回值
+        :return:        解析后的值
+        '''
+        return self.cache.get(name, default)
+
+    def stop(self):
+        '''
+        停止轮询并等待线程结束
+        :return:    None
+        '''
+        self.stopped.set()
+        self.wait()
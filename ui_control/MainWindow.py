@@ -5,7 +5,7 @@
 @File ：MainWindow.py
 @IDE ：PyCharm
 """
-from PySide2.QtWidgets import QMainWindow, QButtonGroup, QWidget
+from PySide2.QtWidgets import QMainWindow, QButtonGroup, QWidget, QLabel
 from PySide2.QtCore import Qt, QPoint, QTimer
 from PySide2.QtGui import QIcon
 from pyvistaqt import QtInteractor
@@ -17,8 +17,15 @@ import time
 
 from ui.ui_MainWindow import Ui_MainWindow
 from sys_threading.control_robot import ControlRobot
+from sys_threading.dashboard_poller import DashboardPoller
 from ui_control.MessageBox import MassageBox
 from hardware.UR5 import UR5, Test
+from hardware.telemetry import TelemetryRing
+from hardware.rtde import RTDEReceiver
+from hardware.primary import PrimaryReceiver, FIELDS_PRIMARY
+from hardware.packet import FIELDS_30003
+from hardware.aggregation import TelemetryAggregator
+from hardware.latency import now, format_time
 import models.mapping as mp
 
 
@@ -35,7 +42,7 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.CR = ControlRobot(self)                                # 初始化机械臂模型控制类
         self.CR.joint_rotation(2, self.joint_angles[1])             # 初始化UR5模型位姿
         self.update_sim_info()                                      # 根据初始化后的UR5位姿，刷新界面显示的值
-        self.UR5 = UR5(self.config, self.data30003, self.UR5_event, self.UR5_process_control)  # UR5实机操控函数
+        self.UR5 = UR5(self.config, self.telemetry, self.UR5_event, self.UR5_process_control)  # UR5实机操控函数
         self.MSG = MassageBox()                                     # 重写的MessageBox窗体
 
         # 绑定系统界面最小化、最大化/正常化、关闭的按钮信号槽
@@ -117,15 +124,36 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.UR5_event = multiprocessing.Event()                        # 事件决定进程状态（正常、休眠）
 
         os.environ["QT_API"] = "PySide2"                                # 设置Qt的绑定库为PySide2,不然会有报错提示
-        # 定义数据接收进程共享字典
-        manager = multiprocessing.Manager()                             # 进程管理器
-        self.data30003 = manager.dict()                                 # 创建共享字典对象
+        # 定义数据接收进程共享内存（遥测环形缓冲区）
+        self.telemetry = TelemetryRing(create=True, capacity=self.config.get('telemetry_capacity', 1024))
+        self.UR5_stats = TelemetryAggregator(self.telemetry, window=self.config.get('aggregate_window', 5000),
+                                             points=self.config.get('aggregate_points', 250))  # 电流、温度、力的滑动窗口统计
+        self.UR5_latency = self.telemetry.latency()                     # 链路延迟直方图，界面记录界面读取、渲染两个阶段
 
         # 定义数据接收进程控制状态
         manager = multiprocessing.Manager()                             # 进程管理器
         self.UR5_process_control = manager.dict()                       # 创建共享字典对象
         self.UR5_process_control['Process_flag'] = False                # UR5进程开关，控制进程状态
 
+        # 按配置开启的其他数据接收进程，与UR5进程一同开启、休眠、停止；TelemetryRing为单写者，各自使用独立的共享内存
+        self.receivers = []                                             # 数据接收进程
+        self.receiver_rings = []                                        # 对应的遥测共享内存，关闭系统时释放
+        self.display_telemetry, self.display_source = self.telemetry, '30003'   # 界面显示的数据来源
+        UI_fields = ['实际关节位置', '数字输入', '数字输出', '机器运行时长']
+        if self.config.get('rtde_enabled'):                             # RTDE只接收配方中的字段，界面改为显示RTDE数据
+            rtde_config = dict(self.config, rtde_fields=list(dict.fromkeys(self.config.get('rtde_fields', []) + UI_fields)))
+            self.rtde_telemetry = TelemetryRing(create=True, capacity=self.config.get('telemetry_capacity', 1024))
+            self.receivers.append(RTDEReceiver(rtde_config, self.rtde_telemetry, self.UR5_event, self.UR5_process_control))
+            self.receiver_rings.append(self.rtde_telemetry)
+            self.display_telemetry, self.display_source = self.rtde_telemetry, 'RTDE'
+        if self.config.get('primary_enabled'):                          # 主/副接口：30003没有的工具、主板、标定DH数据
+            self.primary_telemetry = TelemetryRing(create=True, capacity=self.config.get('primary_capacity', 64),
+                                                   fields=FIELDS_30003 + FIELDS_PRIMARY)
+            self.receivers.append(PrimaryReceiver(self.config, self.primary_telemetry, self.UR5_event,
+                                                  self.UR5_process_control))
+            self.receiver_rings.append(self.primary_telemetry)
+        self.UR5_fields = self.display_telemetry.subscribe(UI_fields)  # 界面只解析所需字段
+
         # 点击窗口边上，拉伸/缩小窗口所用变量，点击标题栏，移动整个窗体
         self._move_drag = False                                         # 标题栏
         self._corner_drag = False                                       # 右下角
@@ -245,6 +273,10 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.le_angle6.setReadOnly(True)
         self.le_runtime.setReadOnly(True)                               # 机械臂运行时间
 
+        # 状态栏左侧显示滑动窗口统计（电流、温度、力），右侧label_66显示延迟统计
+        self.label_stats = QLabel(self.widget_statusbar)
+        self.horizontalLayout_40.insertWidget(0, self.label_stats)
+
         # 设置机械臂IO的checkbox为只读
         self.chk_DI0.setDisabled(True)
         self.chk_DI1.setDisabled(True)
@@ -443,8 +475,13 @@ class MainWindow(QMainWindow, Ui_MainWindow):
                 if not self.UR5_process_start_status:                                       # 进程未开启，开启进程
                     self.UR5_process_control['Process_flag'] = True                         # 开启进程循环
                     self.UR5.start()                                                        # 启用UR5数据接收进程
+                    for receiver in self.receivers:                                         # 按配置开启的其他数据接收进程
+                        receiver.start()
                     self.UR5_process_start_status = True                                    # 数据接收线程开启标志
                     self.UR5.connect_29999()                                                # 连接Dashboard端口
+                    self.dashboard_poller = DashboardPoller(self.config)                    # 后台轮询Dashboard状态
+                    self.dashboard_poller.changed.connect(self.update_dashboard_info)       # 状态变化时刷新显示
+                    self.dashboard_poller.start()
                 else:
                     self.UR5_event.clear()                                                  # 进程已开启，开启接收事件就行
                 self.timer.start()                                                          # 启用界面刷新定时器
@@ -458,15 +495,56 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         实时刷新UR5机械臂模型、界面显示实际数据
         :return:
         '''
-        self.joint_radians_real = np.array(self.data30003['实际关节位置'])                    # 接收实机关节弧度
+        values = self.UR5_fields.latest()                                                   # 最新一帧的订阅字段
+        if values is None:                                                                  # 尚未接收到数据
+            return
+        telemetry = self.display_telemetry
+        if telemetry.is_stale(self.config.get('stale_age', 0.5)):                           # 断流、重连中，不再当作实时数据显示
+            self.label_66.setText('%s数据中断 %s，正在重连（断线%d次）' % (
+                self.display_source, format_time(telemetry.age()), telemetry.header['断线次数']))
+            return
+        received = self.UR5_fields.stamp                                                    # 该帧的接收时间
+        self.UR5_latency.record(2, now() - received)                                        # 界面读取
+        radians, DI, DO, runtime = values
+        self.joint_radians_real = np.array(radians)                                         # 接收实机关节弧度
         self.joint_angles_real = np.array(self.joint_radians_real) / np.pi * 180            # 实机弧度转为实机角度
 
         # 根据接收到的实机数据，转动模型至指定位置
         for i in range(6):
             self.CR.joint_rotation(i+1, self.joint_angles_real[i])                          # 转动关节
         self.update_sim_info()                                                              # 刷新UR5数据
-        self.update_UR5_info()                                                              # 刷新UR5其他数据
-        pass
+        self.update_UR5_info(DI, DO, runtime)                                               # 刷新UR5其他数据
+        self.UR5_latency.record(3, now() - received)                                        # 渲染（界面更新完成）
+        self.label_66.setText(self.UR5_latency.text())                                      # 状态栏显示延迟统计
+        self.update_stats_info()                                                            # 状态栏显示滑动窗口统计
+
+    def update_stats_info(self):
+        '''
+        增量更新滑动窗口统计，状态栏显示窗口内关节电流均方根、电机温度、TCP力的最大值
+        :return:    None
+        '''
+        if self.UR5_stats.poll() == 0:                                                      # 没有新帧，沿用上次的显示
+            return
+        current = self.UR5_stats.stats('实际关节电流')
+        temperature = self.UR5_stats.stats('电机温度')
+        force = self.UR5_stats.stats('TCP一般力')
+        if current is None:
+            return
+        force = np.maximum(np.abs(force['最小值']), np.abs(force['最大值']))[:3]           # x、y、z方向的力
+        self.label_stats.setText('近%.0fs  电流RMS %.2fA  电机温度 %.1f℃  TCP力 %.1fN' % (
+            self.UR5_stats.span(self.telemetry.frame_rate()), current['均方根'].max(),
+            temperature['最大值'].max(), force.max()))
+
+    def update_dashboard_info(self, name, value):
+        '''
+        Dashboard状态变化时刷新显示（由轮询线程的changed信号触发，在界面线程执行）
+        :param name:    指令名称
+        :param value:   解析后的值
+        :return:        None
+        '''
+        mode = self.dashboard_poller.get('机器人模式', '-')
+        safety = self.dashboard_poller.get('安全状态查询', '-')
+        self.groupBox_5.setTitle('UR5通讯  %s / %s' % (mode, safety))                     # 机器人模式 / 安全状态
 
     def update_sim_info(self):
         '''
@@ -513,18 +591,21 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         self.sld_joint5.setValue((self.joint_angles[4] / self.sld_pre))
         self.sld_joint6.setValue((self.joint_angles[5] / self.sld_pre))
 
-    def update_UR5_info(self):
+    def update_UR5_info(self, DI, DO, runtime):
         '''
         刷新接收到的UR5实机数据
+        :param DI:      数字输入
+        :param DO:      数字输出
+        :param runtime: 机器运行时长，s
         :return:
         '''
-        DI = bin(256 | self.data30003['数字输入'])[3:]                                           # 处理数字输入值,1-开启，0-关闭
-        DO = bin(256 | self.data30003['数字输出'])[3:]                                           # 处理数字输出值,1-开启，0-关闭
+        DI = bin(256 | int(DI))[3:]                                                         # 处理数字输入值,1-开启，0-关闭
+        DO = bin(256 | int(DO))[3:]                                                         # 处理数字输出值,1-开启，0-关闭
 
         # 刷新机器运行时长
-        hours = int(self.data30003['机器运行时长'] // 3600)                                   # 计算小时
-        minutes = int((self.data30003['机器运行时长'] % 3600) // 60 )                         # 计算分钟
-        seconds = int(self.data30003['机器运行时长'] % 60)                                    # 计算秒
+        hours = int(runtime // 3600)                                                        # 计算小时
+        minutes = int((runtime % 3600) // 60)                                               # 计算分钟
+        seconds = int(runtime % 60)                                                         # 计算秒
         self.le_runtime.setText('%s: %s: %s' % (hours, minutes, seconds))                   # 显示机械臂运行时间
 
         # 刷新界面数据
@@ -661,9 +742,16 @@ class MainWindow(QMainWindow, Ui_MainWindow):
         :return:    None
         '''
         self.UR5_process_control['Process_flag'] = False            # 关闭进程循环，结束数据接收进程
+        self.UR5.motion.stop()                                      # 取消未完成的运动Future
         if self.UR5_process_start_status:
+            self.dashboard_poller.stop()                            # 停止Dashboard轮询线程
             self.UR5.close_29999()                                  # 关闭DashBoard端口
         time.sleep(0.2)                                             # 给0.2s的延时，确保进程正确关闭
+        if self.config.get('latency_log'):
+            self.UR5_latency.dump(self.config['latency_log'])       # 保存本次运行的延迟统计
+        self.telemetry.close()                                      # 释放遥测共享内存
+        for ring in self.receiver_rings:
+            ring.close()
         self.close()                                                # 关闭系统页面
 
     def mousePressEvent(self, event):